@@ -0,0 +1,274 @@
+import bisect
+import math
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from utils.config import get_section
+from utils.math_utils import angle_diff, wrap_angle, pixel_to_angles, pixel_velocity_to_angular
+from utils.replay_manager import ReplayReader, iter_frame_records
+from vision.tracker import MultiTargetTracker
+
+
+DEFAULT_AIM_SETTINGS = {
+    "compensate": True,
+    "actuation_delay": 0.03,
+    "max_lead": 0.5
+}
+
+
+class PoseHistory:
+    """
+    Taretin zaman damgalı pan/tilt geçmişi (time.perf_counter saatinde).
+    Kamera taretle döndüğü için bir karedeki piksel, o karenin yakalandığı
+    andaki taret açısıyla dünyaya çevrilmelidir.
+    """
+
+    def __init__(self, size=512):
+        self.times = deque(maxlen=size)
+        self.poses = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def record(self, timestamp, pan, tilt):
+        """Yeni örnek (zaman sırasıyla) ekle"""
+        with self.lock:
+            self.times.append(timestamp)
+            self.poses.append((pan, tilt))
+
+    def at(self, timestamp):
+        """timestamp anındaki (pan, tilt, pan hızı, tilt hızı); geçmiş boşsa None"""
+        with self.lock:
+            if not self.times:
+                return None
+            times = list(self.times)
+            poses = list(self.poses)
+
+        index = bisect.bisect_left(times, timestamp)
+        if index <= 0:
+            index = 1
+        elif index >= len(times):
+            index = len(times) - 1
+        if len(times) == 1:
+            pan, tilt = poses[0]
+            return pan, tilt, 0.0, 0.0
+
+        t0, t1 = times[index - 1], times[index]
+        (pan0, tilt0), (pan1, tilt1) = poses[index - 1], poses[index]
+        span = max(t1 - t0, 1e-6)
+        pan_rate = angle_diff(pan1, pan0) / span
+        tilt_rate = (tilt1 - tilt0) / span
+        # Aralık içinde doğrusal ara değer, dışında son hız ile uzatma yapılmaz (kenara sıkıştırılır)
+        offset = min(max(timestamp - t0, 0.0), span)
+        return wrap_angle(pan0 + pan_rate * offset), tilt0 + tilt_rate * offset, pan_rate, tilt_rate
+
+    def clear(self):
+        """Geçmişi sil"""
+        with self.lock:
+            self.times.clear()
+            self.poses.clear()
+
+
+class AimPredictor:
+    """
+    Gecikme telafili nişan noktası.
+    İz durumu karenin yakalanma anına aittir; hedef, komutun tarete ulaşacağı
+    ana (şimdi + ölçülen çıkış gecikmesi + servo gecikmesi) kadar ileri tahmin edilir.
+    """
+
+    def __init__(self, hfov, vfov, actuation_delay=0.03, max_lead=0.5, compensate=True):
+        self.hfov = hfov
+        self.vfov = vfov
+        self.actuation_delay = actuation_delay  # s; komut ESP32'ye ulaştıktan sonra servo gecikmesi
+        self.max_lead = max_lead                # s; tahmin ufkunun üst sınırı
+        self.compensate = compensate
+        self.output_delay = 0.0                 # s; komut isteğinden ESP32'ye varışa (ölçülen)
+        self.last_lead = 0.0
+
+    @classmethod
+    def from_settings(cls, settings=None, camera=None):
+        """config/settings.json 'aim' ve 'camera' bölümlerinden oluştur"""
+        settings = settings or get_section("aim", DEFAULT_AIM_SETTINGS)
+        camera = camera or get_section("camera", {"hfov": 70.0, "vfov": 43.0})
+        return cls(
+            hfov=camera["hfov"],
+            vfov=camera["vfov"],
+            actuation_delay=settings["actuation_delay"],
+            max_lead=settings["max_lead"],
+            compensate=settings["compensate"]
+        )
+
+    def update_output_delay(self, link_stats, channel_stats):
+        """ESP32 ACK ölçümlerinden tek yön komut gecikmesini güncelle"""
+        if "command_setpoint" not in channel_stats or "ack" not in link_stats:
+            return
+        # İstek->ACK süresinden dönüş yolunun yarısı çıkarılır
+        one_way = channel_stats["command_setpoint"]["p50"] - link_stats["ack"]["p50"] / 2
+        self.output_delay = max(0.0, one_way / 1000.0)
+
+    def lead_time(self, observed_at, now):
+        """Gözlemden eyleme kadar tahmin edilecek süre (s)"""
+        if not self.compensate:
+            return 0.0
+        lead = now + self.output_delay + self.actuation_delay - observed_at
+        return min(max(lead, 0.0), self.max_lead)
+
+    def aim(self, track, frame_w, frame_h, pose, now):
+        """
+        İz için nişan: (pan, tilt, pan hızı, tilt hızı).
+        pose: karenin yakalandığı andaki taret (pan, tilt, pan hızı, tilt hızı).
+        """
+        center_x, center_y = track["center"]
+        velocity_x, velocity_y = track["velocity"]
+        turret_pan, turret_tilt, turret_pan_rate, turret_tilt_rate = pose
+
+        pan, tilt = pixel_to_angles(center_x, center_y, frame_w, frame_h, self.hfov, self.vfov,
+                                    turret_pan, turret_tilt)
+        pan_rate, tilt_rate = pixel_velocity_to_angular(center_x, center_y, velocity_x, velocity_y,
+                                                        frame_w, frame_h, self.hfov, self.vfov)
+        # Görüntüdeki hız kameraya göredir; dünyadaki hız için taretin hızı eklenir
+        pan_rate += turret_pan_rate
+        tilt_rate += turret_tilt_rate
+
+        lead = self.lead_time(track["time"], now)
+        self.last_lead = lead
+        return wrap_angle(pan + pan_rate * lead), tilt + tilt_rate * lead, pan_rate, tilt_rate
+
+
+def load_replay_detections(path):
+    """
+    Görev kaydının kare kayıtlarındaki tespitler -> (kareler, (w, h)).
+    Canlıda tespit asenkron olduğu için her sonuç, ait olduğu karenin (detection_frame_id)
+    kayıt zamanıyla bir kez alınır.
+    """
+    reader = ReplayReader(path)
+    frame_times = {}
+    seen = set()
+    frames = []
+    frame_size = None
+    try:
+        for timestamp, _, data in iter_frame_records(reader):
+            frame_times[data["frame_id"]] = timestamp
+            frame_size = frame_size or data.get("frame_size")
+            result_id = data.get("detection_frame_id")
+            if result_id is None or result_id in seen or result_id not in frame_times:
+                continue
+            seen.add(result_id)
+            boxes = [detection[:4] for detection in data["detections"]]
+            frames.append((frame_times[result_id], np.asarray(boxes, dtype=np.float64).reshape(-1, 4)))
+    finally:
+        reader.close()
+    return frames, tuple(frame_size) if frame_size else None
+
+
+def synthetic_detections(duration=10.0, fps=30.0, frame_size=(1280, 720), noise=2.0, seed=0):
+    """Test için yörünge: yatayda salınan, dikeyde yavaş süzülen tek balon"""
+    rng = np.random.default_rng(seed)
+    frame_w, frame_h = frame_size
+    frames = []
+    for index in range(int(duration * fps)):
+        t = index / fps
+        center_x = frame_w / 2 + 0.35 * frame_w * math.sin(2 * math.pi * t / 4.0)
+        center_y = frame_h / 2 + 0.2 * frame_h * math.sin(2 * math.pi * t / 7.0)
+        center_x += rng.normal(0, noise)
+        center_y += rng.normal(0, noise)
+        size = 60.0
+        frames.append((t, np.array([[center_x - size / 2, center_y - size / 2,
+                                     center_x + size / 2, center_y + size / 2]])))
+    return frames, frame_size
+
+
+def truth_at(frames, timestamp):
+    """Kaydedilmiş en büyük kutunun merkezini timestamp anına ara değerle (yoksa None)"""
+    times = [t for t, boxes in frames]
+    index = bisect.bisect_left(times, timestamp)
+    if index <= 0 or index >= len(frames):
+        return None
+
+    def primary_center(boxes):
+        if len(boxes) == 0:
+            return None
+        box = boxes[np.argmax(boxes[:, 2] - boxes[:, 0])]
+        return (box[0] + box[2]) / 2, (box[1] + box[3]) / 2
+
+    (t0, boxes0), (t1, boxes1) = frames[index - 1], frames[index]
+    c0, c1 = primary_center(boxes0), primary_center(boxes1)
+    if c0 is None or c1 is None:
+        return None
+    w = (timestamp - t0) / max(t1 - t0, 1e-9)
+    return c0[0] + (c1[0] - c0[0]) * w, c0[1] + (c1[1] - c0[1]) * w
+
+
+def evaluate_aim(frames, frame_size, pipeline_delay, actuation_delay, compensate,
+                 hfov=70.0, vfov=43.0, tracker_settings=None):
+    """
+    Kayıtlı tespitleri izleyiciden geçirip nişan hatasını ölç (sabit taret).
+    Sonuç kare yakalamadan pipeline_delay sonra hazır olur; komut actuation_delay
+    sonra tarete ulaşır. Hata, o andaki gerçek konuma göre derece cinsindendir.
+    """
+    frame_w, frame_h = frame_size
+    tracker = MultiTargetTracker.from_settings(tracker_settings)
+    predictor = AimPredictor(hfov, vfov, actuation_delay=actuation_delay, compensate=compensate)
+    pose = (0.0, 0.0, 0.0, 0.0)
+
+    errors = []
+    for capture_time, boxes in frames:
+        tracker.update(boxes, np.ones(len(boxes)), np.zeros(len(boxes)), capture_time)
+        tracks = tracker.get_tracks()
+        if not tracks:
+            continue
+
+        now = capture_time + pipeline_delay
+        track = max(tracks, key=lambda t: t["box"][2] - t["box"][0])
+        aim_pan, aim_tilt, _, _ = predictor.aim(track, frame_w, frame_h, pose, now)
+
+        truth = truth_at(frames, now + actuation_delay)
+        if truth is None:
+            continue
+        true_pan, true_tilt = pixel_to_angles(truth[0], truth[1], frame_w, frame_h, hfov, vfov,
+                                              pose[0], pose[1])
+        errors.append(math.hypot(angle_diff(aim_pan, true_pan), aim_tilt - true_tilt))
+
+    if not errors:
+        return None
+    errors = np.asarray(errors)
+    return {
+        "samples": len(errors),
+        "mean": float(errors.mean()),
+        "p50": float(np.percentile(errors, 50)),
+        "p95": float(np.percentile(errors, 95)),
+        "max": float(errors.max())
+    }
+
+
+if __name__ == "__main__":
+    # Örnek: python -m control.aim --replay replays/replay_x.replay --pipeline-delay 0.08
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gecikme telafili nişan hatası ölçümü")
+    parser.add_argument("--replay", help="Görev kaydı (.replay); verilmezse yapay yörünge")
+    parser.add_argument("--pipeline-delay", type=float, default=0.1, help="Yakalama->kontrol gecikmesi (s)")
+    parser.add_argument("--actuation-delay", type=float, default=0.03, help="Komut->taret gecikmesi (s)")
+    args = parser.parse_args()
+
+    if args.replay:
+        frames, frame_size = load_replay_detections(args.replay)
+        if not frames or frame_size is None:
+            print("❌ Görev kaydında kare boyutlu tespit kaydı yok")
+            raise SystemExit(1)
+    else:
+        frames, frame_size = synthetic_detections()
+    camera = get_section("camera", {"hfov": 70.0, "vfov": 43.0})
+
+    for compensate in (False, True):
+        start = time.perf_counter()
+        report = evaluate_aim(frames, frame_size, args.pipeline_delay, args.actuation_delay, compensate,
+                              hfov=camera["hfov"], vfov=camera["vfov"])
+        elapsed = time.perf_counter() - start
+        if report is None:
+            print("❌ Değerlendirilecek iz bulunamadı")
+            raise SystemExit(1)
+        name = "telafili " if compensate else "telafisiz"
+        print(f"{name}: ort {report['mean']:.3f}°  p50 {report['p50']:.3f}°  p95 {report['p95']:.3f}°  "
+              f"maks {report['max']:.3f}°  ({report['samples']} örnek, {elapsed:.2f} s)")
@@ -0,0 +1,659 @@
+import binascii
+import os
+import random
+import select
+import struct
+import threading
+import time
+from collections import deque
+
+import serial
+
+from utils.config import get_section
+from utils.perf_stats import LatencyTracker
+
+
+# Ayarlarda port boş bırakılırsa platformun olağan USB-seri port adı kullanılır;
+# farklıysa (ör. COM5, /dev/ttyACM0) config/settings.json 'esp32.port' ile verilir
+DEFAULT_SERIAL_PORT = "COM3" if os.name == "nt" else "/dev/ttyUSB0"
+
+DEFAULT_ESP32_SETTINGS = {
+    "port": "",
+    "baudrate": 921600,
+    "ack_timeout": 0.1,
+    "heartbeat_interval": 0.25,
+    "link_timeout": 1.0,
+    "setpoint_rate": 100.0,
+    "simulate": False
+}
+
+# Komut gecikmesi histogram kovaları (ms)
+COMMAND_HISTOGRAM_EDGES = [1, 2, 5, 10, 20, 50, 100]
+
+# Çerçeve: [SYNC][tip][sıra][uzunluk][yük ...][CRC16 (tip..yük)]
+SYNC = 0xA5
+HEADER = struct.Struct("<BBBB")
+CRC = struct.Struct("<H")
+MAX_PAYLOAD = 32
+
+# Açılar 0.01° çözünürlüklü sabit noktalı tamsayı: pan uint16 (0..35999), tilt int16
+ANGLE_SCALE = 100
+ANGLES = struct.Struct("<Hh")
+ACK = struct.Struct("<BB")  # onaylanan sıra no, durum (0 = tamam)
+
+# PC -> ESP32
+MSG_SETPOINT = 0x01
+MSG_FIRE = 0x02
+MSG_STOP = 0x03
+MSG_PING = 0x04
+# ESP32 -> PC
+MSG_ACK = 0x80
+MSG_TELEMETRY = 0x81
+
+MESSAGE_NAMES = {
+    MSG_SETPOINT: "setpoint",
+    MSG_FIRE: "fire",
+    MSG_STOP: "stop",
+    MSG_PING: "ping",
+    MSG_ACK: "ack",
+    MSG_TELEMETRY: "telemetry"
+}
+
+
+def crc16(data):
+    """CRC-16/CCITT-FALSE (binascii C uygulaması)"""
+    return binascii.crc_hqx(data, 0xFFFF)
+
+
+def encode_frame(msg_type, seq, payload=b""):
+    """Tek bir ikili çerçeve oluştur"""
+    body = HEADER.pack(SYNC, msg_type, seq & 0xFF, len(payload)) + payload
+    return body + CRC.pack(crc16(body[1:]))
+
+
+def encode_angles(pan, tilt):
+    """(pan, tilt) derece -> 4 baytlık sabit noktalı yük"""
+    pan_fixed = int(round(pan * ANGLE_SCALE)) % (360 * ANGLE_SCALE)
+    tilt_fixed = max(-32768, min(32767, int(round(tilt * ANGLE_SCALE))))
+    return ANGLES.pack(pan_fixed, tilt_fixed)
+
+
+def decode_angles(payload):
+    """4 baytlık sabit noktalı yük -> (pan, tilt) derece"""
+    pan_fixed, tilt_fixed = ANGLES.unpack(payload[:ANGLES.size])
+    return pan_fixed / ANGLE_SCALE, tilt_fixed / ANGLE_SCALE
+
+
+class FrameParser:
+    """
+    Akan bayt dizisinden çerçeve ayıklayıcı.
+    Bozuk CRC ya da kayan bayt olursa bir sonraki SYNC baytından yeniden senkronlanır.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.crc_errors = 0
+        self.discarded_bytes = 0
+
+    def feed(self, data):
+        """Yeni baytları ekle; tamamlanan (tip, sıra, yük) çerçevelerini döndür"""
+        self.buffer.extend(data)
+        frames = []
+        buffer = self.buffer
+        while True:
+            start = buffer.find(SYNC)
+            if start < 0:
+                self.discarded_bytes += len(buffer)
+                buffer.clear()
+                break
+            if start:
+                self.discarded_bytes += start
+                del buffer[:start]
+            if len(buffer) < HEADER.size:
+                break
+
+            length = buffer[3]
+            if length > MAX_PAYLOAD:
+                self.discarded_bytes += 1
+                del buffer[:1]
+                continue
+
+            total = HEADER.size + length + CRC.size
+            if len(buffer) < total:
+                break
+
+            body = bytes(buffer[:total - CRC.size])
+            (expected,) = CRC.unpack_from(buffer, total - CRC.size)
+            if crc16(body[1:]) != expected:
+                self.crc_errors += 1
+                self.discarded_bytes += 1
+                del buffer[:1]
+                continue
+
+            frames.append((body[1], body[2], body[HEADER.size:]))
+            del buffer[:total]
+        return frames
+
+
+class ESP32Link:
+    """
+    ESP32 ile ikili seri haberleşme.
+    Gönderimler kuyruğa atılıp hemen döner; tek bir G/Ç thread'i bloklamayan
+    yazma, okuma, ACK eşleştirme ve gidiş-dönüş gecikmesi ölçümünü yapar.
+    """
+
+    def __init__(self, port, baudrate=921600, ack_timeout=0.1, heartbeat_interval=0.25,
+                 link_timeout=1.0, read_timeout=0.002):
+        self.port = port
+        self.baudrate = baudrate
+        self.ack_timeout = ack_timeout                # saniye; ACK gelmezse kayıp sayılır
+        self.heartbeat_interval = heartbeat_interval  # boşta iken ping aralığı
+        self.link_timeout = link_timeout              # bu süre yanıt yoksa bağlantı kopuk
+        self.read_timeout = read_timeout              # boşta okuma beklemesi (yazma gecikmesi üst sınırı)
+
+        self.serial = None
+        self.running = False
+        self.thread = None
+
+        # Acil komutlar normal kuyruğun önüne geçer
+        self.priority_queue = deque()
+        self.queue = deque()
+        self.tx_buffer = bytearray()
+        self.parser = FrameParser()
+
+        self.seq = 0
+        self.seq_lock = threading.Lock()
+        self.pending = {}  # sıra no -> (tip, gönderim zamanı)
+        self.ack_listeners = []
+
+        self.last_tx = 0.0
+        self.last_rx = None
+        self.telemetry = None  # (pan, tilt, zaman)
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.frames_sent = 0
+        self.frames_acked = 0
+        self.frames_nacked = 0
+        self.ack_timeouts = 0
+        self.bytes_sent = 0
+        self.write_stalls = 0
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """config/settings.json 'esp32' bölümünden oluştur (port boşsa DEFAULT_SERIAL_PORT)"""
+        settings = settings or get_section("esp32", DEFAULT_ESP32_SETTINGS)
+        return cls(
+            port=settings["port"] or DEFAULT_SERIAL_PORT,
+            baudrate=settings["baudrate"],
+            ack_timeout=settings["ack_timeout"],
+            heartbeat_interval=settings["heartbeat_interval"],
+            link_timeout=settings["link_timeout"]
+        )
+
+    @property
+    def connected(self):
+        """Port açık ve ESP32 son link_timeout içinde yanıt vermiş mi"""
+        return (self.running and self.last_rx is not None
+                and time.perf_counter() - self.last_rx <= self.link_timeout)
+
+    def add_ack_listener(self, callback):
+        """Her ACK'te callback(sıra, tip, gidiş-dönüş ms) çağrılır (G/Ç thread'inden)"""
+        self.ack_listeners.append(callback)
+
+    def connect(self):
+        """Portu aç ve G/Ç thread'ini başlat"""
+        if self.running:
+            return True
+        try:
+            # write_timeout=0: yazma hiç beklemez, yazılabilen kadarını yazar
+            self.serial = serial.serial_for_url(self.port, baudrate=self.baudrate,
+                                                timeout=self.read_timeout, write_timeout=0)
+        except serial.SerialException as e:
+            print(f"❌ ESP32 portu açılamadı ({self.port}): {e}")
+            self.serial = None
+            return False
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        print(f"🔌 ESP32 bağlantısı açıldı: {self.port} @ {self.baudrate}")
+        return True
+
+    def disconnect(self):
+        """G/Ç thread'ini durdur ve portu kapat"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+        self.last_rx = None
+
+    def next_seq(self):
+        """8 bitlik dönen sıra numarası"""
+        with self.seq_lock:
+            self.seq = (self.seq + 1) & 0xFF
+            return self.seq
+
+    def send(self, msg_type, payload=b"", priority=False):
+        """Çerçeveyi gönderim kuyruğuna at (bloklamaz); sıra no döndürür"""
+        if not self.running:
+            return None
+        seq = self.next_seq()
+        frame = (msg_type, seq, encode_frame(msg_type, seq, payload))
+        if priority:
+            self.priority_queue.append(frame)
+        else:
+            self.queue.append(frame)
+        return seq
+
+    def send_setpoint(self, pan, tilt):
+        """Pan/tilt hedef açılarını gönder"""
+        return self.send(MSG_SETPOINT, encode_angles(pan, tilt))
+
+    def fire(self):
+        """Ateş komutu (öncelikli)"""
+        return self.send(MSG_FIRE, priority=True)
+
+    def emergency_stop(self):
+        """Acil durdur komutu (öncelikli)"""
+        return self.send(MSG_STOP, priority=True)
+
+    def ping(self):
+        """Bağlantı kontrolü"""
+        return self.send(MSG_PING)
+
+    def run(self):
+        """G/Ç thread'inin ana döngüsü"""
+        try:
+            while self.running:
+                self.write_pending()
+                self.read_available()
+                self.expire_pending()
+        except (serial.SerialException, OSError) as e:
+            print(f"❌ ESP32 bağlantı hatası: {e}")
+            self.running = False
+
+    def write_pending(self):
+        """Kuyruktaki çerçeveleri bloklamadan porta yaz"""
+        now = time.perf_counter()
+        if not self.tx_buffer:
+            if not self.priority_queue and not self.queue and now - self.last_tx >= self.heartbeat_interval:
+                self.ping()
+            for queue in (self.priority_queue, self.queue):
+                while queue:
+                    msg_type, seq, frame = queue.popleft()
+                    self.pending[seq] = (msg_type, now)
+                    self.tx_buffer.extend(frame)
+                    self.frames_sent += 1
+
+        if self.tx_buffer:
+            written = self.serial.write(self.tx_buffer) or 0
+            del self.tx_buffer[:written]
+            self.bytes_sent += written
+            self.last_tx = now
+            if self.tx_buffer:
+                # Çıkış tamponu dolu: kalan bir sonraki turda
+                self.write_stalls += 1
+
+    def read_available(self):
+        """Gelen baytları oku ve çerçeveleri işle"""
+        busy = self.tx_buffer or self.priority_queue or self.queue
+        waiting = self.serial.in_waiting
+        if not waiting and busy:
+            return
+        # Boşta iken read_timeout kadar bekler; gönderilecek veri varken beklemez
+        data = self.serial.read(waiting or 1)
+        if not data:
+            return
+
+        now = time.perf_counter()
+        for msg_type, seq, payload in self.parser.feed(data):
+            self.last_rx = now
+            if msg_type == MSG_ACK and len(payload) >= ACK.size:
+                acked_seq, status = ACK.unpack_from(payload)
+                self.handle_ack(acked_seq, status, now)
+            elif msg_type == MSG_TELEMETRY and len(payload) >= ANGLES.size:
+                pan, tilt = decode_angles(payload)
+                self.telemetry = (pan, tilt, time.time())
+
+    def handle_ack(self, seq, status, now):
+        """ACK'i bekleyen çerçeveyle eşleştir ve gecikmeyi kaydet"""
+        entry = self.pending.pop(seq, None)
+        if entry is None:
+            return
+        msg_type, sent_at = entry
+        round_trip = (now - sent_at) * 1000.0
+        if status == 0:
+            self.frames_acked += 1
+        else:
+            self.frames_nacked += 1
+        self.latency.record("ack", round_trip)
+        self.latency.record(f"ack_{MESSAGE_NAMES.get(msg_type, msg_type)}", round_trip)
+        for callback in self.ack_listeners:
+            callback(seq, msg_type, round_trip)
+
+    def expire_pending(self):
+        """Süresi dolan ACK beklemelerini kayıp say"""
+        if not self.pending:
+            return
+        deadline = time.perf_counter() - self.ack_timeout
+        expired = [seq for seq, (_, sent_at) in self.pending.items() if sent_at < deadline]
+        for seq in expired:
+            del self.pending[seq]
+        self.ack_timeouts += len(expired)
+
+    def get_stats(self):
+        """Bağlantı sayaçları ve ACK gecikme istatistikleri"""
+        stats = self.latency.get_stats()
+        stats["link"] = {
+            "connected": self.connected,
+            "sent": self.frames_sent,
+            "acked": self.frames_acked,
+            "nacked": self.frames_nacked,
+            "timeouts": self.ack_timeouts,
+            "bytes_sent": self.bytes_sent,
+            "write_stalls": self.write_stalls,
+            "crc_errors": self.parser.crc_errors,
+            "queued": len(self.queue) + len(self.priority_queue)
+        }
+        return stats
+
+
+class SetpointChannel:
+    """
+    ESP32'ye sabit hızlı setpoint akışı.
+    Slider/otonom mod ne sıklıkta komut üretirse üretsin tek bir "en son değer"
+    yuvası tutulur (latest-wins); yuva saniyede rate kez gönderilir.
+    Ateş ve acil durdur bu yuvayı beklemez, doğrudan öncelikli kuyruğa gider.
+    """
+
+    def __init__(self, link, rate=100.0):
+        self.link = link
+        self.rate = rate
+        self.running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+        self.pan = None
+        self.tilt = None
+        self.pending = None     # (pan, tilt, istek zamanı) gönderilmeyi bekleyen son değer
+        self.in_flight = {}     # sıra no -> (tip, istek zamanı)
+
+        # Sayaçlar
+        self.latency = LatencyTracker(histogram_edges=COMMAND_HISTOGRAM_EDGES)
+        self.requested = 0
+        self.sent = 0
+        self.coalesced = 0      # gönderilmeden üzerine yazılan istekler
+        self.dropped = 0        # bağlantı yokken atılan ya da ACK'i hiç gelmeyen setpoint'ler
+        self.deferred = 0       # önceki setpoint henüz porta yazılmadığı için ertelenen turlar
+
+        link.add_ack_listener(self.on_ack)
+
+    def set(self, pan=None, tilt=None):
+        """Yeni hedef açı(lar); verilmeyen eksen son değerini korur"""
+        with self.lock:
+            if pan is not None:
+                self.pan = pan
+            if tilt is not None:
+                self.tilt = tilt
+            if self.pan is None or self.tilt is None:
+                return
+            self.requested += 1
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = (self.pan, self.tilt, time.perf_counter())
+
+    def fire(self):
+        """Ateş komutu (kuyruğu atlar)"""
+        return self.send_urgent(MSG_FIRE, self.link.fire)
+
+    def emergency_stop(self):
+        """Acil durdur (kuyruğu atlar, bekleyen setpoint iptal edilir)"""
+        with self.lock:
+            if self.pending is not None:
+                self.dropped += 1
+                self.pending = None
+        return self.send_urgent(MSG_STOP, self.link.emergency_stop)
+
+    def send_urgent(self, msg_type, send):
+        """Öncelikli komutu gönder ve gecikmesini izle"""
+        with self.lock:
+            issued = time.perf_counter()
+            seq = send()
+            if seq is not None:
+                self.in_flight[seq] = (msg_type, issued)
+            return seq
+
+    def start(self):
+        """Gönderim thread'ini başlat"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Gönderim thread'ini durdur"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def run(self):
+        """Sabit hızlı gönderim döngüsü"""
+        interval = 1.0 / self.rate
+        next_time = time.perf_counter()
+        while self.running:
+            self.flush()
+            self.expire()
+            next_time += interval
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Geride kaldıysak birikmiş turları atlayıp saate yeniden otur
+                next_time = time.perf_counter()
+
+    def flush(self):
+        """Bekleyen son setpoint'i gönder"""
+        with self.lock:
+            if self.pending is None:
+                return
+            if not self.link.running:
+                self.dropped += 1
+                self.pending = None
+                return
+            if self.link.queue:
+                # Önceki setpoint porta yazılmadı; yuvada kalan değer bir sonraki turda gider
+                self.deferred += 1
+                return
+
+            pan, tilt, issued = self.pending
+            seq = self.link.send_setpoint(pan, tilt)
+            self.pending = None
+            if seq is None:
+                self.dropped += 1
+                return
+            self.in_flight[seq] = (MSG_SETPOINT, issued)
+            self.sent += 1
+            self.latency.record_since("queue", issued)
+
+    def on_ack(self, seq, msg_type, round_trip):
+        """İstekten ACK'e kadar geçen uçtan uca gecikme"""
+        with self.lock:
+            entry = self.in_flight.pop(seq, None)
+        if entry is None or entry[0] != msg_type:
+            return
+        self.latency.record_since(f"command_{MESSAGE_NAMES[msg_type]}", entry[1])
+
+    def expire(self):
+        """ACK süresi dolan komutları düşmüş say"""
+        deadline = time.perf_counter() - self.link.ack_timeout
+        with self.lock:
+            expired = [seq for seq, (_, issued) in self.in_flight.items() if issued < deadline]
+            for seq in expired:
+                del self.in_flight[seq]
+            self.dropped += len(expired)
+
+    def get_stats(self):
+        """Kanal sayaçları, gecikme istatistikleri ve histogramları"""
+        stats = self.latency.get_stats()
+        stats["channel"] = {
+            "rate": self.rate,
+            "requested": self.requested,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "deferred": self.deferred
+        }
+        stats["histograms"] = self.latency.get_histograms()
+        return stats
+
+
+class FakeESP32:
+    """
+    Donanımsız test için pty üzerinden ESP32 benzetimi.
+    Gelen çerçeveleri çözer, ACK ve periyodik telemetri gönderir.
+    """
+
+    def __init__(self, response_delay=0.0, drop_rate=0.0, telemetry_interval=0.02):
+        self.response_delay = response_delay        # ACK öncesi yapay gecikme (s)
+        self.drop_rate = drop_rate                  # yanıtlanmayan çerçeve oranı
+        self.telemetry_interval = telemetry_interval
+        self.master_fd = None
+        self.slave_fd = None
+        self.port = None
+        self.running = False
+        self.thread = None
+        self.parser = FrameParser()
+
+        self.pan = 0.0
+        self.tilt = 0.0
+        self.shots = 0
+        self.stopped = False
+        self.frames_received = 0
+        self.seq = 0
+
+    def start(self):
+        """pty çiftini aç, thread'i başlat; ESP32Link'e verilecek port adını döndür (sadece POSIX)"""
+        # termios gerektirir; Windows'ta modül içe aktarılabilsin diye burada
+        import tty
+
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        self.port = os.ttyname(self.slave_fd)
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self.port
+
+    def stop(self):
+        """Benzetimi durdur"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        for fd in (self.master_fd, self.slave_fd):
+            if fd is not None:
+                os.close(fd)
+        self.master_fd = self.slave_fd = None
+
+    def reply(self, msg_type, payload=b""):
+        """ESP32 tarafından çerçeve gönder"""
+        self.seq = (self.seq + 1) & 0xFF
+        os.write(self.master_fd, encode_frame(msg_type, self.seq, payload))
+
+    def handle(self, msg_type, seq, payload):
+        """Gelen komutu uygula"""
+        self.frames_received += 1
+        status = 0
+        if msg_type == MSG_SETPOINT and len(payload) >= ANGLES.size:
+            if self.stopped:
+                status = 1
+            else:
+                self.pan, self.tilt = decode_angles(payload)
+        elif msg_type == MSG_FIRE:
+            if self.stopped:
+                status = 1
+            else:
+                self.shots += 1
+        elif msg_type == MSG_STOP:
+            self.stopped = True
+
+        if random.random() < self.drop_rate:
+            return
+        if self.response_delay:
+            time.sleep(self.response_delay)
+        self.reply(MSG_ACK, ACK.pack(seq, status))
+
+    def run(self):
+        """Benzetim döngüsü"""
+        last_telemetry = 0.0
+        while self.running:
+            readable, _, _ = select.select([self.master_fd], [], [], self.telemetry_interval / 2)
+            if readable:
+                try:
+                    data = os.read(self.master_fd, 4096)
+                except OSError:
+                    break
+                for msg_type, seq, payload in self.parser.feed(data):
+                    self.handle(msg_type, seq, payload)
+
+            now = time.perf_counter()
+            if now - last_telemetry >= self.telemetry_interval:
+                self.reply(MSG_TELEMETRY, encode_angles(self.pan, self.tilt))
+                last_telemetry = now
+
+
+if __name__ == "__main__":
+    # Örnek: python -m control.esp32_comm --rate 200 --seconds 3
+    import argparse
+
+    parser = argparse.ArgumentParser(description="ESP32 bağlantı gecikme testi")
+    parser.add_argument("--port", help="Seri port (verilmezse pty üzerinde sahte ESP32)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Saniyedeki setpoint isteği")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    fake = None
+    settings = get_section("esp32", DEFAULT_ESP32_SETTINGS)
+    if args.port is None:
+        fake = FakeESP32()
+        settings["port"] = fake.start()
+
+    link = ESP32Link.from_settings(settings)
+    if not link.connect():
+        raise SystemExit(1)
+    channel = SetpointChannel(link, rate=settings["setpoint_rate"])
+    channel.start()
+
+    # İstekler gönderim hızından sık üretilir; fazlası birleştirilir
+    interval = 1.0 / args.rate
+    end = time.perf_counter() + args.seconds
+    step = 0
+    while time.perf_counter() < end:
+        channel.set((step * 0.05) % 360.0, 30.0)
+        if step % 500 == 0:
+            channel.fire()
+        step += 1
+        time.sleep(interval)
+    time.sleep(link.ack_timeout * 2)
+
+    channel.stop()
+    stats = dict(link.get_stats(), **channel.get_stats())
+    link.disconnect()
+    if fake is not None:
+        fake.stop()
+
+    for section in ("link", "channel"):
+        for key, value in stats[section].items():
+            print(f"{section}.{key}: {value}")
+    for stage in ("ack", "queue", "command_setpoint", "command_fire"):
+        if stage in stats:
+            print(f"{stage}: ort {stats[stage]['mean']:.2f} ms  p50 {stats[stage]['p50']:.2f} ms  "
+                  f"p95 {stats[stage]['p95']:.2f} ms  maks {stats[stage]['max']:.2f} ms")
+    for stage, buckets in stats["histograms"].items():
+        print(f"{stage}: " + "  ".join(f"{label} {count}" for label, count in buckets))
@@ -0,0 +1,380 @@
+import threading
+import time
+
+from simple_pid import PID
+
+from utils.config import get_section
+from utils.math_utils import angle_diff, wrap_angle
+from utils.perf_stats import LatencyTracker
+
+
+DEFAULT_CONTROL_SETTINGS = {
+    "rate": 200.0,
+    "max_rate": 180.0,
+    "feedforward": 1.0,
+    "integral_zone": 5.0,
+    "pan": {"kp": 8.0, "ki": 1.0, "kd": 0.05},
+    "tilt": {"kp": 8.0, "ki": 1.0, "kd": 0.05}
+}
+
+
+def clamp(value, low, high):
+    """Değeri [low, high] aralığına sıkıştır"""
+    return max(low, min(high, value))
+
+
+class AxisController:
+    """
+    Tek eksen için hız çıkışlı PID (simple-pid) + hız ileri beslemesi.
+    Çıkış derece/saniye hız komutudur; PID sadece ileri beslemenin bıraktığı
+    pay kadar çıkış üretebilir ve integrali de bu paya sıkıştırılır. Ayrıca büyük
+    hatalarda (hız sınırında dönerken) integral hiç biriktirilmez (anti-windup).
+    """
+
+    def __init__(self, kp, ki, kd, max_rate=180.0, wrap=False, limits=None, feedforward=1.0,
+                 integral_zone=5.0):
+        self.ki = ki
+        self.max_rate = max_rate
+        self.wrap = wrap            # pan: 0/360° sarmalı, en kısa yönden dön
+        self.limits = limits        # tilt: (min, max); hedef bu aralığa sıkıştırılır
+        self.feedforward = feedforward
+        self.integral_zone = integral_zone  # derece; integral sadece bu hata içinde çalışır
+        self.pid = PID(kp, ki, kd, sample_time=None, output_limits=(-max_rate, max_rate))
+        self.unwrapped = None
+        self.last_measured = None
+
+    def reset(self):
+        """İntegral ve türev geçmişini sil"""
+        self.pid.reset()
+        self.unwrapped = None
+        self.last_measured = None
+
+    def update(self, target, target_rate, measured, dt):
+        """Bir kontrol adımı: hız komutu (°/s)"""
+        if self.wrap:
+            # Ölçümü açılmış (sürekli) eksende tut; türev 359->0 geçişinde sıçramaz
+            if self.unwrapped is None:
+                self.unwrapped = measured
+            else:
+                self.unwrapped += angle_diff(measured, self.last_measured)
+            self.last_measured = measured
+            setpoint = self.unwrapped + angle_diff(target, measured)
+            measured = self.unwrapped
+        else:
+            setpoint = target
+            if self.limits is not None:
+                # Ulaşılamayan hedefe doğru integral birikmesin
+                setpoint = clamp(setpoint, *self.limits)
+
+        # Koşullu integral: hedefe yaklaşınca devreye girer
+        self.pid.Ki = self.ki if abs(setpoint - measured) <= self.integral_zone else 0.0
+
+        feedforward = clamp(self.feedforward * target_rate, -self.max_rate, self.max_rate)
+        self.pid.output_limits = (-self.max_rate - feedforward, self.max_rate - feedforward)
+        self.pid.setpoint = setpoint
+        return feedforward + self.pid(measured, dt=dt)
+
+
+class PanTiltController:
+    """Pan/tilt eksen kontrolcüleri"""
+
+    def __init__(self, pan_gains, tilt_gains, max_rate=180.0, feedforward=1.0, integral_zone=5.0,
+                 tilt_limits=(0, 60)):
+        self.pan = AxisController(max_rate=max_rate, wrap=True, feedforward=feedforward,
+                                  integral_zone=integral_zone, **pan_gains)
+        self.tilt = AxisController(max_rate=max_rate, limits=tilt_limits, feedforward=feedforward,
+                                   integral_zone=integral_zone, **tilt_gains)
+
+    @classmethod
+    def from_settings(cls, settings=None, system=None):
+        """config/settings.json 'control' ve 'system' bölümlerinden oluştur"""
+        settings = settings or get_section("control", DEFAULT_CONTROL_SETTINGS)
+        system = system or get_section("system", {"tilt_min": 0, "tilt_max": 60})
+        return cls(
+            pan_gains=settings["pan"],
+            tilt_gains=settings["tilt"],
+            max_rate=settings["max_rate"],
+            feedforward=settings["feedforward"],
+            integral_zone=settings["integral_zone"],
+            tilt_limits=(system["tilt_min"], system["tilt_max"])
+        )
+
+    def reset(self):
+        """Her iki ekseni sıfırla"""
+        self.pan.reset()
+        self.tilt.reset()
+
+    def update(self, target, measured, dt):
+        """target: (pan, tilt, pan hızı, tilt hızı); measured: (pan, tilt) -> hız komutları"""
+        target_pan, target_tilt, pan_rate, tilt_rate = target
+        return (self.pan.update(target_pan, pan_rate, measured[0], dt),
+                self.tilt.update(target_tilt, tilt_rate, measured[1], dt))
+
+
+class TurretPlant:
+    """
+    Benzetim için taret modeli.
+    ESP32 gibi konum setpoint'i alır; her eksen hız ve ivme sınırlı,
+    oransal bir servo ile komuta doğru ilerler.
+    """
+
+    def __init__(self, pan=0.0, tilt=0.0, servo_gain=25.0, max_rate=240.0, max_accel=1500.0,
+                 tilt_limits=(0, 60)):
+        self.pan = pan
+        self.tilt = tilt
+        self.pan_rate = 0.0
+        self.tilt_rate = 0.0
+        self.servo_gain = servo_gain  # 1/s
+        self.max_rate = max_rate
+        self.max_accel = max_accel
+        self.tilt_limits = tilt_limits
+
+    def axis_rate(self, error, rate, dt):
+        """Servo hızını ivme sınırıyla güncelle"""
+        desired = clamp(self.servo_gain * error, -self.max_rate, self.max_rate)
+        step = self.max_accel * dt
+        return clamp(desired, rate - step, rate + step)
+
+    def step(self, command_pan, command_tilt, dt):
+        """Modeli dt kadar ilerlet; (pan, tilt) döndür"""
+        self.pan_rate = self.axis_rate(angle_diff(command_pan, self.pan), self.pan_rate, dt)
+        self.tilt_rate = self.axis_rate(command_tilt - self.tilt, self.tilt_rate, dt)
+        self.pan = wrap_angle(self.pan + self.pan_rate * dt)
+        self.tilt = clamp(self.tilt + self.tilt_rate * dt, *self.tilt_limits)
+        return self.pan, self.tilt
+
+
+class ControlLoop:
+    """
+    Sabit zaman adımlı kontrol döngüsü (GUI zamanlayıcılarından bağımsız thread).
+    Hız komutları konum komutuna integre edilip output(pan, tilt) ile gönderilir.
+    """
+
+    def __init__(self, controller, target_provider, output, measurement_provider=None,
+                 rate=200.0, tilt_limits=(0, 60), pose_history=None, safety=None):
+        self.controller = controller
+        self.target_provider = target_provider            # () -> (pan, tilt, pan hızı, tilt hızı) ya da None
+        self.output = output                              # (pan, tilt) konum komutu
+        self.measurement_provider = measurement_provider  # () -> (pan, tilt) ya da None (komutu kullan)
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.tilt_limits = tilt_limits
+        self.pose_history = pose_history                  # PoseHistory: her adımda ölçülen açı kaydedilir
+        self.safety = safety                              # SafetyEngine: yol kontrolü ile hedef kırpma/veto
+
+        self.command = None
+        self.rates = (0.0, 0.0)  # son hız komutları (°/s)
+        self.running = False
+        self.thread = None
+        self.active = False
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.steps = 0
+        self.overruns = 0
+        self.clipped = 0
+        self.vetoed = 0
+
+    def start(self, pan, tilt):
+        """Döngüyü mevcut konumdan başlat"""
+        if self.running:
+            return
+        self.command = (pan, tilt)
+        self.controller.reset()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Döngüyü durdur"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def step(self):
+        """Tek kontrol adımı (sabit dt)"""
+        measured = None
+        if self.measurement_provider is not None:
+            measured = self.measurement_provider()
+        if measured is None:
+            measured = self.command
+        if self.pose_history is not None:
+            self.pose_history.record(time.perf_counter(), measured[0], measured[1])
+
+        target = self.target_provider()
+        if target is None:
+            # Hedef yok: konumu koru, integral sıfırlansın
+            if self.active:
+                self.controller.reset()
+                self.active = False
+            self.rates = (0.0, 0.0)
+            return self.command
+        self.active = True
+
+        if self.safety is not None:
+            target = self.clip_target(target)
+
+        pan_rate, tilt_rate = self.controller.update(target, measured, self.dt)
+        self.rates = (pan_rate, tilt_rate)
+        pan = wrap_angle(self.command[0] + pan_rate * self.dt)
+        tilt = clamp(self.command[1] + tilt_rate * self.dt, *self.tilt_limits)
+
+        if self.safety is not None and self.safety.is_safe(*self.command) and not self.safety.is_safe(pan, tilt):
+            # Kırpılmış hedefe rağmen (aşım) yasak bölgeye giren adım gönderilmez
+            self.vetoed += 1
+            self.rates = (0.0, 0.0)
+            return self.command
+
+        self.command = (pan, tilt)
+        self.output(pan, tilt)
+        return self.command
+
+    def clip_target(self, target):
+        """
+        Mevcut komuttan hedefe gidilecek yolun tamamını yasak bölge tablosunda kontrol et.
+        Yol bir bölgeye giriyorsa hedef, bölge kenarındaki son güvenli noktaya çekilir.
+        Taret zaten bölge içindeyse kırpılmaz (çıkabilmesi için); ateş yine de reddedilir.
+        """
+        check_start = time.perf_counter()
+        allowed, safe_point, _ = self.safety.check_path(self.command[0], self.command[1],
+                                                         target[0], target[1])
+        self.latency.record_since("safety", check_start)
+        if allowed or safe_point is None:
+            return target
+        self.clipped += 1
+        return safe_point[0], safe_point[1], 0.0, 0.0
+
+    def run(self):
+        """Thread'in ana döngüsü"""
+        next_time = time.perf_counter()
+        while self.running:
+            step_start = time.perf_counter()
+            self.step()
+            self.steps += 1
+            self.latency.record_since("step", step_start)
+
+            next_time += self.dt
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Adım süresini aştık; dt sabit kalır, saat yeniden oturur
+                self.overruns += 1
+                next_time = time.perf_counter()
+
+    def get_stats(self):
+        """Adım süresi ve taşma sayaçları"""
+        stats = self.latency.get_stats()
+        stats["loop"] = {"rate": self.rate, "steps": self.steps, "overruns": self.overruns,
+                         "clipped": self.clipped, "vetoed": self.vetoed}
+        return stats
+
+
+def simulate(controller, plant, target_fn, duration=2.0, rate=200.0, tilt_limits=(0, 60), safety=None):
+    """
+    Döngüyü benzetim zamanında (uyumadan) çalıştır.
+    target_fn(t) -> (pan, tilt, pan hızı, tilt hızı); (t, hedef, ölçüm) listesi döndürür.
+    """
+    clock = {"t": 0.0}
+    loop = ControlLoop(controller, lambda: target_fn(clock["t"]),
+                       output=lambda pan, tilt: None,
+                       measurement_provider=lambda: (plant.pan, plant.tilt),
+                       rate=rate, tilt_limits=tilt_limits, safety=safety)
+    loop.command = (plant.pan, plant.tilt)
+    controller.reset()
+
+    trajectory = []
+    for _ in range(int(round(duration * rate))):
+        target = target_fn(clock["t"])
+        command = loop.step()
+        plant.step(command[0], command[1], loop.dt)
+        clock["t"] += loop.dt
+        trajectory.append((clock["t"], target, (plant.pan, plant.tilt)))
+    return trajectory
+
+
+def step_response(controller, plant, target_pan, target_tilt, duration=2.0, rate=200.0, tolerance=0.5,
+                  tilt_limits=(0, 60)):
+    """
+    Basamak yanıtı: yükselme/oturma süresi, eksen başına aşım ve son hata.
+    Sınır dışı tilt hedefi döngüye olduğu gibi verilir; hata sınıra sıkıştırılmış hedefe göre ölçülür.
+    """
+    start_pan, start_tilt = plant.pan, plant.tilt
+    trajectory = simulate(controller, plant, lambda t: (target_pan, target_tilt, 0.0, 0.0),
+                          duration=duration, rate=rate, tilt_limits=tilt_limits)
+    reachable_tilt = clamp(target_tilt, *tilt_limits)
+
+    errors = [max(abs(angle_diff(target_pan, pan)), abs(reachable_tilt - tilt))
+              for _, _, (pan, tilt) in trajectory]
+    initial = max(abs(angle_diff(target_pan, start_pan)), abs(reachable_tilt - start_tilt), 1e-9)
+
+    settling_time = None
+    for (t, _, _), error in zip(reversed(trajectory), reversed(errors)):
+        if error > tolerance:
+            break
+        settling_time = t
+
+    rise_time = next((t for (t, _, _), error in zip(trajectory, errors) if error <= 0.1 * initial), None)
+
+    # Aşım: hedefi geçme miktarı (eksen başına, başlangıç yönüne göre; hareketsiz eksende 0)
+    pan_move = angle_diff(target_pan, start_pan)
+    tilt_move = reachable_tilt - start_tilt
+    pan_overshoot = 0.0
+    tilt_overshoot = 0.0
+    if abs(pan_move) > tolerance:
+        pan_direction = 1.0 if pan_move >= 0 else -1.0
+        pan_overshoot = max(0.0, max(-pan_direction * angle_diff(target_pan, pan) for _, _, (pan, _) in trajectory))
+    if abs(tilt_move) > tolerance:
+        tilt_direction = 1.0 if tilt_move >= 0 else -1.0
+        tilt_overshoot = max(0.0, max(-tilt_direction * (reachable_tilt - tilt) for _, _, (_, tilt) in trajectory))
+    final_pan, final_tilt = trajectory[-1][2]
+    return {
+        "rise_time": rise_time,
+        "settling_time": settling_time,
+        "pan_overshoot": pan_overshoot,
+        "tilt_overshoot": tilt_overshoot,
+        "final_error": errors[-1],
+        "final_tilt": final_tilt
+    }
+
+
+def tracking_error(controller, plant, pan_rate, duration=3.0, rate=200.0, settle=1.0):
+    """Sabit hızla dönen hedefte oturma sonrası ortalama/maks pan hatası"""
+    start = plant.pan
+    trajectory = simulate(controller, plant,
+                          lambda t: (wrap_angle(start + 5.0 + pan_rate * t), plant.tilt, pan_rate, 0.0),
+                          duration=duration, rate=rate)
+    errors = [abs(angle_diff(target[0], measured[0])) for t, target, measured in trajectory if t >= settle]
+    return {"mean_error": sum(errors) / len(errors), "max_error": max(errors)}
+
+
+if __name__ == "__main__":
+    # Örnek: python -m control.pid_controller
+    settings = get_section("control", DEFAULT_CONTROL_SETTINGS)
+
+    system = get_section("system", {"tilt_min": 0, "tilt_max": 60})
+    tilt_limits = (system["tilt_min"], system["tilt_max"])
+
+    cases = [
+        ("Basamak 0°→90°", 0.0, 30.0, 90.0, 30.0),
+        ("Sarmal 350°→10°", 350.0, 30.0, 10.0, 30.0),
+        ("Tilt 10°→50°", 180.0, 10.0, 180.0, 50.0),
+        (f"Tilt sınır dışı 30°→{tilt_limits[1] + 20:g}°", 180.0, 30.0, 180.0, tilt_limits[1] + 20.0)
+    ]
+    for name, start_pan, start_tilt, target_pan, target_tilt in cases:
+        controller = PanTiltController.from_settings(settings, system)
+        plant = TurretPlant(pan=start_pan, tilt=start_tilt, tilt_limits=tilt_limits)
+        report = step_response(controller, plant, target_pan, target_tilt, tilt_limits=tilt_limits)
+        settling = f"{report['settling_time']:.3f} s" if report["settling_time"] is not None else "yok"
+        print(f"{name}: oturma {settling}  aşım pan {report['pan_overshoot']:.2f}° "
+              f"tilt {report['tilt_overshoot']:.2f}°  son hata {report['final_error']:.3f}°")
+        if target_tilt > tilt_limits[1] and abs(report["final_tilt"] - tilt_limits[1]) > 0.5:
+            print(f"❌ Tilt sınırda oturmadı: {report['final_tilt']:.2f}° (sınır {tilt_limits[1]:g}°)")
+            raise SystemExit(1)
+
+    for feedforward in (0.0, settings["feedforward"]):
+        controller = PanTiltController.from_settings(dict(settings, feedforward=feedforward))
+        report = tracking_error(controller, TurretPlant(pan=355.0, tilt=30.0), pan_rate=60.0)
+        print(f"60°/s hedef takibi (ileri besleme {feedforward:.1f}): ort hata {report['mean_error']:.3f}°  "
+              f"maks {report['max_error']:.3f}°")
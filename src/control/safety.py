@@ -0,0 +1,266 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+from utils.config import get_section
+from utils.math_utils import angle_diff, wrap_angle
+
+
+DEFAULT_SAFETY_SETTINGS = {
+    "resolution": 0.1,
+    "zones": []
+}
+
+
+class NoFireZone:
+    """Ateşe yasak pan/tilt bölgesi (pan başlangıç > bitiş ise 0°/360° üzerinden sarar)"""
+
+    def __init__(self, name, pan_start, pan_end, tilt_min=None, tilt_max=None):
+        self.name = name
+        self.pan_start = wrap_angle(pan_start) if pan_start != 360 else 360.0
+        self.pan_end = wrap_angle(pan_end) if pan_end != 360 else 360.0
+        self.tilt_min = tilt_min    # None: tüm tilt aralığı
+        self.tilt_max = tilt_max
+
+    @property
+    def wraps(self):
+        """Bölge 0°/360° sınırını geçiyor mu"""
+        return self.pan_start > self.pan_end
+
+    def describe(self):
+        """Log/mesaj için kısa açıklama"""
+        text = f"{self.pan_start:g}°-{self.pan_end:g}°"
+        if self.tilt_min is not None or self.tilt_max is not None:
+            text += f" (tilt {self.tilt_min if self.tilt_min is not None else '-'}°"
+            text += f"-{self.tilt_max if self.tilt_max is not None else '-'}°)"
+        return text
+
+
+class SafetyEngine:
+    """
+    Önceden hesaplanmış açısal arama tablosu ile ateş/setpoint güvenlik kontrolü.
+    Pan 0.1° (varsayılan) ve tilt aynı çözünürlükte ızgaraya bölünür; her hücre
+    kendisini kapsayan bölgenin numarasını tutar (0 = serbest). Sorgu iki indeks
+    hesabı ve tek dizi okumasıdır; bölge sayısından bağımsızdır.
+    """
+
+    def __init__(self, resolution=0.1, tilt_min=0.0, tilt_max=60.0, pan_min=0.0, pan_max=360.0):
+        self.resolution = resolution
+        self.tilt_min = tilt_min
+        self.tilt_max = tilt_max
+        self.pan_min = pan_min
+        self.pan_max = pan_max
+
+        self.pan_bins = int(round(360.0 / resolution))
+        self.tilt_bins = int(round((tilt_max - tilt_min) / resolution)) + 1
+        # Yol kontrolü için hazır adım dizileri (en uzun yol: yarım tur pan ya da tüm tilt)
+        self.half_turn = self.pan_bins // 2
+        self.steps = np.arange(max(self.half_turn, self.tilt_bins) + 2)
+        self.pan_steps = self.steps * self.tilt_bins
+        # uint8 hücre: 255 bölgeye kadar; sorguda hangi bölgenin engellediği de bulunur
+        self.grid = np.zeros((self.pan_bins, self.tilt_bins), dtype=np.uint8)
+        self.table = (self.grid, [], None)  # (ızgara, numara -> bölge, yol tablosu); birlikte okunur
+        self.zones = []
+        self.lock = threading.Lock()
+
+        # Taret pan sınırı tam tur değilse dışı da yasak (sınır açılarının kendisi serbest)
+        if pan_max - pan_min < 360.0:
+            self.pan_limit_zone = NoFireZone("pan sınırı", pan_max + resolution, pan_min - resolution)
+        else:
+            self.pan_limit_zone = None
+        self.rebuild()
+
+    @classmethod
+    def from_settings(cls, settings=None, system=None):
+        """config/settings.json 'safety' ve 'system' bölümlerinden oluştur"""
+        settings = settings or get_section("safety", DEFAULT_SAFETY_SETTINGS)
+        system = system or get_section("system", {"pan_min": 0, "pan_max": 360,
+                                                  "tilt_min": 0, "tilt_max": 60})
+        engine = cls(
+            resolution=settings["resolution"],
+            tilt_min=system["tilt_min"],
+            tilt_max=system["tilt_max"],
+            pan_min=system["pan_min"],
+            pan_max=system["pan_max"]
+        )
+        for zone in settings["zones"]:
+            tilt = zone.get("tilt") or (None, None)
+            engine.set_zone(zone["name"], zone["pan"][0], zone["pan"][1], tilt[0], tilt[1])
+        return engine
+
+    def pan_index(self, pan):
+        """Pan açısının ızgara satırı"""
+        return int(round(wrap_angle(pan) / self.resolution)) % self.pan_bins
+
+    def tilt_index(self, tilt):
+        """Tilt açısının ızgara sütunu (sınır dışıysa None)"""
+        if tilt < self.tilt_min or tilt > self.tilt_max:
+            return None
+        return min(int(round((tilt - self.tilt_min) / self.resolution)), self.tilt_bins - 1)
+
+    def pan_ranges(self, zone):
+        """Bölgenin kapsadığı pan satır aralıkları (uçlar dahil, güvenli tarafa yuvarlanır)"""
+        start = int(math.floor(zone.pan_start / self.resolution + 1e-9))
+        end = int(math.ceil(zone.pan_end / self.resolution - 1e-9))
+        if zone.wraps:
+            return [(start, self.pan_bins - 1), (0, end)]
+        if end >= self.pan_bins:
+            # 360° ucu 0° ile aynı satır
+            return [(start, self.pan_bins - 1), (0, end - self.pan_bins)]
+        return [(start, end)]
+
+    def tilt_range(self, zone):
+        """Bölgenin kapsadığı tilt sütun aralığı"""
+        low = 0 if zone.tilt_min is None else (zone.tilt_min - self.tilt_min) / self.resolution
+        high = self.tilt_bins - 1 if zone.tilt_max is None else (zone.tilt_max - self.tilt_min) / self.resolution
+        low = max(0, int(math.floor(low + 1e-9)))
+        high = min(self.tilt_bins - 1, int(math.ceil(high - 1e-9)))
+        return low, high
+
+    def paint(self, grid, zone, value):
+        """Bölgeyi ızgaraya işle"""
+        tilt_low, tilt_high = self.tilt_range(zone)
+        if tilt_low > tilt_high:
+            return
+        for start, end in self.pan_ranges(zone):
+            grid[start:end + 1, tilt_low:tilt_high + 1] = value
+
+    def rebuild(self):
+        """Tüm bölgelerden tabloyu yeniden kur (bölge değişince, sorgu yolunda değil)"""
+        grid = np.zeros_like(self.grid)
+        zones = list(self.zones)
+        if self.pan_limit_zone is not None:
+            zones.append(self.pan_limit_zone)
+        for index, zone in enumerate(zones, start=1):
+            self.paint(grid, zone, index)
+        # Yol tablosu: pan'da iki yana yarım tur uzatılmış düz dizi; yol indekslerinde mod gerekmez
+        extended = np.concatenate((grid[-self.half_turn:], grid, grid[:self.half_turn + 1]))
+        self.grid = grid
+        self.table = (grid, zones, extended.ravel())
+
+    def set_zone(self, name, pan_start, pan_end, tilt_min=None, tilt_max=None):
+        """Aynı isimli bölgeyi ekle ya da değiştir"""
+        with self.lock:
+            self.zones = [zone for zone in self.zones if zone.name != name]
+            if len(self.zones) >= 254:
+                raise ValueError("En fazla 254 yasak bölge tanımlanabilir")
+            self.zones.append(NoFireZone(name, pan_start, pan_end, tilt_min, tilt_max))
+            self.rebuild()
+
+    def remove_zone(self, name):
+        """İsimle bölge sil (yoksa bir şey yapmaz)"""
+        with self.lock:
+            zones = [zone for zone in self.zones if zone.name != name]
+            if len(zones) != len(self.zones):
+                self.zones = zones
+                self.rebuild()
+
+    def get_zone(self, name):
+        """İsimle bölge (yoksa None)"""
+        for zone in self.zones:
+            if zone.name == name:
+                return zone
+        return None
+
+    def check(self, pan, tilt):
+        """(izinli mi, engelleyen bölge); tilt sınır dışıysa (False, None)"""
+        tilt_index = self.tilt_index(tilt)
+        if tilt_index is None:
+            return False, None
+        grid, zones, _ = self.table
+        value = grid[self.pan_index(pan), tilt_index]
+        if value:
+            return False, zones[value - 1]
+        return True, None
+
+    def is_safe(self, pan, tilt):
+        """Ateşe izin var mı"""
+        return self.check(pan, tilt)[0]
+
+    def check_path(self, pan, tilt, target_pan, target_tilt):
+        """
+        (pan, tilt) -> hedef yolunu tek vektörel geçişte kontrol et.
+        Kontrolcü her ekseni aynı azami hızla sürdüğü için yol, iki eksenin birlikte
+        ilerleyip kısa olanın erken bittiği kırık çizgidir; pan en kısa yönden döner.
+        Sınır dışı hedef tilt, kontrol döngüsü gibi sınıra kırpılır; yolu sadece bölgeler keser.
+        Dönüş: (izinli mi, varılabilecek son güvenli nokta ya da None, engelleyen bölge)
+        """
+        start_tilt = self.tilt_index(tilt)
+        if start_tilt is None:
+            return False, None, None
+        target_tilt = min(max(target_tilt, self.tilt_min), self.tilt_max)
+
+        pan_delta = angle_diff(target_pan, pan)
+        tilt_delta = target_tilt - tilt
+        pan_count = int(abs(pan_delta) / self.resolution + 0.5)
+        tilt_count = int(abs(tilt_delta) / self.resolution + 0.5)
+        pan_sign = 1 if pan_delta >= 0 else -1
+        tilt_sign = 1 if tilt_delta >= 0 else -1
+        # Yuvarlamada son sütunun dışına taşmasın
+        tilt_count = min(tilt_count, start_tilt if tilt_sign < 0 else self.tilt_bins - 1 - start_tilt)
+        count = max(pan_count, tilt_count) + 1
+
+        # Düz dizi indeksleri: başlangıç + pan adımı * tilt_bins ± tilt adımı
+        grid, zones, extended = self.table
+        base = (int(round(wrap_angle(pan) / self.resolution)) % self.pan_bins + self.half_turn) \
+            * self.tilt_bins + start_tilt
+        indices = np.minimum(self.pan_steps[:count], pan_count * self.tilt_bins)
+        if pan_sign < 0:
+            np.negative(indices, out=indices)
+        indices += base
+        tilt_offsets = np.minimum(self.steps[:count], tilt_count)
+        if tilt_sign < 0:
+            indices -= tilt_offsets
+        else:
+            indices += tilt_offsets
+        values = extended.take(indices)
+
+        blocked = values.nonzero()[0]
+        if not len(blocked):
+            return True, (target_pan, target_tilt), None
+        first = int(blocked[0])
+        zone = zones[values[first] - 1]
+        if first == 0:
+            return False, None, zone
+        safe = first - 1
+
+        safe_pan = wrap_angle(pan + pan_sign * min(safe, pan_count) * self.resolution)
+        safe_tilt = tilt + tilt_sign * min(safe, tilt_count) * self.resolution
+        return False, (float(safe_pan), float(safe_tilt)), zone
+
+
+def benchmark_path_checks(engine, count=10000, seed=0):
+    """Rastgele yollar üzerinde check_path gecikmesi (µs)"""
+    rng = np.random.default_rng(seed)
+    starts = rng.uniform(0, 360, count)
+    targets = rng.uniform(0, 360, count)
+    tilts = rng.uniform(engine.tilt_min, engine.tilt_max, (count, 2))
+    durations = np.empty(count)
+    blocked = 0
+    for index in range(count):
+        start = time.perf_counter()
+        allowed, _, _ = engine.check_path(starts[index], tilts[index, 0], targets[index], tilts[index, 1])
+        durations[index] = (time.perf_counter() - start) * 1e6
+        blocked += not allowed
+    return {
+        "checks": count,
+        "blocked": blocked,
+        "mean_us": float(durations.mean()),
+        "p50_us": float(np.percentile(durations, 50)),
+        "p99_us": float(np.percentile(durations, 99)),
+        "max_us": float(durations.max())
+    }
+
+
+if __name__ == "__main__":
+    # Örnek: python -m control.safety
+    engine = SafetyEngine.from_settings()
+    if not engine.zones:
+        # Ayarlarda bölge yoksa örnek bölgeler
+        engine.set_zone("güvenli bölge", 150, 210)
+        engine.set_zone("yasak alan", 350, 10, 0, 20)
+    report = benchmark_path_checks(engine)
+    print(f"{report['checks']} yol kontrolü ({report['blocked']} engelli): ort {report['mean_us']:.1f} µs  "
+          f"p50 {report['p50_us']:.1f} µs  p99 {report['p99_us']:.1f} µs  maks {report['max_us']:.1f} µs")
@@ -0,0 +1,177 @@
+import threading
+import time
+
+import cv2
+
+from utils.config import get_section
+from utils.frame_buffer import FrameRingBuffer
+from utils.perf_stats import LatencyTracker
+
+
+DEFAULT_CAMERA_SETTINGS = {
+    "index": 0,
+    "width": 1280,
+    "height": 720,
+    "fps": 30
+}
+
+
+class FrameSource:
+    """
+    Kamera ya da video dosyasından kare yakalayıp en-yeni-kare halkasına yazan thread.
+    Qt'ye bağlı değildir; ekran, kayıt ve dedektör halkadan okur.
+    """
+
+    def __init__(self, source=0, width=1280, height=720, fps=30, buffer_size=4, realtime=True, loop=False,
+                 frame_buffer=None):
+        self.source = source        # Kamera indeksi (int) ya da video dosyası yolu
+        self.is_file = isinstance(source, str)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.buffer_size = buffer_size
+        self.realtime = realtime    # Dosyada kare hızına uy (False: olabildiğince hızlı)
+        self.loop = loop            # Dosya bitince başa sar
+
+        # Dışarıdan verilen halka (örn. SharedFrameRing) sabit boyutludur ve yeniden kurulmaz
+        self.shared_buffer = frame_buffer
+        self.frame_buffer = frame_buffer or FrameRingBuffer(buffer_size)
+        self.running = False
+        self.finished = False       # Dosya sonu (loop kapalıysa)
+        self.thread = None
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.read_errors = 0
+
+    @classmethod
+    def from_settings(cls, settings=None, source=None, **kwargs):
+        """config/settings.json 'camera' bölümünden oluştur (source verilirse indeksin yerine geçer)"""
+        settings = settings or get_section("camera", DEFAULT_CAMERA_SETTINGS)
+        if source is None:
+            source = settings["index"]
+        elif isinstance(source, str) and source.isdigit():
+            source = int(source)
+        return cls(source, width=settings["width"], height=settings["height"], fps=settings["fps"], **kwargs)
+
+    def open(self):
+        """Kaynağı aç ve ayarla (açılamazsa None)"""
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            print(f"❌ Kamera açılamadı! ({self.source})")
+            return None
+
+        if self.is_file:
+            self.width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.fps = cap.get(cv2.CAP_PROP_FPS) or self.fps
+            print(f"✅ Video açıldı: {self.source} ({self.width}x{self.height} @ {self.fps:.0f} FPS)")
+        else:
+            # Kamera ayarları
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+            print(f"✅ Kamera açıldı: {self.width}x{self.height} @ {self.fps} FPS")
+        return cap
+
+    def probe(self):
+        """Kaynaktan bir kare okuyup gerçek kare boyutunu döndür ve kapat (okunamazsa None)"""
+        cap = self.open()
+        if cap is None:
+            return None
+        ret, frame = cap.read()
+        cap.release()
+        return frame.shape if ret else None
+
+    def start(self):
+        """Kaynağı aç ve yakalama thread'ini başlat (açılamazsa False)"""
+        if self.running:
+            return True
+
+        cap = self.open()
+        if cap is None:
+            return False
+
+        # Her başlatmada yeni halka: önceki okuyucular kapanmış halkada kalır
+        if self.shared_buffer is None:
+            self.frame_buffer = FrameRingBuffer(self.buffer_size)
+        self.finished = False
+        self.running = True
+        self.thread = threading.Thread(target=self.run, args=(cap,), daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Yakalamayı durdur, bekleyen okuyucuları serbest bırak"""
+        self.running = False
+        self.frame_buffer.close()
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+
+    def run(self, cap):
+        """Kaynaktan kesintisiz kare çeker ve halkaya yazar (kamerada uyku yok)"""
+        frame_interval = 1.0 / self.fps if self.is_file and self.realtime and self.fps > 0 else 0.0
+        next_time = time.perf_counter()
+
+        while self.running:
+            slot, buffer = self.frame_buffer.begin_write()
+            if slot is None:
+                # Tüm slotlar okuyucularda: sürücü kuyruğu dolmasın diye kareyi at
+                cap.grab()
+                continue
+
+            grab_start = time.perf_counter()
+            if buffer is not None:
+                ret, frame = cap.read(buffer)
+            else:
+                ret, frame = cap.read()
+            capture_time = time.perf_counter()
+
+            if not ret:
+                if self.is_file:
+                    if self.loop:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    self.finished = True
+                    break
+                self.read_errors += 1
+                time.sleep(0.005)
+                continue
+
+            if self.shared_buffer is not None and frame.shape != buffer.shape:
+                # Sabit boyutlu halka: sürücü farklı çözünürlük verdiyse slota ölçekle
+                cv2.resize(frame, (buffer.shape[1], buffer.shape[0]), dst=buffer)
+                frame = buffer
+
+            self.latency.record("grab", (capture_time - grab_start) * 1000.0)
+            self.frame_buffer.commit(slot, frame, capture_time)
+
+            if frame_interval:
+                # Video dosyası gerçek zamanlı oynatılır (kamera gibi davranır)
+                next_time += frame_interval
+                delay = next_time - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_time = time.perf_counter()
+
+        cap.release()
+        print("🔴 Kamera kapatıldı")
+
+    @property
+    def shape(self):
+        """Halkadaki karelerin boyutu (henüz kare yoksa None)"""
+        return self.frame_buffer.shape
+
+    def get_stats(self):
+        """Yakalama gecikmesi ve kare sayaçları"""
+        stats = self.latency.get_stats()
+        buffer_stats = self.frame_buffer.get_stats()
+        stats["frames"] = {
+            "captured": buffer_stats["frames_written"],
+            "overruns": buffer_stats["overruns"],
+            "read_errors": self.read_errors,
+            "finished": self.finished
+        }
+        return stats
@@ -0,0 +1,466 @@
+import threading
+import time
+
+from core.capture import FrameSource
+from core.multiprocess import ProcessFrameSource, ProcessDetectionWorker, DEFAULT_PIPELINE_SETTINGS
+from utils.config import get_section
+from utils.math_utils import pixel_to_angles, estimate_distance
+from vision.detector import Detector, DetectionWorker
+from vision.tracker import MultiTargetTracker, DEFAULT_TRACKER_SETTINGS
+from vision.shape_classifier import ShapeClassifier
+from control.esp32_comm import ESP32Link, SetpointChannel, FakeESP32, DEFAULT_ESP32_SETTINGS
+from control.pid_controller import PanTiltController, ControlLoop, DEFAULT_CONTROL_SETTINGS
+from control.aim import AimPredictor, PoseHistory
+from control.safety import SafetyEngine
+from utils.black_box import BlackBox, DEFAULT_BLACK_BOX_SETTINGS
+
+
+MODES = ("manual", "semi_auto", "autonomous", "angajman")
+TRACKING_MODES = ("semi_auto", "autonomous")   # Kontrol döngüsünün hedef izlediği modlar
+
+ENGAGEMENT_ZONE = "güvenli bölge"
+NO_FIRE_ZONE = "yasak alan"
+SAFE_ZONE_ANGLE = (150, 210)          # Angajman orta güvenli bölgesi
+
+
+class Engine:
+    """
+    Arayüzden bağımsız çekirdek: yakalama -> tespit -> izleme -> kontrol -> güvenlik.
+    Mod, ateş ve imha sayacı burada tutulur; GUI ve headless çalıştırıcı aynı
+    motoru kullanır ve olaylarını subscribe() ile dinler.
+    """
+
+    def __init__(self, source=None, multiprocess=None, monitor_interval=0.1):
+        # Çok süreç modunda yakalama ve tespit ayrı süreçlerde, kareler paylaşımlı bellekte
+        self.pipeline_settings = get_section("pipeline", DEFAULT_PIPELINE_SETTINGS)
+        if multiprocess is None:
+            multiprocess = self.pipeline_settings["multiprocess"]
+        self.multiprocess = multiprocess
+        if source is None:
+            source_class = ProcessFrameSource if multiprocess else FrameSource
+            source = source_class.from_settings(buffer_size=self.pipeline_settings["buffer_size"])
+        self.source = source
+
+        # Tespit (model ilk başlatmada worker thread'inde bir kez yüklenir)
+        self.detector = Detector.from_settings()
+        self.detection_worker = None
+        self.detection_listeners = []
+
+        # Balon renk/şekil doğrulama (tespitlerle aynı karede, toplu)
+        self.shape_classifier = ShapeClassifier()
+
+        # Çoklu hedef izleyici (tespitlerle beslenir, ROI pencerelerini sağlar)
+        tracker_settings = get_section("tracker", DEFAULT_TRACKER_SETTINGS)
+        self.tracker = MultiTargetTracker.from_settings(tracker_settings)
+        self.target_size = tracker_settings["target_size_m"]
+        self.camera_settings = get_section("camera", {"hfov": 70.0, "vfov": 43.0})
+
+        # ESP32 seri bağlantısı (simulate açıksa pty üzerinde sahte ESP32)
+        self.esp32_settings = get_section("esp32", DEFAULT_ESP32_SETTINGS)
+        self.fake_esp32 = None
+        if self.esp32_settings["simulate"]:
+            self.fake_esp32 = FakeESP32()
+            self.esp32_settings["port"] = self.fake_esp32.start()
+        self.esp32 = ESP32Link.from_settings(self.esp32_settings)
+        self.esp32_connected = None
+        # Slider/otonom setpoint'leri birleştirilip sabit hızda gönderilir
+        self.setpoints = SetpointChannel(self.esp32, rate=self.esp32_settings["setpoint_rate"])
+
+        # Gecikme telafili nişan: hedef, komutun tarete ulaşacağı ana kadar ileri tahmin edilir
+        self.aim_predictor = AimPredictor.from_settings(camera=self.camera_settings)
+        self.pose_history = PoseHistory()
+
+        # Ateş/setpoint güvenliği: tüm yasak bölgeler ve tilt sınırları tek arama tablosunda
+        system_settings = get_section("system", {"pan_min": 0, "pan_max": 360, "tilt_min": 0,
+                                                 "tilt_max": 60, "default_pan": 180, "default_tilt": 30})
+        self.safety = SafetyEngine.from_settings(system=system_settings)
+
+        # Kara kutu: son saniyeler sıkıştırılmış tutulur, ateş/acil durdurmada diske yazılır
+        self.black_box = None
+        black_box_settings = get_section("black_box", DEFAULT_BLACK_BOX_SETTINGS)
+        if black_box_settings["enabled"]:
+            self.black_box = BlackBox.from_settings(black_box_settings)
+            self.black_box.add_listener(lambda path: self.publish("black_box", path))
+
+        # Pan/tilt kontrol döngüsü (yarı otonom/otonom modda, sabit hızlı kendi thread'inde)
+        control_settings = get_section("control", DEFAULT_CONTROL_SETTINGS)
+        self.control_loop = ControlLoop(
+            PanTiltController.from_settings(control_settings, system_settings),
+            target_provider=self.aim_target,
+            output=self.send_aim_setpoint,
+            measurement_provider=self.turret_angles,
+            rate=control_settings["rate"],
+            tilt_limits=(system_settings["tilt_min"], system_settings["tilt_max"]),
+            pose_history=self.pose_history,
+            safety=self.safety
+        )
+
+        # Durum
+        self.running = False
+        self.mode = "manual"
+        self.current_pan = system_settings["default_pan"]
+        self.current_tilt = system_settings["default_tilt"]
+        self.safe_zone_angle = SAFE_ZONE_ANGLE
+        self.kill_count = 0
+        self.started_at = None
+
+        # Olay aboneleri: callback(olay, veri)
+        self.subscribers = []
+
+        # Bağlantı izleme thread'i (gecikme ölçümü ve bağlantı olayları)
+        self.monitor_interval = monitor_interval
+        self.monitor_running = False
+        self.monitor_thread = None
+
+    def subscribe(self, callback):
+        """Motor olaylarını dinle: callback(olay, veri), olayı üreten thread'den çağrılır"""
+        self.subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        """Aboneliği kaldır"""
+        if callback in self.subscribers:
+            self.subscribers.remove(callback)
+
+    def publish(self, event, data=None):
+        """Olayı tüm abonelere ilet"""
+        for callback in list(self.subscribers):
+            try:
+                callback(event, data)
+            except Exception as e:
+                print(f"❌ Motor olay dinleyici hatası ({event}): {e}")
+
+    def add_detection_listener(self, callback):
+        """Her tespit sonucunda callback(result) (worker thread'inden; yeniden başlatmalarda korunur)"""
+        self.detection_listeners.append(callback)
+        if self.detection_worker is not None:
+            self.detection_worker.add_listener(callback)
+
+    @property
+    def tracking(self):
+        """Kontrol döngüsü hedef izliyor mu"""
+        return self.running and self.mode in TRACKING_MODES
+
+    def start(self):
+        """Yakalama, tespit, ESP32 ve kontrol döngüsünü başlat (kamera açılamazsa False)"""
+        if self.running:
+            return True
+        if not self.source.start():
+            self.publish("error", "Kamera açılamadı")
+            return False
+
+        self.running = True
+        self.started_at = time.perf_counter()
+        self.start_detection()
+        if self.black_box is not None:
+            self.black_box.start(self.source.frame_buffer)
+        if self.esp32.connect():
+            self.setpoints.set(self.current_pan, self.current_tilt)
+            self.setpoints.start()
+        self.control_loop.start(self.current_pan, self.current_tilt)
+        self.start_monitor()
+        self.publish("started")
+        return True
+
+    def stop(self):
+        """Tüm boru hattını durdur"""
+        if not self.running:
+            return
+        self.running = False
+        self.stop_monitor()
+        self.stop_detection()
+        self.stop_esp32()
+        self.stop_black_box()
+        self.source.stop()
+        self.publish("stopped")
+
+    def shutdown(self):
+        """Durdur ve sahte ESP32'yi kapat (uygulama çıkışı)"""
+        self.stop()
+        # Acil durdurmadan sonra bağlantı açık kalmış olabilir
+        self.stop_esp32()
+        if self.black_box is not None:
+            # Yazılmayı bekleyen kara kutu klipleri bitirilir
+            self.black_box.close()
+        if self.fake_esp32 is not None:
+            self.fake_esp32.stop()
+            self.fake_esp32 = None
+
+    def emergency_stop(self):
+        """Acil durdur: önce durdurma komutu, sonra tüm boru hattı (kara kutu o ana kadarını yazar)"""
+        self.setpoints.emergency_stop()
+        if self.black_box is not None:
+            self.black_box.trigger("emergency", {"pan": self.current_pan, "tilt": self.current_tilt,
+                                                 "mode": self.mode})
+        self.running = False
+        self.stop_monitor()
+        self.control_loop.stop()
+        self.setpoints.stop()
+        self.stop_detection()
+        self.stop_black_box()
+        self.source.stop()
+        self.publish("emergency")
+
+    def start_detection(self):
+        """Kaynak halkasından beslenen tespit worker'ını başlat"""
+        self.tracker.reset()
+        if self.multiprocess:
+            self.detection_worker = ProcessDetectionWorker(
+                self.detector, self.source.frame_buffer,
+                queue_size=self.pipeline_settings["result_queue_size"])
+            self.detection_worker.set_motion_source(self.tracker.motion_snapshot)
+        else:
+            self.detection_worker = DetectionWorker(self.detector, self.source.frame_buffer,
+                                                    classifier=self.shape_classifier)
+            self.detection_worker.set_roi_provider(self.tracker.roi_provider)
+        self.detection_worker.add_listener(self.tracker.update_from_result)
+        for callback in self.detection_listeners:
+            self.detection_worker.add_listener(callback)
+        self.detection_worker.start()
+        print("🧠 Tespit worker'ı başlatıldı")
+
+    def stop_detection(self):
+        """Tespit worker'ını durdur ve özet istatistikleri yayınla"""
+        if self.detection_worker is None:
+            return
+        self.detection_worker.stop()
+        self.publish("detection_stats", self.detection_worker.get_stats())
+        self.detection_worker = None
+
+    def stop_esp32(self):
+        """Kontrol döngüsünü ve setpoint akışını durdur, ESP32 bağlantısını kapat"""
+        self.control_loop.stop()
+        self.setpoints.stop()
+        if self.esp32.running:
+            self.esp32.disconnect()
+            self.publish("esp32_stats", self.setpoints.get_stats())
+        self.update_link()
+
+    def stop_black_box(self):
+        """Kara kutuyu durdur (bekleyen tetik toplanan karelerle yazılır)"""
+        if self.black_box is None:
+            return
+        self.black_box.stop()
+        self.publish("black_box_stats", self.black_box.get_stats())
+
+    def start_monitor(self):
+        """Bağlantı izleme thread'ini başlat"""
+        if self.monitor_running:
+            return
+        self.monitor_running = True
+        self.monitor_thread = threading.Thread(target=self.run_monitor, daemon=True)
+        self.monitor_thread.start()
+
+    def stop_monitor(self):
+        """Bağlantı izleme thread'ini durdur"""
+        self.monitor_running = False
+        if self.monitor_thread is not None and self.monitor_thread is not threading.current_thread():
+            self.monitor_thread.join(timeout=1.0)
+        self.monitor_thread = None
+
+    def run_monitor(self):
+        """ESP32 gecikmesini nişan tahminine aktar, bağlantı değişince olay yayınla"""
+        while self.monitor_running:
+            self.update_link()
+            time.sleep(self.monitor_interval)
+
+    def update_link(self):
+        """Bağlantı durumu ve ölçülen komut gecikmesi"""
+        connected = self.esp32.connected
+        if connected:
+            self.aim_predictor.update_output_delay(self.esp32.latency.get_stats(),
+                                                   self.setpoints.latency.get_stats())
+        if connected != self.esp32_connected:
+            self.esp32_connected = connected
+            self.publish("esp32", connected)
+
+    def set_mode(self, mode):
+        """Çalışma modunu değiştir (angajmanda orta güvenli bölge tabloya eklenir)"""
+        if mode not in MODES:
+            raise ValueError(f"Bilinmeyen mod: {mode}")
+        self.mode = mode
+        if mode == "angajman":
+            self.safety.set_zone(ENGAGEMENT_ZONE, *self.safe_zone_angle)
+        else:
+            self.safety.remove_zone(ENGAGEMENT_ZONE)
+        self.publish("mode", mode)
+
+    def set_angles(self, pan=None, tilt=None):
+        """Manuel pan/tilt komutu"""
+        if pan is not None:
+            self.current_pan = pan
+        if tilt is not None:
+            self.current_tilt = tilt
+        self.setpoints.set(pan, tilt)
+        # Takibe geçişte döngü bu konumdan devam etsin
+        if not self.control_loop.active:
+            self.control_loop.command = (self.current_pan, self.current_tilt)
+
+    def set_no_fire_zone(self, start, end):
+        """Yasak alan (başlangıç > bitiş ise 0°/360° üzerinden sarar)"""
+        self.safety.set_zone(NO_FIRE_ZONE, start, end)
+        self.publish("no_fire_zone", (start, end))
+
+    def fire(self):
+        """
+        Güvenlik kontrolünden geçerse ateş komutu gönder.
+        Dönüş: (ateşlendi mi, red nedeni, engelleyen bölge);
+        neden 'stopped' (sistem kapalı), 'tilt' (tilt sınır dışı) ya da 'zone'.
+        """
+        pan, tilt = self.current_pan, self.current_tilt
+        if not self.running:
+            reason, zone = "stopped", None
+        else:
+            allowed, zone = self.safety.check(pan, tilt)
+            reason = None if allowed else ("tilt" if zone is None else "zone")
+
+        if reason is not None:
+            self.publish("fire_refused", {"reason": reason, "zone": zone, "pan": pan, "tilt": tilt})
+            return False, reason, zone
+
+        self.setpoints.fire()
+        self.kill_count += 1
+        event = {"pan": pan, "tilt": tilt, "mode": self.mode, "kill_count": self.kill_count}
+        if self.black_box is not None:
+            self.black_box.trigger("fire", event)
+        self.publish("fire", event)
+        return True, None, None
+
+    def frame_shape(self):
+        """Dedektöre giden karelerin boyutu (sistem kapalıysa ya da kare yoksa None)"""
+        if not self.running:
+            return None
+        return self.source.shape
+
+    def track_to_target(self, track):
+        """İz kutusunu (pan, tilt, mesafe) hedef bilgisine çevir"""
+        shape = self.frame_shape()
+        if shape is None:
+            return None
+
+        frame_h, frame_w = shape[:2]
+        x1, _, x2, _ = track["box"]
+        center_x, center_y = track["center"]
+        pan, tilt = pixel_to_angles(center_x, center_y, frame_w, frame_h,
+                                    self.camera_settings["hfov"], self.camera_settings["vfov"],
+                                    self.current_pan, self.current_tilt)
+        distance = estimate_distance(x2 - x1, frame_w, self.camera_settings["hfov"],
+                                     self.target_size)
+        return pan, tilt, distance
+
+    def targets(self):
+        """İzlenen tüm hedefler: [(pan, tilt, mesafe), ...]"""
+        targets = [self.track_to_target(track) for track in self.tracker.get_tracks()]
+        return [target for target in targets if target is not None]
+
+    def aim_target(self):
+        """Kontrol döngüsü için birincil hedef: (pan, tilt, pan hızı, tilt hızı) ya da None"""
+        if not self.tracking:
+            return None
+        shape = self.frame_shape()
+        if shape is None:
+            return None
+        tracks = self.tracker.get_tracks()
+        if not tracks:
+            return None
+
+        # En yakın hedef (en geniş kutu) birincil hedef
+        track = max(tracks, key=lambda t: t["box"][2] - t["box"][0])
+        frame_h, frame_w = shape[:2]
+
+        # Piksel, karenin yakalandığı andaki taret açısıyla dünyaya çevrilir
+        pose = self.pose_history.at(track["time"])
+        if pose is None:
+            pose = (self.control_loop.command[0], self.control_loop.command[1], 0.0, 0.0)
+        return self.aim_predictor.aim(track, frame_w, frame_h, pose, time.perf_counter())
+
+    def send_aim_setpoint(self, pan, tilt):
+        """Kontrol döngüsü çıkışı: setpoint'i gönder (yol kontrolü döngüde, ateş kontrolü fire'da)"""
+        self.current_pan, self.current_tilt = pan, tilt
+        self.setpoints.set(pan, tilt)
+
+    def turret_angles(self):
+        """ESP32 telemetrisinden ölçülen pan/tilt (yoksa ya da eskiyse None)"""
+        telemetry = self.esp32.telemetry
+        if telemetry is None or time.time() - telemetry[2] > 0.1:
+            return None
+        return telemetry[0], telemetry[1]
+
+    def get_stats(self):
+        """Aşama istatistikleri: yakalama, tespit, kontrol, ESP32 ve motor durumu"""
+        stats = {
+            "capture": self.source.get_stats(),
+            "control": self.control_loop.get_stats(),
+            "esp32": self.setpoints.get_stats(),
+            "engine": {
+                "running": self.running,
+                "mode": self.mode,
+                "kill_count": self.kill_count,
+                "tracks": len(self.tracker.get_tracks()),
+                "uptime": time.perf_counter() - self.started_at if self.started_at else 0.0
+            }
+        }
+        worker = self.detection_worker
+        if worker is not None:
+            stats["detection"] = worker.get_stats()
+        if self.black_box is not None:
+            stats["black_box"] = self.black_box.get_stats()
+        return stats
+
+
+def format_stats(stats, previous=None, interval=None):
+    """Tek satırlık verim özeti (previous/interval verilirse kare hızları aralıktan hesaplanır)"""
+    captured = stats["capture"]["frames"]["captured"]
+    processed = stats.get("detection", {}).get("frames", {}).get("processed", 0)
+    if previous is not None and interval:
+        capture_fps = (captured - previous["capture"]["frames"]["captured"]) / interval
+        detect_fps = (processed - previous.get("detection", {}).get("frames", {}).get("processed", 0)) / interval
+    else:
+        uptime = stats["engine"]["uptime"] or 1.0
+        capture_fps = captured / uptime
+        detect_fps = processed / uptime
+
+    parts = [f"yakalama {capture_fps:.1f} fps", f"tespit {detect_fps:.1f} fps"]
+    detection = stats.get("detection", {})
+    if "inference" in detection:
+        parts.append(f"çıkarım ort {detection['inference']['mean']:.1f} / p95 {detection['inference']['p95']:.1f} ms")
+    if "capture_to_result" in detection:
+        parts.append(f"yakalama->sonuç p95 {detection['capture_to_result']['p95']:.1f} ms")
+    control = stats["control"]
+    if "step" in control:
+        parts.append(f"kontrol p95 {control['step']['p95']:.3f} ms (taşma {control['loop']['overruns']})")
+    parts.append(f"iz {stats['engine']['tracks']}")
+    return " | ".join(parts)
+
+
+def run_headless(engine, duration=None, interval=5.0):
+    """
+    Motoru ekransız çalıştır, periyodik verim özeti yazdır.
+    duration (s) dolunca, video dosyası bitince ya da Ctrl+C ile durur; son istatistikleri döndürür.
+    """
+    if not engine.start():
+        return None
+
+    start = time.perf_counter()
+    previous = engine.get_stats()
+    last_report = start
+    try:
+        while engine.running:
+            time.sleep(min(0.1, interval))
+            now = time.perf_counter()
+            if duration is not None and now - start >= duration:
+                break
+            if engine.source.finished:
+                print("⏹ Video sonu")
+                break
+            if now - last_report >= interval:
+                stats = engine.get_stats()
+                print(f"📊 {format_stats(stats, previous, now - last_report)}")
+                previous = stats
+                last_report = now
+    except KeyboardInterrupt:
+        print("\n⏹ Kullanıcı durdurdu")
+
+    stats = engine.get_stats()
+    engine.shutdown()
+    print(f"📊 Toplam: {format_stats(stats)}")
+    return stats
@@ -0,0 +1,325 @@
+import multiprocessing
+import queue
+import threading
+import time
+
+import numpy as np
+
+from core.capture import FrameSource
+from utils.config import get_section
+from utils.frame_buffer import SharedFrameRing
+from vision.detector import Detector, DetectionWorker, DetectionResult
+from vision.shape_classifier import ShapeClassifier
+from vision.tracker import predict_snapshot_boxes
+
+
+DEFAULT_PIPELINE_SETTINGS = {
+    "multiprocess": False,
+    "buffer_size": 4,
+    "result_queue_size": 8
+}
+
+# Qt ve thread'ler varken fork güvenli değil; alt süreçler her platformda spawn ile başlar
+CONTEXT = multiprocessing.get_context("spawn")
+
+
+def capture_main(source_args, frame_buffer, stop_event, finished_event):
+    """Yakalama süreci: FrameSource paylaşımlı halkaya yazar"""
+    source = FrameSource(frame_buffer=frame_buffer, **source_args)
+    if source.start():
+        while not stop_event.wait(0.1):
+            if source.finished:
+                break
+        source.stop()
+    finished_event.set()
+    frame_buffer.release_memory()
+
+
+def detection_main(frame_buffer, results, motion, stop_event, classify):
+    """
+    Tespit süreci: paylaşımlı halkadan çıkarım ve renk/şekil sınıflandırma.
+    Sonuçlar küçük demetler halinde kuyruğa yazılır; izleyici ana süreçte kaldığı için
+    ROI pencereleri ana süreçten gelen son iz durumlarından sabit hızla tahmin edilir.
+    """
+    detector = Detector.from_settings()
+    worker = DetectionWorker(detector, frame_buffer, classifier=ShapeClassifier() if classify else None)
+    snapshot = [(None, np.zeros((0, 8)))]
+    counters = {"queue_dropped": 0}
+
+    def roi_provider(frame_id, timestamp):
+        try:
+            while True:
+                snapshot[0] = motion.get_nowait()
+        except queue.Empty:
+            pass
+        return [tuple(box) for box in predict_snapshot_boxes(snapshot[0], timestamp).tolist()]
+
+    def send(result):
+        message = (result.frame_id, result.capture_time, result.boxes, result.scores, result.class_ids,
+                   result.attributes, result.inference_start, result.inference_end, result.mode)
+        try:
+            results.put_nowait(("result", message))
+        except queue.Full:
+            # Ana süreç yetişemiyor: eski sonuç beklemektense bu sonuç atılır
+            counters["queue_dropped"] += 1
+
+    worker.set_roi_provider(roi_provider)
+    worker.add_listener(send)
+    worker.start()
+
+    announced = False
+    while not stop_event.wait(0.05):
+        if not announced and detector.loaded:
+            results.put(("loaded", detector.labels))
+            announced = True
+        if not worker.running or frame_buffer.closed:
+            break
+    worker.stop()
+
+    stats = worker.get_stats()
+    stats["process"] = counters
+    results.put(("stats", stats))
+    frame_buffer.release_memory()
+
+
+class ProcessFrameSource(FrameSource):
+    """
+    FrameSource'un ayrı süreçte çalışan karşılığı.
+    Kare boyutu önce kaynaktan okunur, paylaşımlı halka bu süreçte kurulur; yakalama
+    süreci halkaya yazar, bu süreçteki okuyucular (ekran, tespit süreci) kopyasız okur.
+    """
+
+    def __init__(self, source=0, width=1280, height=720, fps=30, buffer_size=4, realtime=True, loop=False):
+        super().__init__(source, width=width, height=height, fps=fps, buffer_size=buffer_size,
+                         realtime=realtime, loop=loop)
+        self.frame_buffer = None
+        self.buffer_stats = {"frames_written": 0, "overruns": 0, "latest_id": -1}
+        self.process = None
+        self.stop_event = CONTEXT.Event()
+        self.finished_event = CONTEXT.Event()
+
+    @property
+    def finished(self):
+        return self.process is not None and self.finished_event.is_set()
+
+    @finished.setter
+    def finished(self, value):
+        # Bitiş bilgisi yakalama sürecinden gelir
+        pass
+
+    @property
+    def shape(self):
+        return self.frame_buffer.shape if self.frame_buffer is not None else None
+
+    def start(self):
+        """Kare boyutunu öğren, paylaşımlı halkayı kur ve yakalama sürecini başlat"""
+        if self.process is not None:
+            return True
+
+        shape = self.probe()
+        if shape is None:
+            return False
+
+        self.frame_buffer = SharedFrameRing(shape, self.buffer_size, context=CONTEXT)
+        self.stop_event.clear()
+        self.finished_event.clear()
+        source_args = {"source": self.source, "width": self.width, "height": self.height, "fps": self.fps,
+                       "buffer_size": self.buffer_size, "realtime": self.realtime, "loop": self.loop}
+        self.process = CONTEXT.Process(target=capture_main, name="tuna-capture",
+                                       args=(source_args, self.frame_buffer, self.stop_event,
+                                             self.finished_event),
+                                       daemon=True)
+        self.process.start()
+        print(f"🧩 Yakalama süreci başladı (pid {self.process.pid}, halka {shape[1]}x{shape[0]})")
+        return True
+
+    def stop(self):
+        """Yakalama sürecini durdur ve paylaşımlı belleği sil"""
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.frame_buffer.close()
+        self.process.join(timeout=2.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.process = None
+        self.frame_buffer.release_memory()
+
+    def get_stats(self):
+        """Kare sayaçları (yakalama gecikmesi alt süreçte kalır)"""
+        frame_buffer = self.frame_buffer
+        if frame_buffer is not None and frame_buffer.header is not None:
+            # Halka serbest bırakıldıktan sonra son okunan sayaçlar döner
+            self.buffer_stats = frame_buffer.get_stats()
+        return {
+            "frames": {
+                "captured": self.buffer_stats["frames_written"],
+                "overruns": self.buffer_stats["overruns"],
+                "read_errors": 0,
+                "finished": self.finished
+            }
+        }
+
+
+class ProcessDetectionWorker(DetectionWorker):
+    """
+    DetectionWorker'ın ayrı süreçte çalışan karşılığı.
+    Çıkarım alt süreçte yapılır; gelen sonuçlar bu süreçteki dinleyicilere (izleyici,
+    ekran) aynı publish() ile dağıtılır. İz durumları alt sürece ROI tahmini için gönderilir.
+    """
+
+    def __init__(self, detector, frame_buffer, classify=True, queue_size=8):
+        super().__init__(detector, frame_buffer)
+        self.classify = classify
+        self.results = CONTEXT.Queue(queue_size)
+        self.motion = CONTEXT.Queue(4)
+        self.stop_event = CONTEXT.Event()
+        self.process = None
+        self.motion_source = None   # () -> (zaman, durumlar); MultiTargetTracker.motion_snapshot
+        self.child_stats = {}
+        self.last_id = -1
+
+    def set_motion_source(self, source):
+        """ROI tahmini için iz durumu kaynağını bağla"""
+        self.motion_source = source
+
+    def start(self):
+        """Tespit sürecini ve sonuç alma thread'ini başlat"""
+        if self.running:
+            return
+        self.running = True
+        self.stop_event.clear()
+        self.process = CONTEXT.Process(target=detection_main, name="tuna-detection",
+                                       args=(self.frame_buffer, self.results, self.motion,
+                                             self.stop_event, self.classify),
+                                       daemon=True)
+        self.process.start()
+        print(f"🧩 Tespit süreci başladı (pid {self.process.pid})")
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Süreci durdur, kalan sonuçları ve son istatistikleri al"""
+        if self.process is None:
+            return
+        self.stop_event.set()
+        self.process.join(timeout=3.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        while True:
+            try:
+                self.handle(*self.results.get_nowait())
+            except queue.Empty:
+                break
+        self.process = None
+
+    def run(self):
+        """Sonuç kuyruğunu oku"""
+        while self.running:
+            try:
+                kind, payload = self.results.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            self.handle(kind, payload)
+
+    def handle(self, kind, payload):
+        """Alt süreç mesajını işle"""
+        if kind == "loaded":
+            self.detector.labels = payload
+            self.detector.loaded = True
+        elif kind == "stats":
+            self.child_stats = payload
+        elif kind == "result":
+            (frame_id, capture_time, boxes, scores, class_ids, attributes,
+             inference_start, inference_end, mode) = payload
+            if self.last_id >= 0:
+                self.frames_skipped += frame_id - self.last_id - 1
+            self.last_id = frame_id
+            if mode == "roi":
+                self.roi_frames += 1
+            else:
+                self.full_frames += 1
+
+            result = DetectionResult(frame_id, capture_time, boxes, scores, class_ids,
+                                     self.detector.labels, inference_start, inference_end, mode)
+            result.attributes = attributes
+            self.publish(result)
+            self.send_motion()
+
+    def send_motion(self):
+        """Güncel iz durumlarını ROI tahmini için alt sürece gönder"""
+        if self.motion_source is None:
+            return
+        try:
+            self.motion.put_nowait(self.motion_source())
+        except queue.Full:
+            pass
+
+    def get_stats(self):
+        """Gecikme ve kare sayaçları (sınıflandırma süresi ve kuyruk kayıpları alt süreçten)"""
+        stats = super().get_stats()
+        if "classify" in self.child_stats:
+            stats["classify"] = self.child_stats["classify"]
+        stats["process"] = self.child_stats.get("process", {})
+        return stats
+
+
+def benchmark(source, duration=20.0, realtime=False):
+    """
+    Aynı kaynak üzerinde tek süreç ve çok süreç motorunu ekransız çalıştır.
+    Dönüş: mod -> (yakalama fps, tespit fps, yakalama->sonuç gecikmesi)
+    """
+    from core.engine import Engine
+
+    settings = get_section("pipeline", DEFAULT_PIPELINE_SETTINGS)
+    report = {}
+    for multiprocess in (False, True):
+        source_class = ProcessFrameSource if multiprocess else FrameSource
+        frame_source = source_class.from_settings(source=source, realtime=realtime, loop=True,
+                                                  buffer_size=settings["buffer_size"])
+        engine = Engine(frame_source, multiprocess=multiprocess)
+        if not engine.start():
+            return None
+        time.sleep(duration)
+        stats = engine.get_stats()
+        engine.shutdown()
+
+        uptime = stats["engine"]["uptime"]
+        detection = stats.get("detection", {})
+        report["çok süreç" if multiprocess else "tek süreç"] = {
+            "capture_fps": stats["capture"]["frames"]["captured"] / uptime,
+            "detect_fps": detection.get("frames", {}).get("processed", 0) / uptime,
+            "latency": detection.get("capture_to_result"),
+            "inference": detection.get("inference")
+        }
+    return report
+
+
+if __name__ == "__main__":
+    # Örnek: python -m core.multiprocess --source recordings/video.mp4 --duration 20
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Tek süreç / çok süreç boru hattı karşılaştırması")
+    parser.add_argument("--source", help="Kamera indeksi ya da video dosyası")
+    parser.add_argument("--duration", type=float, default=20.0, help="Her mod için süre (s)")
+    parser.add_argument("--realtime", action="store_true", help="Video dosyasını kare hızında oku")
+    args = parser.parse_args()
+
+    report = benchmark(args.source, duration=args.duration, realtime=args.realtime)
+    if report is None:
+        print("❌ Kaynak açılamadı")
+        raise SystemExit(1)
+    for name, result in report.items():
+        line = f"{name}: yakalama {result['capture_fps']:.1f} fps, tespit {result['detect_fps']:.1f} fps"
+        if result["latency"] is not None:
+            line += (f", yakalama->sonuç p50 {result['latency']['p50']:.1f} ms "
+                     f"p95 {result['latency']['p95']:.1f} ms")
+        if result["inference"] is not None:
+            line += f", çıkarım ort {result['inference']['mean']:.1f} ms"
+        print(line)
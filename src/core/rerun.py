@@ -0,0 +1,343 @@
+import json
+import time
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from core.engine import ENGAGEMENT_ZONE, SAFE_ZONE_ANGLE, TRACKING_MODES
+from utils.config import get_section
+from utils.math_utils import box_iou, pixel_to_angles, estimate_distance
+from utils.perf_stats import LatencyTracker
+from utils.replay_manager import ReplayReader, iter_frame_records
+from utils.video_reader import RecordingReader
+from vision.detector import Detector
+from vision.tracker import MultiTargetTracker, DEFAULT_TRACKER_SETTINGS
+from vision.shape_classifier import ShapeClassifier
+from control.safety import SafetyEngine
+
+
+STAGES = ("decode", "detect", "classify", "track", "safety", "total")
+
+
+def match_boxes(boxes_a, boxes_b, iou_threshold=0.5):
+    """İki kutu kümesini IoU ile birebir eşle: [(i, j, iou), ...]"""
+    if len(boxes_a) == 0 or len(boxes_b) == 0:
+        return []
+    iou = box_iou(np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4),
+                  np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4))
+    rows, cols = linear_sum_assignment(-iou)
+    return [(i, j, float(iou[i, j])) for i, j in zip(rows, cols) if iou[i, j] >= iou_threshold]
+
+
+class BoxDiff:
+    """Kayıttaki ve yeniden hesaplanan kutuların karşılaştırma sayaçları"""
+
+    def __init__(self):
+        self.frames = 0
+        self.stored = 0
+        self.rerun = 0
+        self.matched = 0
+        self.ious = []
+        self.label_mismatches = 0
+        self.id_switches = 0
+        self.id_map = {}   # kayıttaki iz id -> yeniden çalıştırmadaki iz id
+
+    def add(self, stored_boxes, rerun_boxes, matches):
+        self.frames += 1
+        self.stored += len(stored_boxes)
+        self.rerun += len(rerun_boxes)
+        self.matched += len(matches)
+        self.ious.extend(iou for _, _, iou in matches)
+
+    def add_ids(self, stored_ids, rerun_ids, matches):
+        """Eşleşen izlerin kimlik tutarlılığı: aynı kayıt izi başka bir ize geçerse kimlik değişimi"""
+        for i, j, _ in matches:
+            previous = self.id_map.get(stored_ids[i])
+            if previous is not None and previous != rerun_ids[j]:
+                self.id_switches += 1
+            self.id_map[stored_ids[i]] = rerun_ids[j]
+
+    def report(self):
+        return {
+            "frames": self.frames,
+            "stored": self.stored,
+            "rerun": self.rerun,
+            "matched": self.matched,
+            "missing": self.stored - self.matched,   # kayıtta var, yeniden çalıştırmada yok
+            "extra": self.rerun - self.matched,      # yeniden çalıştırmada yeni
+            "recall": self.matched / self.stored if self.stored else 1.0,
+            "precision": self.matched / self.rerun if self.rerun else 1.0,
+            "mean_iou": float(np.mean(self.ious)) if self.ious else 0.0,
+            "label_mismatches": self.label_mismatches,
+            "id_switches": self.id_switches
+        }
+
+
+class PipelineRerun:
+    """
+    Kayıtlı görevi (video + görev kaydı) dedektör, izleyici, renk/şekil sınıflandırıcı ve
+    güvenlik motorundan gerçek zaman beklemeden, kare kare eşzamanlı geçirir.
+    Kare kayıtlarının video kare numarasıyla videodan kare okunur; izleyici kaydın
+    zamanlarıyla beslenir. Canlı sistemde tespit asenkron olduğu için kayıttaki sonuç
+    genelde daha eski bir kareye aittir (detection_frame_id); karşılaştırma bu yüzden
+    sonucun ait olduğu kare üzerinde yapılır. Video sıkıştırması çıktıları az da olsa değiştirir.
+    """
+
+    def __init__(self, detector, tracker, classifier, safety, camera_settings, target_size=0.3,
+                 roi=True, iou_threshold=0.5):
+        self.detector = detector
+        self.tracker = tracker
+        self.classifier = classifier
+        self.safety = safety
+        self.camera_settings = camera_settings
+        self.target_size = target_size
+        self.roi = roi                      # Canlı sistemdeki gibi izlerin çevresinde ROI çıkarımı
+        self.iou_threshold = iou_threshold
+        self.frames_since_full = 0
+
+    @classmethod
+    def from_settings(cls, roi=True, iou_threshold=0.5):
+        """Canlı motorla aynı ayar bölümlerinden oluştur"""
+        tracker_settings = get_section("tracker", DEFAULT_TRACKER_SETTINGS)
+        return cls(
+            Detector.from_settings(),
+            MultiTargetTracker.from_settings(tracker_settings),
+            ShapeClassifier(),
+            SafetyEngine.from_settings(),
+            get_section("camera", {"hfov": 70.0, "vfov": 43.0}),
+            target_size=tracker_settings["target_size_m"],
+            roi=roi,
+            iou_threshold=iou_threshold
+        )
+
+    def detect(self, frame, timestamp):
+        """DetectionWorker ile aynı karar: izler varsa ROI, her N karede bir tam tarama"""
+        output = None
+        if self.roi and self.frames_since_full + 1 < self.detector.roi_full_scan_interval:
+            rois = self.tracker.roi_provider(None, timestamp)
+            if rois:
+                output = self.detector.detect_rois(frame, rois)
+        if output is None:
+            self.frames_since_full = 0
+            return self.detector.detect(frame), "full"
+        self.frames_since_full += 1
+        return output, "roi"
+
+    def labels(self, class_ids, attributes):
+        """Kayıttakiyle aynı etiketler (renk/şekil varsa 'renk şekil')"""
+        labels = []
+        for index, class_id in enumerate(class_ids):
+            if attributes:
+                labels.append(f"{attributes[index]['color']} {attributes[index]['shape']}")
+            else:
+                labels.append(self.detector.labels.get(int(class_id), str(int(class_id))))
+        return labels
+
+    def targets(self, tracks, frame_w, frame_h, pan, tilt):
+        """İzleri (pan, tilt, mesafe) hedeflerine çevir (Engine.track_to_target ile aynı)"""
+        targets = []
+        for track in tracks:
+            x1, _, x2, _ = track["box"]
+            center_x, center_y = track["center"]
+            target_pan, target_tilt = pixel_to_angles(center_x, center_y, frame_w, frame_h,
+                                                      self.camera_settings["hfov"],
+                                                      self.camera_settings["vfov"], pan, tilt)
+            targets.append((target_pan, target_tilt,
+                            estimate_distance(x2 - x1, frame_w, self.camera_settings["hfov"],
+                                              self.target_size)))
+        return targets
+
+    def primary_safe(self, targets):
+        """En yakın hedefe ateş serbest mi (hedef yoksa None)"""
+        if not targets:
+            return None
+        target_pan, target_tilt, _ = min(targets, key=lambda t: t[2])
+        return self.safety.is_safe(target_pan, target_tilt)
+
+    def run(self, replay_path, video_path=None, max_frames=None):
+        """
+        Kaydı baştan sona çalıştır. video_path verilirse tüm kareler bu videodan okunur,
+        verilmezse kayıttaki video olaylarının adresinden. Model yüklenemezse None.
+        """
+        if not self.detector.load():
+            return None
+
+        reader = ReplayReader(replay_path)
+        try:
+            # Kayıttaki sonuçlar ait oldukları kareye göre (ilk görüldükleri kare kaydından)
+            stored = {}
+            total = 0
+            for _, _, data in iter_frame_records(reader):
+                total += 1
+                result_id = data.get("detection_frame_id")
+                if result_id is not None and result_id not in stored:
+                    stored[result_id] = (data["detections"], data["tracks"])
+            if max_frames is not None:
+                total = min(total, max_frames)
+            return self.process(reader, stored, total, video_path)
+        finally:
+            reader.close()
+
+    def process(self, reader, stored, total, video_path=None):
+        """Kare kayıtlarını sırayla işle, gecikme ve fark raporunu döndür"""
+        latency = LatencyTracker(window=max(total, 1))
+        detections = BoxDiff()
+        tracks = BoxDiff()
+        modes = {"full": 0, "roi": 0}
+        frames = 0
+        missing_frames = 0
+        blocked = 0
+        safety_mismatches = 0
+        first_time = last_time = None
+        video = None
+
+        self.tracker.reset()
+        self.frames_since_full = 0
+        self.safety.remove_zone(ENGAGEMENT_ZONE)
+        run_start = time.perf_counter()
+        try:
+            for timestamp, path, data in iter_frame_records(reader):
+                if frames >= total:
+                    break
+                path = video_path or path
+                if path is None:
+                    continue
+                if video is None or video.path != path:
+                    if video is not None:
+                        video.close()
+                    video = RecordingReader(path)
+
+                frame_start = time.perf_counter()
+                frame = video.read(data["video_frame"])
+                if frame is None:
+                    missing_frames += 1
+                    continue
+                latency.record_since("decode", frame_start)
+
+                stage_start = time.perf_counter()
+                (boxes, scores, class_ids), mode = self.detect(frame, timestamp)
+                latency.record_since("detect", stage_start)
+                modes[mode] += 1
+
+                stage_start = time.perf_counter()
+                attributes = self.classifier.classify_frame(frame, boxes) if len(boxes) else None
+                latency.record_since("classify", stage_start)
+
+                stage_start = time.perf_counter()
+                rerun_tracks = self.tracker.update(boxes, scores, class_ids, timestamp)
+                latency.record_since("track", stage_start)
+
+                # Hedefler kaydın taret açısıyla; angajman modunda orta güvenli bölge de tabloda
+                stage_start = time.perf_counter()
+                if data["mode"] == "angajman":
+                    if self.safety.get_zone(ENGAGEMENT_ZONE) is None:
+                        self.safety.set_zone(ENGAGEMENT_ZONE, *SAFE_ZONE_ANGLE)
+                else:
+                    self.safety.remove_zone(ENGAGEMENT_ZONE)
+                frame_h, frame_w = frame.shape[:2]
+                targets = self.targets(rerun_tracks, frame_w, frame_h, data["pan"], data["tilt"])
+                for target_pan, target_tilt, _ in targets:
+                    allowed, _, _ = self.safety.check_path(data["pan"], data["tilt"], target_pan, target_tilt)
+                    blocked += not allowed
+                # Kayıtta hedefler sadece izleme modlarında tutulur
+                if (data["mode"] in TRACKING_MODES
+                        and self.primary_safe(targets) != self.primary_safe(data["targets"])):
+                    safety_mismatches += 1
+                latency.record_since("safety", stage_start)
+                latency.record_since("total", frame_start)
+
+                frames += 1
+                if first_time is None:
+                    first_time = timestamp
+                last_time = timestamp
+
+                if data["frame_id"] in stored:
+                    stored_detections, stored_tracks = stored[data["frame_id"]]
+                    stored_boxes = [detection[:4] for detection in stored_detections]
+                    matches = match_boxes(stored_boxes, boxes, self.iou_threshold)
+                    detections.add(stored_boxes, boxes, matches)
+                    labels = self.labels(class_ids, attributes)
+                    detections.label_mismatches += sum(stored_detections[i][5] != labels[j]
+                                                       for i, j, _ in matches)
+
+                    stored_track_boxes = [track["box"] for track in stored_tracks]
+                    rerun_track_boxes = [track["box"] for track in rerun_tracks]
+                    matches = match_boxes(stored_track_boxes, rerun_track_boxes, self.iou_threshold)
+                    tracks.add(stored_track_boxes, rerun_track_boxes, matches)
+                    tracks.add_ids([track["id"] for track in stored_tracks],
+                                   [track["id"] for track in rerun_tracks], matches)
+        finally:
+            if video is not None:
+                video.close()
+
+        elapsed = time.perf_counter() - run_start
+        recorded = (last_time - first_time) if frames > 1 else 0.0
+        stats = latency.get_stats()
+        return {
+            "frames": frames,
+            "missing_frames": missing_frames,
+            "elapsed": elapsed,
+            "fps": frames / elapsed if elapsed > 0 else 0.0,
+            "realtime_factor": recorded / elapsed if elapsed > 0 else 0.0,
+            "modes": modes,
+            "latency": {stage: stats[stage] for stage in STAGES if stage in stats},
+            "detections": detections.report(),
+            "tracks": tracks.report(),
+            "safety": {"targets_blocked": blocked, "primary_mismatches": safety_mismatches}
+        }
+
+
+def format_report(report):
+    """Okunur rapor satırları"""
+    lines = [
+        f"{report['frames']} kare ({report['missing_frames']} okunamadı) {report['elapsed']:.1f}s: "
+        f"{report['fps']:.1f} fps, gerçek zamanın {report['realtime_factor']:.1f} katı "
+        f"(tam {report['modes']['full']}, ROI {report['modes']['roi']})"
+    ]
+    for stage, stats in report["latency"].items():
+        lines.append(f"  {stage:<9} ort {stats['mean']:7.2f} ms  p50 {stats['p50']:7.2f} ms  "
+                     f"p95 {stats['p95']:7.2f} ms  maks {stats['max']:7.2f} ms")
+    for name, title in (("detections", "Tespit"), ("tracks", "İz")):
+        diff = report[name]
+        line = (f"{title}: {diff['frames']} kare, kayıt {diff['stored']} / yeni {diff['rerun']}, "
+                f"eşleşen {diff['matched']} (eksik {diff['missing']}, fazla {diff['extra']}), "
+                f"ort IoU {diff['mean_iou']:.3f}")
+        if name == "detections":
+            line += f", etiket farkı {diff['label_mismatches']}"
+        else:
+            line += f", kimlik değişimi {diff['id_switches']}"
+        lines.append(line)
+    safety = report["safety"]
+    lines.append(f"Güvenlik: engellenen hedef yolu {safety['targets_blocked']}, "
+                 f"birincil hedef kararı farklı kare {safety['primary_mismatches']}")
+    return lines
+
+
+if __name__ == "__main__":
+    # Örnek: python -m core.rerun replays/replay_x.replay --video recordings/video_x.index.json --output rapor.json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Kayıtlı görevi boru hattından çevrimdışı yeniden geçir")
+    parser.add_argument("replay", help="Görev kaydı (.replay)")
+    parser.add_argument("--video", help="Video kaydı (.mp4 ya da .index.json); verilmezse kayıttaki adres")
+    parser.add_argument("--frames", type=int, help="En fazla işlenecek kare")
+    parser.add_argument("--no-roi", action="store_true", help="Her karede tam tarama")
+    parser.add_argument("--iou", type=float, default=0.5, help="Karşılaştırmada eşleşme IoU eşiği")
+    parser.add_argument("--output", help="Raporu JSON olarak kaydet")
+    args = parser.parse_args()
+
+    rerun = PipelineRerun.from_settings(roi=not args.no_roi, iou_threshold=args.iou)
+    try:
+        report = rerun.run(args.replay, args.video, args.frames)
+    except (OSError, ValueError) as e:
+        print(f"❌ Kayıt açılamadı: {e}")
+        raise SystemExit(1)
+    if report is None:
+        raise SystemExit(1)
+
+    for line in format_report(report):
+        print(line)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Rapor kaydedildi: {args.output}")
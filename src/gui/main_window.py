@@ -1,13 +1,14 @@
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QSlider, QTextEdit, QFileDialog,
-                             QDialog, QSpinBox, QMessageBox, QApplication, QTabWidget)
-from PyQt5.QtCore import Qt, QTimer
+                             QDialog, QSpinBox, QMessageBox, QApplication, QTabWidget, QComboBox)
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont
 from datetime import datetime
 import os
 import time
 
-from gui.widgets.camera_widget import CameraWidget
+from gui.widgets.camera_widget import CameraWidget, detection_boxes
+from gui.widgets.replay_player import ReplayPlayer
 from gui.widgets.screen_recorder import ScreenRecorderThread
 from gui.widgets.stats_widget import StatsWidget
 from gui.widgets.target_graph import TargetGraphWidget
@@ -18,9 +19,10 @@ from gui import styles
 from utils.logger import TunaLogger
 from utils.sound_manager import SoundManager
 from utils.theme_manager import ThemeManager
-from utils.replay_manager import ReplayManager
+from utils.replay_manager import ReplayManager, PLAYBACK_SPEEDS
 from utils.voice_commands import VoiceCommandManager
 from utils.notification_manager import NotificationManager
+from core.engine import Engine, ENGAGEMENT_ZONE
 
 
 class NoFireZoneDialog(QDialog):
@@ -83,6 +85,7 @@ class NoFireZoneDialog(QDialog):
 
 class MainWindow(QMainWindow):
     """Ana uygulama penceresi"""
+    engine_event = pyqtSignal(str, object)  # Motor olayları (olay, veri)
     
     def __init__(self):
         super().__init__()
@@ -98,7 +101,8 @@ class MainWindow(QMainWindow):
         self.theme_manager = ThemeManager()
         
         # Replay yöneticisi
-        self.replay_manager = ReplayManager()
+        self.replay_manager = ReplayManager.from_settings()
+        self.replay_manager.set_state_provider(self.replay_state)
         self.replay_mode = False
         self.replay_start_time = 0
         
@@ -108,6 +112,13 @@ class MainWindow(QMainWindow):
         self.voice_manager.start_listening()  # Otomatik başlat
         self.logger.info("🎤 Ses komutları aktif (F/S/R/M/A/Y/ESC)")
         
+        # Çekirdek motor (yakalama -> tespit -> izleme -> kontrol -> güvenlik); pencere abonedir.
+        # Motor olayları kendi thread'lerinden gelir, sinyal ile GUI thread'ine aktarılır
+        self.engine = Engine()
+        self.engine_event.connect(self.handle_engine_event)
+        self.engine.subscribe(self.engine_event.emit)
+        self.engine.add_detection_listener(self.forward_detections)
+        
         # Bildirim sistemi (init_ui'den sonra başlatılacak)
         self.notification_manager = None
         
@@ -120,17 +131,13 @@ class MainWindow(QMainWindow):
         self.screen_recording = False
         self.no_fire_zone = None
         
-        # Pan/Tilt değerleri
-        self.current_pan = 180
-        self.current_tilt = 30
+        # Pan/Tilt değerleri (gösterim; komutlar motordan)
+        self.current_pan = self.engine.current_pan
+        self.current_tilt = self.engine.current_tilt
         
         # Angajman mod verileri
         self.qr_zone = None  # "A" veya "B"
         self.target_balloons = []  # [(renk, şekil), ...]
-        self.safe_zone_angle = (150, 210)  # Orta güvenli bölge (örnek: 150-210°)
-        
-        # İmha sayacı
-        self.kill_count = 0
         
         # Ekran kaydı thread'i
         self.screen_recorder = ScreenRecorderThread()
@@ -138,6 +145,15 @@ class MainWindow(QMainWindow):
         
         self.init_ui()
         
+        # Görev kaydına kare başına tespit/iz/taret kaydı (video kare numarasıyla)
+        self.camera_widget.add_record_listener(self.record_video_frame)
+        
+        # Görev kaydı oynatıcı (video, hedef grafiği ve mini harita birlikte)
+        self.replay_player = ReplayPlayer(self.replay_manager, self.camera_widget,
+                                          self.target_graph, self.mini_map)
+        self.replay_player.finished.connect(self.replay_finished)
+        self.replay_player.event_replayed.connect(self.handle_replayed_event)
+        
         # Log timer
         self.log_timer = QTimer()
         self.log_timer.timeout.connect(self.update_logs)
@@ -646,6 +662,26 @@ class MainWindow(QMainWindow):
         self.video_rec_btn.clicked.connect(self.toggle_video_recording)
         layout.addWidget(self.video_rec_btn)
         
+        # === GÖREV KAYDI ===
+        self.replay_rec_btn = QPushButton("📹 GÖREV")
+        self.replay_rec_btn.setCheckable(True)
+        self.replay_rec_btn.setStyleSheet(styles.BUTTON_STYLE + btn_style)
+        self.replay_rec_btn.clicked.connect(self.toggle_replay_recording)
+        layout.addWidget(self.replay_rec_btn)
+        
+        self.replay_play_btn = QPushButton("▶ OYNAT")
+        self.replay_play_btn.setCheckable(True)
+        self.replay_play_btn.setStyleSheet(styles.BUTTON_STYLE + btn_style)
+        self.replay_play_btn.clicked.connect(self.toggle_replay_playback)
+        layout.addWidget(self.replay_play_btn)
+        
+        self.replay_speed_combo = QComboBox()
+        for speed in PLAYBACK_SPEEDS:
+            self.replay_speed_combo.addItem(f"{speed:g}x", speed)
+        self.replay_speed_combo.setCurrentIndex(PLAYBACK_SPEEDS.index(1.0))
+        self.replay_speed_combo.currentIndexChanged.connect(self.set_replay_speed)
+        layout.addWidget(self.replay_speed_combo)
+        
         self.sound_btn = QPushButton("🔊")
         self.sound_btn.setCheckable(True)
         self.sound_btn.setChecked(True)
@@ -1045,6 +1081,7 @@ class MainWindow(QMainWindow):
     def update_pan_slider(self, value):
         """Pan slider güncelle"""
         self.current_pan = value
+        self.engine.set_angles(pan=value)
         self.pan_label.setText(f"Pan: {value}°")
         self.target_graph.update_angles(self.current_pan, self.current_tilt)
         self.logger.debug(f"Pan: {value}°")
@@ -1052,37 +1089,48 @@ class MainWindow(QMainWindow):
     def update_tilt_slider(self, value):
         """Tilt slider güncelle"""
         self.current_tilt = value
+        self.engine.set_angles(tilt=value)
         self.tilt_label.setText(f"Tilt: {value}°")
         self.target_graph.update_angles(self.current_pan, self.current_tilt)
         self.logger.debug(f"Tilt: {value}°")
     
     def update_graphs(self):
         """Grafikleri güncelle"""
-        # Simülasyon: Rastgele hedef (gerçek uygulamada YOLO'dan gelecek)
-        import random
-        if self.system_running and (self.semi_auto_mode or self.autonomous_mode):
-            # Simüle edilmiş hedef
-            target_distance = random.uniform(3, 8)
-            target_angle = random.uniform(0, 360)
-            target_pan = random.randint(90, 270)
-            target_tilt = random.randint(20, 40)
+        self.system_status_widget.update_ai_status(self.engine.detector.loaded)
+        if self.replay_mode:
+            # Grafikleri oynatıcı sürüyor
+            return
+        
+        # Kontrol döngüsü tareti sürüyorsa açı göstergeleri onun komutunu izler
+        if self.engine.control_loop.active:
+            self.current_pan = round(self.engine.current_pan, 1)
+            self.current_tilt = round(self.engine.current_tilt, 1)
+            self.pan_label.setText(f"Pan: {self.current_pan}°")
+            self.tilt_label.setText(f"Tilt: {self.current_tilt}°")
+        
+        targets = []
+        if self.engine.tracking:
+            targets = self.engine.targets()
+        
+        if targets:
+            # En yakın hedef birincil hedef
+            target_pan, target_tilt, target_distance = min(targets, key=lambda t: t[2])
             
             # Grafikleri güncelle
-            self.target_graph.update_target(target_distance, target_angle, True)
+            self.target_graph.update_target(target_distance, target_pan, True)
             self.target_graph.update_angles(self.current_pan, self.current_tilt, 
-                                          target_pan, target_tilt)
+                                          int(round(target_pan)), int(round(target_tilt)))
             
-            # Mini map'e hedef ekle (her 2 saniyede bir)
-            if random.random() < 0.05:  # %5 şans
-                self.mini_map.clear_targets()
-                target_type = "enemy" if random.random() > 0.3 else "friend"
-                self.mini_map.add_target(target_angle, target_distance, target_type)
+            # Mini map'te tüm izlenen hedefler
+            self.mini_map.clear_targets()
+            for pan, _, distance in targets:
+                self.mini_map.add_target(pan, distance, "enemy")
             
             # Hedef bilgilerini göster
             self.target_type_label.setText(f"🔴 DÜŞMAN")
             self.target_type_label.setStyleSheet(f"color: {styles.COLOR_DANGER}; font-size: 11px;")
             self.target_distance_label.setText(f"📏 {target_distance:.1f}m")
-            self.target_angle_label.setText(f"📐 {target_angle:.0f}°")
+            self.target_angle_label.setText(f"📐 {target_pan:.0f}°")
         else:
             # Hedef yok
             self.target_graph.update_target(0, 0, False)
@@ -1090,6 +1138,49 @@ class MainWindow(QMainWindow):
             self.target_type_label.setText("⚪ YOK")
             self.target_type_label.setStyleSheet(f"color: {styles.COLOR_TEXT}; font-size: 11px;")
     
+    def handle_engine_event(self, event, data):
+        """Motor olaylarını göstergelere ve loga yansıt (GUI thread'inde)"""
+        if event == "esp32":
+            self.update_esp32_status(data)
+        elif event == "error":
+            self.logger.error(f"❌ {data}")
+        elif event == "detection_stats":
+            if "inference" in data:
+                self.logger.info(
+                    f"🧠 Çıkarım: ort {data['inference']['mean']:.1f} ms, "
+                    f"p95 {data['inference']['p95']:.1f} ms, "
+                    f"işlenen {data['frames']['processed']}, atlanan {data['frames']['skipped']}"
+                )
+            if "classify" in data:
+                self.logger.info(f"🎈 Renk/şekil sınıflandırma: ort {data['classify']['mean']:.2f} ms/kare")
+        elif event == "esp32_stats":
+            if "command_setpoint" in data:
+                channel = data["channel"]
+                self.logger.info(
+                    f"🔌 ESP32 komutları: gönderilen {channel['sent']}, birleştirilen {channel['coalesced']}, "
+                    f"düşen {channel['dropped']}, gecikme p95 {data['command_setpoint']['p95']:.1f} ms"
+                )
+        elif event == "black_box":
+            self.logger.info(f"💾 Kara kutu kaydı: {data}")
+    
+    def update_esp32_status(self, connected):
+        """ESP32 bağlantı göstergelerini güncelle (bağlantı durumu değişince)"""
+        self.system_status_widget.update_esp32_status(connected)
+        if connected:
+            self.esp_status.setText("🔌 BAĞLI")
+            self.esp_status.setStyleSheet(f"color: {styles.COLOR_SUCCESS}; font-size: 11px;")
+            self.logger.info("🔌 ESP32 bağlandı")
+        else:
+            self.esp_status.setText("🔌 YOK")
+            self.esp_status.setStyleSheet(f"color: {styles.COLOR_WARNING}; font-size: 11px;")
+            self.logger.warning("🔌 ESP32 bağlantısı yok")
+    
+    def forward_detections(self, result):
+        """Tespit sonucunu ekran thread'ine ilet (tespit worker'ından çağrılır)"""
+        camera_thread = self.camera_widget.camera_thread
+        if camera_thread is not None:
+            camera_thread.set_detections(result)
+    
     def toggle_manual_mode(self):
         """Manuel moda geç"""
         if not self.manual_btn.isChecked():
@@ -1112,6 +1203,7 @@ class MainWindow(QMainWindow):
         self.tilt_slider.setEnabled(True)
         self.fire_btn.setVisible(True)
         
+        self.engine.set_mode("manual")
         self.logger.info("🎮 MANUEL MOD Aktif")
     
     def toggle_semi_auto_mode(self):
@@ -1136,6 +1228,7 @@ class MainWindow(QMainWindow):
         self.tilt_slider.setEnabled(False)
         self.fire_btn.setVisible(True)
         
+        self.engine.set_mode("semi_auto")
         self.logger.info("🎯 YARI OTONOM MOD Aktif - Otomatik takip, manuel ateş")
     
     def toggle_angajman_mode(self):
@@ -1162,6 +1255,7 @@ class MainWindow(QMainWindow):
         self.tilt_slider.setEnabled(False)
         self.fire_btn.setVisible(False)
         
+        self.engine.set_mode("angajman")
         self.logger.info("🎲 ANGAJMAN MOD Aktif")
         self.notification_manager.show_notification("Angajman Mod: QR okuma başladı", "info")
         
@@ -1200,12 +1294,7 @@ class MainWindow(QMainWindow):
                                f"📍 Bölge: {self.qr_zone}\n\n"
                                f"🎈 Hedef Balonlar:\n{balloon_text}\n\n"
                                f"⚠ Orta bölge güvenli - Ateş etme!\n"
-                               f"   Güvenli açı: {self.safe_zone_angle[0]}° - {self.safe_zone_angle[1]}°")
-    
-    def check_safe_zone(self, angle):
-        """Güvenli bölgede mi kontrol et"""
-        start, end = self.safe_zone_angle
-        return start <= angle <= end
+                               f"   Güvenli açı: {self.engine.safe_zone_angle[0]}° - {self.engine.safe_zone_angle[1]}°")
     
     def toggle_auto_mode(self):
         """Otonom moda geç"""
@@ -1229,18 +1318,27 @@ class MainWindow(QMainWindow):
         self.tilt_slider.setEnabled(False)
         self.fire_btn.setVisible(False)
         
+        self.engine.set_mode("autonomous")
         self.logger.info("🤖 OTONOM MOD Aktif - Otomatik takip ve ateş")
     
     def toggle_system(self):
         """Sistemi başlat/durdur"""
         if self.system_btn.isChecked():
-            # Sistem başlat
+            if self.replay_mode:
+                self.replay_play_btn.setChecked(False)
+                self.toggle_replay_playback()
+            # Sistem başlat (kamera açılamazsa buton geri alınır)
+            if not self.engine.start():
+                self.system_btn.setChecked(False)
+                QMessageBox.warning(self, "Kamera", "❌ Kamera açılamadı!")
+                self.sound.play_error()
+                return
             self.system_running = True
             self.system_btn.setText("⏸ DURDUR")
             self.system_btn.setStyleSheet(styles.BUTTON_DANGER_STYLE + """
             QPushButton { padding: 6px 10px; font-size: 10px; min-width: 80px; }
             """)
-            self.camera_widget.start_camera()
+            self.camera_widget.start_camera(self.engine.source)
             
             # FPS sinyalini bağla
             if self.camera_widget.camera_thread:
@@ -1264,6 +1362,7 @@ class MainWindow(QMainWindow):
             QPushButton { padding: 6px 10px; font-size: 10px; min-width: 80px; }
             """)
             self.camera_widget.stop_camera()
+            self.engine.stop()
             self.camera_status.setText("📷 KAPALI")
             self.camera_status.setStyleSheet(f"color: {styles.COLOR_DANGER}; font-size: 11px;")
             self.sound.play_system_stop()
@@ -1275,37 +1374,33 @@ class MainWindow(QMainWindow):
             self.logger.info("⏸ Sistem DURDURULDU")
     
     def fire(self):
-        """Ateş et"""
-        if not self.system_running:
+        """Ateş et (güvenlik kontrolü motorda: angajman güvenli bölgesi, yasak alanlar, tilt sınırları)"""
+        fired, reason, zone = self.engine.fire()
+        if reason == "stopped":
             QMessageBox.warning(self, "Uyarı", "⚠ Sistem çalışmıyor! Önce sistemi başlatın.")
             self.sound.play_error()
             self.logger.warning("❌ Ateş reddedildi: Sistem kapalı")
+        elif reason == "tilt":
+            QMessageBox.warning(self, "Tilt Sınırı", "🚫 Tilt açısı sınır dışında!")
+            self.sound.play_error()
+            self.logger.warning(f"❌ Ateş reddedildi: Tilt sınır dışı ({self.current_tilt}°)")
+        elif reason == "zone" and zone.name == ENGAGEMENT_ZONE:
+            QMessageBox.critical(self, "GÜVENLİ BÖLGE!", 
+                                f"🚫 ORTA BÖLGE GÜVENLİ!\n\n"
+                                f"Mevcut açı: {self.current_pan}°\n"
+                                f"Güvenli bölge: {zone.describe()}\n\n"
+                                f"Bu bölgeye ATEŞ ETMEYİN!")
+            self.sound.play_emergency()
+            self.logger.critical(f"❌❌❌ GÜVENLİ BÖLGEYE ATEŞ GİRİŞİMİ: {self.current_pan}°")
+            self.notification_manager.show_notification("GÜVENLİ BÖLGE İHLALİ!", "error", 3000)
+        elif reason == "zone":
+            QMessageBox.warning(self, "Yasak Alan", "🚫 Bu açıya ateş etmek yasak!")
+            self.sound.play_error()
+            self.logger.warning(f"❌ Ateş reddedildi: {zone.name} ({zone.describe()})")
+        if not fired:
             return
         
-        # Angajman modda güvenli bölge kontrolü
-        if self.angajman_mode:
-            if self.check_safe_zone(self.current_pan):
-                QMessageBox.critical(self, "GÜVENLİ BÖLGE!", 
-                                    f"🚫 ORTA BÖLGE GÜVENLİ!\n\n"
-                                    f"Mevcut açı: {self.current_pan}°\n"
-                                    f"Güvenli bölge: {self.safe_zone_angle[0]}°-{self.safe_zone_angle[1]}°\n\n"
-                                    f"Bu bölgeye ATEŞ ETMEYİN!")
-                self.sound.play_emergency()
-                self.logger.critical(f"❌❌❌ GÜVENLİ BÖLGEYE ATEŞ GİRİŞİMİ: {self.current_pan}°")
-                self.notification_manager.show_notification("GÜVENLİ BÖLGE İHLALİ!", "error", 3000)
-                return
-        
-        # Yasak alan kontrolü
-        if self.no_fire_zone:
-            start, end = self.no_fire_zone
-            if start <= self.current_pan <= end:
-                QMessageBox.warning(self, "Yasak Alan", "🚫 Bu açıya ateş etmek yasak!")
-                self.sound.play_error()
-                self.logger.warning(f"❌ Ateş reddedildi: Yasak alan ({start}°-{end}°)")
-                return
-        
-        self.kill_count += 1
-        self.kill_label.setText(f"💥 {self.kill_count}")
+        self.kill_label.setText(f"💥 {self.engine.kill_count}")
         self.stats_widget.add_fire()
         
         # Performans kaydı
@@ -1327,6 +1422,7 @@ class MainWindow(QMainWindow):
     
     def emergency_stop(self):
         """Acil durdur"""
+        self.engine.emergency_stop()
         self.system_running = False
         self.system_btn.setChecked(False)
         self.system_btn.setText("▶ BAŞLAT")
@@ -1342,6 +1438,8 @@ class MainWindow(QMainWindow):
         if dialog.exec_() == QDialog.Accepted:
             self.no_fire_zone = dialog.get_zone()
             start, end = self.no_fire_zone
+            # Başlangıç > bitiş ise bölge 0°/360° üzerinden sarar (örn. 350°-10°)
+            self.engine.set_no_fire_zone(start, end)
             self.sound.play_success()
             self.logger.info(f"🚫 Yasak alan belirlendi: {start}° - {end}°")
             QMessageBox.information(self, "Yasak Alan", 
@@ -1351,6 +1449,10 @@ class MainWindow(QMainWindow):
         """Video kaydını başlat/durdur"""
         if self.video_rec_btn.isChecked():
             path = self.camera_widget.start_recording()
+            if path is None:
+                self.video_rec_btn.setChecked(False)
+                self.logger.warning("❌ Video kaydı başlatılamadı (kamera kapalı ya da dosya açılamadı)")
+                return
             self.video_rec_btn.setText("⏹ DURDUR")
             self.video_rec_btn.setStyleSheet(styles.BUTTON_DANGER_STYLE + """
             QPushButton { padding: 6px 10px; font-size: 10px; min-width: 80px; }
@@ -1370,6 +1472,10 @@ class MainWindow(QMainWindow):
         """Ekran kaydını başlat/durdur"""
         if self.screen_rec_btn.isChecked():
             path = self.screen_recorder.start_recording()
+            if path is None:
+                self.screen_rec_btn.setChecked(False)
+                self.logger.warning("❌ Ekran kaydı başlatılamadı")
+                return
             self.screen_rec_btn.setText("⏹ DURDUR")
             self.screen_rec_btn.setStyleSheet(styles.BUTTON_DANGER_STYLE + """
             QPushButton { padding: 6px 10px; font-size: 10px; min-width: 80px; }
@@ -1484,6 +1590,82 @@ class MainWindow(QMainWindow):
         # Gerçek uygulamada tüm widget'lerin stilini güncellemeniz gerekir
         self.logger.info(f"🎨 Tema uygulandı: {theme_name}")
     
+    def replay_state(self):
+        """Görev kaydı anahtar karesi: mod, taret açıları ve imha sayısı"""
+        return {
+            "mode": self.engine.mode,
+            "pan": self.engine.current_pan,
+            "tilt": self.engine.current_tilt,
+            "kill_count": self.engine.kill_count
+        }
+    
+    def record_video_frame(self, video_path, video_frame, frame_id, timestamp, result):
+        """Kaydedilen video karesinin tespit, iz ve taret kaydı (kamera thread'inden)"""
+        if not self.replay_manager.recording:
+            return
+        engine = self.engine
+        shape = engine.frame_shape()
+        self.replay_manager.record_frame(video_path, video_frame, {
+            "frame_id": frame_id,
+            "detection_frame_id": result.frame_id if result is not None else None,
+            "detections": detection_boxes(result),
+            "tracks": [{"id": track["id"], "box": track["box"]} for track in engine.tracker.get_tracks()],
+            "targets": engine.targets() if engine.tracking else [],
+            "pan": engine.current_pan,
+            "tilt": engine.current_tilt,
+            "mode": engine.mode,
+            "frame_size": [shape[1], shape[0]] if shape is not None else None
+        })
+    
+    def toggle_replay_playback(self):
+        """Görev kaydını oynat/durdur (sistem çalışırken oynatılamaz)"""
+        if self.replay_play_btn.isChecked():
+            if self.system_running:
+                self.replay_play_btn.setChecked(False)
+                QMessageBox.warning(self, "Replay", "Oynatmak için önce sistemi durdurun")
+                return
+            filepath, _ = QFileDialog.getOpenFileName(
+                self, "Görev Kaydı Aç", self.replay_manager.folder, "Görev Kaydı (*.replay *.json)"
+            )
+            if not filepath or not self.replay_player.open(filepath):
+                self.replay_play_btn.setChecked(False)
+                return
+            self.replay_mode = True
+            self.replay_player.set_speed(self.replay_speed_combo.currentData())
+            self.replay_player.play()
+            self.replay_play_btn.setText("⏹ OYNATMA")
+            self.replay_play_btn.setStyleSheet(styles.BUTTON_DANGER_STYLE + """
+            QPushButton { padding: 6px 10px; font-size: 10px; min-width: 80px; }
+            """)
+            self.logger.info(f"▶ Görev kaydı oynatılıyor: {filepath}")
+        else:
+            self.replay_player.stop()
+            self.replay_mode = False
+            self.replay_play_btn.setText("▶ OYNAT")
+            self.replay_play_btn.setStyleSheet(styles.BUTTON_STYLE + """
+            QPushButton { padding: 6px 10px; font-size: 10px; min-width: 80px; }
+            """)
+            self.camera_widget.setText("📷 KAMERA BEKLENIYOR...")
+            self.logger.info("⏹ Görev kaydı oynatma durduruldu")
+    
+    def set_replay_speed(self, index):
+        """Oynatma hızı seçimi"""
+        self.replay_player.set_speed(self.replay_speed_combo.itemData(index))
+    
+    def replay_finished(self):
+        """Kayıt sonuna gelindi"""
+        stats = self.replay_player.get_stats()
+        self.logger.info(f"⏹ Görev kaydı sonu: gösterilen kare {stats['frames']['shown']}, "
+                         f"eksik {stats['frames']['missing']}")
+        self.replay_play_btn.setChecked(False)
+        self.toggle_replay_playback()
+    
+    def handle_replayed_event(self, event):
+        """Kayıttaki olayları loga yansıt"""
+        if event["type"] == "fire":
+            data = event["data"]
+            self.logger.info(f"🔥 [REPLAY {event['timestamp']:.1f}s] ATEŞ (Pan: {data['pan']}°, Tilt: {data['tilt']}°)")
+    
     def toggle_replay_recording(self):
         """Görev kaydını başlat/durdur"""
         if self.replay_rec_btn.isChecked():
@@ -1551,7 +1733,9 @@ class MainWindow(QMainWindow):
     
     def closeEvent(self, event):
         """Pencere kapatılırken"""
+        self.replay_player.stop()
         self.camera_widget.stop_camera()
+        self.engine.shutdown()
         self.screen_recorder.stop()
         self.screen_recorder.wait()
         self.logger.info("❌ Uygulama kapatıldı")
@@ -1,26 +1,90 @@
 import cv2
+import numpy as np
 import time
 from datetime import datetime
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtGui import QImage, QPainter
 from PyQt5.QtWidgets import QLabel
-import os
+
+from utils.frame_buffer import BufferPool
+from utils.perf_stats import LatencyTracker
+from utils.video_encoder import VideoEncoder
+
+
+def detection_boxes(result):
+    """Tespit sonucunu [(x1, y1, x2, y2, skor, etiket), ...] listesine çevir (ekran ve görev kaydı)"""
+    if result is None:
+        return []
+    boxes = []
+    attributes = result.attributes or [None] * len(result.boxes)
+    for box, score, class_id, attribute in zip(result.boxes, result.scores,
+                                               result.class_ids, attributes):
+        label = result.labels.get(int(class_id), str(int(class_id)))
+        if attribute is not None:
+            label = f"{attribute['color']} {attribute['shape']}"
+        x1, y1, x2, y2 = box
+        boxes.append((float(x1), float(y1), float(x2), float(y2), float(score), label))
+    return boxes
+
+
+def draw_boxes(frame, boxes, scale_x, scale_y):
+    """Etiketli kutuları ekran ölçeğinde çizer"""
+    color = (0, 51, 255)  # Kırmızı
+    for x1, y1, x2, y2, score, label in boxes:
+        p1 = (int(x1 * scale_x), int(y1 * scale_y))
+        p2 = (int(x2 * scale_x), int(y2 * scale_y))
+        cv2.rectangle(frame, p1, p2, color, 2)
+        cv2.putText(frame, f"{label} {score:.2f}", (p1[0], max(15, p1[1] - 5)),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+
+
+def draw_crosshair(frame):
+    """Nişangah çizer"""
+    h, w = frame.shape[:2]
+    center_x, center_y = w // 2, h // 2
+    
+    color = (0, 255, 136)  # Yeşil
+    thickness = 2
+    size = 30
+    
+    # Merkez artı
+    cv2.line(frame, (center_x - size, center_y), (center_x + size, center_y), color, thickness)
+    cv2.line(frame, (center_x, center_y - size), (center_x, center_y + size), color, thickness)
+    
+    # Daire
+    cv2.circle(frame, (center_x, center_y), size + 10, color, thickness)
+    
+    return frame
 
 
 class CameraThread(QThread):
-    """Kamera görüntüsü yakalama thread'i"""
-    frame_ready = pyqtSignal(object)  # QImage nesnesi gönderir
+    """Yakalama kaynağının halkasından ekran karelerini hazırlayan thread"""
+    frame_ready = pyqtSignal(object)  # Havuzdan PooledBuffer (QImage bağlı) gönderir
     fps_updated = pyqtSignal(int)     # FPS değeri gönderir
     
-    def __init__(self, camera_index=0, width=1280, height=720, fps=30):
+    def __init__(self, frame_source, display_buffers=3, display_interpolation=cv2.INTER_AREA):
         super().__init__()
-        self.camera_index = camera_index
-        self.width = width
-        self.height = height
-        self.target_fps = fps
+        # Yakalama motora aittir (core.capture.FrameSource); bu thread sadece okur
+        self.frame_source = frame_source
         self.running = False
         self.recording = False
-        self.video_writer = None
+        self.encoder = None  # VideoEncoder: kayıt kodlaması ayrı worker'da
+        # Kaydedilen her kare için callback(kayıt yolu, video kare no, kare no, zaman, tespit sonucu)
+        self.record_listeners = []
+        
+        # Ekran tamponları: widget bırakana kadar sahibi widget'tır
+        self.display_pool = BufferPool(display_buffers)
+        self.display_size = None  # (genişlik, yükseklik); None = kamera çözünürlüğü
+        self.display_interpolation = display_interpolation
+        
+        # Dedektörden gelen son sonuç (ekran üstüne çizilir)
+        self.detections = None
+        self.frames_emitted = 0
+        self.display_dropped = 0
+        
+        # Aşama gecikmeleri ve atlanan kareler
+        self.latency = LatencyTracker()
+        self.dropped_frames = 0
         
         # FPS hesaplama
         self.fps_counter = 0
@@ -28,32 +92,69 @@ class CameraThread(QThread):
         self.current_fps = 0
         
     def run(self):
-        """Thread'in ana döngüsü"""
+        """Thread'in ana döngüsü (ekran/kayıt işleme); yakalama kaynağın thread'inde yapılır"""
         self.running = True
-        cap = cv2.VideoCapture(self.camera_index)
-        
-        if not cap.isOpened():
-            print("❌ Kamera açılamadı!")
-            return
-        
-        # Kamera ayarları
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
-        cap.set(cv2.CAP_PROP_FPS, self.target_fps)
-        
-        print(f"✅ Kamera açıldı: {self.width}x{self.height} @ {self.target_fps} FPS")
+        frame_buffer = self.frame_source.frame_buffer
         
+        last_id = -1
         while self.running:
-            ret, frame = cap.read()
-            if not ret:
+            # En yeni kareyi al, arada kalan eski kareleri atla
+            ref = frame_buffer.acquire_latest(last_id, timeout=0.5)
+            if ref is None:
+                if frame_buffer.closed:
+                    # Kaynak durduruldu (sistem durdurma/acil durdurma)
+                    break
                 continue
             
-            # Video kaydı
-            if self.recording and self.video_writer is not None:
-                self.video_writer.write(frame)
+            if last_id >= 0:
+                self.dropped_frames += ref.frame_id - last_id - 1
+            last_id = ref.frame_id
+            
+            process_start = time.perf_counter()
+            self.latency.record("queue", (process_start - ref.timestamp) * 1000.0)
+            
+            try:
+                # Video kaydı (ham kare)
+                encoder = self.encoder
+                if self.recording and encoder is not None:
+                    record_start = time.perf_counter()
+                    video_frame = encoder.write(ref.frame)
+                    if video_frame is not None:
+                        for callback in self.record_listeners:
+                            try:
+                                callback(encoder.output_path, video_frame, ref.frame_id, ref.timestamp,
+                                         self.detections)
+                            except Exception as e:
+                                print(f"❌ Kare kayıt dinleyici hatası: {e}")
+                    self.latency.record_since("record", record_start)
+                
+                # Çizimler paylaşılan slotu bozmasın: havuzdaki ekran tamponuna
+                # widget boyutunda yaz (GUI thread'i ölçekleme yapmaz)
+                frame_h, frame_w = ref.frame.shape[:2]
+                display_w, display_h = self.display_size or (frame_w, frame_h)
+                display = self.display_pool.acquire((display_h, display_w, ref.frame.shape[2]))
+                if display is None:
+                    # GUI önceki kareleri henüz bırakmadı, bu kareyi gösterme
+                    self.display_dropped += 1
+                    continue
+                
+                if (display_w, display_h) == (frame_w, frame_h):
+                    np.copyto(display.array, ref.frame)
+                else:
+                    resize_start = time.perf_counter()
+                    downscale = display_w * display_h < frame_w * frame_h
+                    interpolation = self.display_interpolation if downscale else cv2.INTER_LINEAR
+                    cv2.resize(ref.frame, (display_w, display_h), dst=display.array,
+                               interpolation=interpolation)
+                    self.latency.record_since("resize", resize_start)
+            finally:
+                ref.release()
+            
+            frame = display.array
             
-            # Nişangah çiz
-            frame = self.draw_crosshair(frame)
+            # Nişangah ve tespit kutuları
+            self.draw_crosshair(frame)
+            self.draw_detections(frame, display_w / frame_w, display_h / frame_h)
             
             # FPS hesapla ve göster
             self.calculate_fps()
@@ -63,46 +164,69 @@ class CameraThread(QThread):
             
             # Kayıt göstergesi
             if self.recording:
-                cv2.circle(frame, (self.width - 30, 30), 10, (0, 0, 255), -1)
+                cv2.circle(frame, (display_w - 30, 30), 10, (0, 0, 255), -1)
                 cv2.putText(frame, "REC", 
-                           (self.width - 70, 35), cv2.FONT_HERSHEY_SIMPLEX, 
+                           (display_w - 70, 35), cv2.FONT_HERSHEY_SIMPLEX, 
                            0.6, (0, 0, 255), 2)
             
-            # Frame'i QImage'e çevir
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = rgb_frame.shape
-            bytes_per_line = ch * w
-            qt_image = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
+            # QImage tamponu doğrudan BGR olarak sarar (renk dönüşümü ve kopya yok)
+            if display.image is None:
+                h, w, ch = frame.shape
+                display.image = QImage(frame.data, w, h, frame.strides[0], QImage.Format_BGR888)
+            display.frame_id = ref.frame_id
+            display.timestamp = ref.timestamp
             
-            # Signal gönder
-            self.frame_ready.emit(qt_image)
+            # Signal gönder (sahiplik widget'a geçer)
+            self.frames_emitted += 1
+            self.frame_ready.emit(display)
             
-            # FPS sınırlama
-            time.sleep(1.0 / self.target_fps)
+            self.latency.record_since("process", process_start)
+            self.latency.record("capture_to_emit", (time.perf_counter() - ref.timestamp) * 1000.0)
         
         # Temizlik
-        if self.video_writer is not None:
-            self.video_writer.release()
-        cap.release()
-        print("🔴 Kamera kapatıldı")
+        self.stop_recording()
+    
+    def set_display_size(self, width, height):
+        """Ekran karelerinin hedef boyutunu ayarla (widget yeniden boyutlanınca çağrılır)"""
+        if width > 0 and height > 0:
+            self.display_size = (int(width), int(height))
+    
+    def get_latency_stats(self):
+        """Aşama gecikmeleri (ms) ve kare sayaçları"""
+        stats = self.latency.get_stats()
+        source_stats = self.frame_source.get_stats()
+        if "grab" in source_stats:
+            stats["grab"] = source_stats["grab"]
+        stats["frames"] = {
+            "captured": source_stats["frames"]["captured"],
+            "dropped": self.dropped_frames,
+            "overruns": source_stats["frames"]["overruns"]
+        }
+        encoder = self.encoder
+        if encoder is not None:
+            encoder_stats = encoder.get_stats()
+            stats["recording"] = encoder_stats["encoder"]
+            if "encode" in encoder_stats:
+                stats["encode"] = encoder_stats["encode"]
+        pool_stats = self.display_pool.get_stats()
+        stats["display"] = {
+            "emitted": self.frames_emitted,
+            "dropped": self.display_dropped,
+            "buffer_allocations": pool_stats["allocations"]
+        }
+        return stats
     
     def draw_crosshair(self, frame):
         """Nişangah çizer"""
-        h, w = frame.shape[:2]
-        center_x, center_y = w // 2, h // 2
-        
-        color = (0, 255, 136)  # Yeşil
-        thickness = 2
-        size = 30
-        
-        # Merkez artı
-        cv2.line(frame, (center_x - size, center_y), (center_x + size, center_y), color, thickness)
-        cv2.line(frame, (center_x, center_y - size), (center_x, center_y + size), color, thickness)
-        
-        # Daire
-        cv2.circle(frame, (center_x, center_y), size + 10, color, thickness)
-        
-        return frame
+        return draw_crosshair(frame)
+    
+    def draw_detections(self, frame, scale_x, scale_y):
+        """Son tespit kutularını ekran ölçeğinde çizer"""
+        draw_boxes(frame, detection_boxes(self.detections), scale_x, scale_y)
+    
+    def set_detections(self, result):
+        """Dedektör worker'ından son sonucu al (herhangi bir thread'den çağrılabilir)"""
+        self.detections = result
     
     def calculate_fps(self):
         """FPS hesapla"""
@@ -115,23 +239,35 @@ class CameraThread(QThread):
             self.fps_updated.emit(self.current_fps)
     
     def start_recording(self, output_path):
-        """Video kaydını başlat"""
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        self.video_writer = cv2.VideoWriter(
-            output_path, fourcc, self.target_fps, 
-            (self.width, self.height)
-        )
+        """
+        Video kaydını başlat (kareler kodlayıcı kuyruğuna kopyalanır).
+        Dönüş: kaydın adresi (parçalı kayıtta indeks dosyası) ya da başlatılamazsa None.
+        """
+        shape = self.frame_source.shape
+        if shape is not None:
+            size = (shape[1], shape[0])
+        else:
+            size = (self.frame_source.width, self.frame_source.height)
+        encoder = VideoEncoder.from_settings(output_path, self.frame_source.fps, size)
+        if not encoder.start():
+            return None
+        self.encoder = encoder
         self.recording = True
-        print(f"🔴 Video kaydı başladı: {output_path}")
+        print(f"🔴 Video kaydı başladı: {encoder.output_path} ({encoder.backend}, kuyruk {encoder.queue_size}, "
+              f"{encoder.policy})")
+        return encoder.output_path
     
     def stop_recording(self):
-        """Video kaydını durdur"""
-        if self.video_writer is not None:
-            self.video_writer.release()
-            self.video_writer = None
+        """Video kaydını durdur (kuyrukta kalan kareler yazılır)"""
+        encoder = self.encoder
+        if encoder is None:
+            return
         self.recording = False
-        print("⏹ Video kaydı durduruldu")
+        self.encoder = None
+        encoder.stop()
+        stats = encoder.get_stats()["encoder"]
+        print(f"⏹ Video kaydı durduruldu: yazılan {stats['written']}, düşen {stats['dropped']}, "
+              f"bekleyen {stats['blocked']}, parça {stats['segments']}")
     
     def stop(self):
         """Thread'i durdur"""
@@ -145,11 +281,16 @@ class CameraWidget(QLabel):
     def __init__(self, width=1600, height=700):
         super().__init__()
         self.setFixedSize(width, height)
-        self.setScaledContents(True)
         self.setAlignment(Qt.AlignCenter)
         
         # Thread
         self.camera_thread = None
+        self.record_listeners = []  # Yeniden başlatmalarda korunur (CameraThread.record_listeners)
+        
+        # Şu an gösterilen havuz tamponu (bir sonraki kare gelince bırakılır)
+        self.current_frame = None
+        self.frames_painted = 0
+        self.paint_latency = LatencyTracker()
         
         # Başlangıç görüntüsü
         self.setText("📷 KAMERA BEKLENIYOR...")
@@ -164,35 +305,82 @@ class CameraWidget(QLabel):
             }
         """)
     
-    def start_camera(self, camera_index=0):
-        """Kamerayı başlat"""
+    def start_camera(self, frame_source):
+        """Yakalama kaynağının görüntüsünü göstermeye başla"""
         if self.camera_thread is not None:
             self.stop_camera()
         
-        self.camera_thread = CameraThread(camera_index)
+        self.camera_thread = CameraThread(frame_source)
+        self.camera_thread.record_listeners = list(self.record_listeners)
+        self.camera_thread.set_display_size(self.contentsRect().width(),
+                                            self.contentsRect().height())
         self.camera_thread.frame_ready.connect(self.update_frame)
         self.camera_thread.start()
     
+    def add_record_listener(self, callback):
+        """Kaydedilen her video karesinde callback (kamera thread'inden çağrılır)"""
+        self.record_listeners.append(callback)
+        if self.camera_thread is not None:
+            self.camera_thread.record_listeners.append(callback)
+    
     def stop_camera(self):
         """Kamerayı durdur"""
         if self.camera_thread is not None:
             self.camera_thread.stop()
             self.camera_thread.wait()
             self.camera_thread = None
+        self.release_current_frame()
         self.setText("📷 KAMERA DURDURULDU")
     
-    def update_frame(self, qt_image):
-        """Frame güncelle"""
-        pixmap = QPixmap.fromImage(qt_image)
-        self.setPixmap(pixmap)
+    def update_frame(self, display):
+        """Frame güncelle (QPixmap oluşturmadan, havuz tamponu doğrudan çizilir)"""
+        previous = self.current_frame
+        self.current_frame = display
+        if previous is not None:
+            previous.release()
+        if self.text():
+            self.clear()
+        self.update()
+    
+    def release_current_frame(self):
+        """Gösterilen tamponu havuza geri ver"""
+        if self.current_frame is not None:
+            self.current_frame.release()
+            self.current_frame = None
+        self.update()
+    
+    def paintEvent(self, event):
+        """Son kareyi çiz; kare yoksa QLabel metnini göster"""
+        super().paintEvent(event)
+        if self.current_frame is None:
+            return
+        
+        paint_start = time.perf_counter()
+        painter = QPainter(self)
+        target = self.contentsRect()
+        image = self.current_frame.image
+        if image.width() == target.width() and image.height() == target.height():
+            # Kare zaten widget boyutunda: sadece kopyala
+            painter.drawImage(target.topLeft(), image)
+        else:
+            # Yeniden boyutlanma sırasında gelen eski boyutlu kareler
+            painter.drawImage(target, image)
+        painter.end()
+        self.frames_painted += 1
+        self.paint_latency.record_since("paint", paint_start)
+    
+    def resizeEvent(self, event):
+        """Yeni boyutu kamera thread'ine bildir"""
+        super().resizeEvent(event)
+        if self.camera_thread is not None:
+            self.camera_thread.set_display_size(self.contentsRect().width(),
+                                                self.contentsRect().height())
     
     def start_recording(self):
         """Video kaydını başlat"""
         if self.camera_thread is not None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            output_path = f"recordings/video_{timestamp}.mp4"
-            self.camera_thread.start_recording(output_path)
-            return output_path
+            return self.camera_thread.start_recording(f"recordings/video_{timestamp}.mp4")
         return None
     
     def stop_recording(self):
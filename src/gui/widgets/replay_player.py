@@ -0,0 +1,197 @@
+import cv2
+import numpy as np
+import time
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+from PyQt5.QtGui import QImage
+
+from gui.widgets.camera_widget import draw_boxes, draw_crosshair
+from utils.frame_buffer import BufferPool
+from utils.perf_stats import LatencyTracker
+from utils.video_reader import RecordingReader
+
+
+class ReplayPlayer(QObject):
+    """
+    Görev kaydı oynatıcı. Kayıttaki kare kayıtları video kaydıyla aynı kare numarasını
+    taşır; her tikte oynatma saatine kadar geçilen en yeni kare kaydı çözülür, o video
+    karesi okunup CameraWidget'a, hedef/açı bilgisi TargetGraphWidget ve MiniMapWidget'a
+    verilir. Aradaki kare kayıtları ve video kareleri hiç çözülmez.
+    """
+    event_replayed = pyqtSignal(dict)  # Kayıttaki olaylar (ateş, mod vb.)
+    finished = pyqtSignal()
+
+    def __init__(self, replay_manager, camera_widget, target_graph, mini_map, interval_ms=33,
+                 display_buffers=3):
+        super().__init__()
+        self.replay_manager = replay_manager
+        self.camera_widget = camera_widget
+        self.target_graph = target_graph
+        self.mini_map = mini_map
+        self.interval_ms = interval_ms
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.tick)
+
+        self.video = None
+        self.video_path = None
+        self.display_pool = BufferPool(display_buffers)
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.frames_shown = 0
+        self.frames_missing = 0    # Videoda bulunamayan kareler
+
+    @property
+    def playing(self):
+        return self.timer.isActive()
+
+    def open(self, path):
+        """Görev kaydını aç (açılamazsa False)"""
+        self.stop()
+        if not self.replay_manager.load_replay(path):
+            return False
+        self.replay_manager.reset_replay()
+        return True
+
+    def play(self):
+        """Oynatmayı başlat/sürdür"""
+        self.replay_manager.play()
+        self.timer.start(self.interval_ms)
+
+    def pause(self):
+        """Duraklat"""
+        self.replay_manager.pause()
+        self.timer.stop()
+
+    def stop(self):
+        """Oynatmayı bitir, videoyu kapat, ekranı bırak"""
+        self.pause()
+        self.close_video()
+        self.camera_widget.release_current_frame()
+
+    def seek(self, t):
+        """t saniyesine git: anahtar kare durumu uygulanır, o andaki kare gösterilir"""
+        state, events = self.replay_manager.seek(t)
+        if state is not None:
+            self.apply_state(state)
+        for event in events:
+            self.handle_event(event)
+        self.show_latest()
+
+    def set_speed(self, speed):
+        """Oynatma hızı (0.25x - 16x)"""
+        self.replay_manager.set_speed(speed)
+
+    def tick(self):
+        """Zamanlayıcı: oynatma saatine kadarki olaylar ve en yeni kare"""
+        for event in self.replay_manager.poll() or []:
+            self.handle_event(event)
+        self.show_latest()
+
+        if (self.replay_manager.is_replay_finished()
+                or self.replay_manager.playback_time() >= self.replay_manager.get_replay_duration()):
+            self.pause()
+            self.finished.emit()
+
+    def handle_event(self, event):
+        """Kayıttaki olayı işle (video değişimi burada, diğerleri sinyalle)"""
+        if event["type"] == "video":
+            self.open_video(event["data"]["path"])
+        self.event_replayed.emit(event)
+
+    def apply_state(self, state):
+        """Anahtar kare durumu: video ve taret açıları"""
+        if state.get("video"):
+            self.open_video(state["video"])
+        self.target_graph.update_angles(state["pan"], state["tilt"])
+
+    def open_video(self, path):
+        """Kare kayıtlarının ait olduğu video kaydını aç"""
+        if path == self.video_path:
+            return
+        self.close_video()
+        self.video_path = path
+        try:
+            self.video = RecordingReader(path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"❌ Video kaydı açılamadı ({path}): {e}")
+
+    def close_video(self):
+        if self.video is not None:
+            self.video.close()
+            self.video = None
+        self.video_path = None
+
+    def show_latest(self):
+        """Oynatma saatine kadar geçilen en yeni kare kaydını göster"""
+        record = self.replay_manager.take_frame()
+        if record is None:
+            return
+        show_start = time.perf_counter()
+        data = record["data"]
+        self.show_targets(data)
+        self.show_video_frame(data, record["timestamp"])
+        self.latency.record_since("show", show_start)
+
+    def show_targets(self, data):
+        """Hedef grafiği ve mini haritayı kare kaydından güncelle"""
+        pan, tilt = data["pan"], data["tilt"]
+        targets = data["targets"]
+        self.mini_map.clear_targets()
+        if targets:
+            # En yakın hedef birincil hedef
+            target_pan, target_tilt, target_distance = min(targets, key=lambda t: t[2])
+            self.target_graph.update_target(target_distance, target_pan, True)
+            self.target_graph.update_angles(round(pan, 1), round(tilt, 1),
+                                            int(round(target_pan)), int(round(target_tilt)))
+            for target_pan, _, distance in targets:
+                self.mini_map.add_target(target_pan, distance, "enemy")
+        else:
+            self.target_graph.update_target(0, 0, False)
+            self.target_graph.update_angles(round(pan, 1), round(tilt, 1))
+
+    def show_video_frame(self, data, timestamp):
+        """Kaydın video karesini çöz, kutuları çiz ve CameraWidget'a ver"""
+        if self.video is None:
+            return
+        frame = self.video.read(data["video_frame"])
+        if frame is None:
+            self.frames_missing += 1
+            return
+
+        target = self.camera_widget.contentsRect()
+        frame_h, frame_w = frame.shape[:2]
+        display_w, display_h = target.width(), target.height()
+        if display_w <= 0 or display_h <= 0:
+            display_w, display_h = frame_w, frame_h
+        display = self.display_pool.acquire((display_h, display_w, frame.shape[2]))
+        if display is None:
+            # Widget önceki kareleri henüz bırakmadı
+            return
+        if (display_w, display_h) == (frame_w, frame_h):
+            np.copyto(display.array, frame)
+        else:
+            cv2.resize(frame, (display_w, display_h), dst=display.array, interpolation=cv2.INTER_AREA)
+
+        image = display.array
+        draw_crosshair(image)
+        draw_boxes(image, data["detections"], display_w / frame_w, display_h / frame_h)
+        cv2.putText(image, f"REPLAY {timestamp:.1f}s / {self.replay_manager.get_replay_duration():.1f}s "
+                           f"x{self.replay_manager.speed:g}",
+                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 200, 255), 2)
+
+        if display.image is None:
+            h, w, _ = image.shape
+            display.image = QImage(image.data, w, h, image.strides[0], QImage.Format_BGR888)
+        display.frame_id = data["frame_id"]
+        display.timestamp = timestamp
+        self.frames_shown += 1
+        self.camera_widget.update_frame(display)
+
+    def get_stats(self):
+        """Gösterim süresi, gösterilen kareler ve video okuma sayaçları"""
+        stats = self.latency.get_stats()
+        stats["frames"] = {"shown": self.frames_shown, "missing": self.frames_missing}
+        if self.video is not None:
+            stats.update(self.video.get_stats())
+        return stats
@@ -1,24 +1,25 @@
+import argparse
 import sys
 import time
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtCore import QTimer
-from gui.main_window import MainWindow
-from gui.splash_screen import SplashScreen
 
 
 def main():
     """Ana uygulama"""
+    from PyQt5.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+    from gui.splash_screen import SplashScreen
+
     app = QApplication(sys.argv)
-    
+
     # Uygulama bilgileri
     app.setApplicationName("TUNA HSS")
     app.setOrganizationName("TUNA Team")
-    
+
     # Splash screen göster
     splash = SplashScreen()
     splash.show()
     app.processEvents()
-    
+
     # Yükleme simülasyonu
     loading_steps = [
         (20, "Modüller yükleniyor..."),
@@ -27,21 +28,68 @@ def main():
         (80, "Sistem kontrolleri yapılıyor..."),
         (100, "Hazırlanıyor...")
     ]
-    
+
     for progress, status in loading_steps:
         splash.set_progress(progress, status)
         app.processEvents()
         time.sleep(0.3)  # Simülasyon gecikmesi
-    
+
     # Ana pencere
     window = MainWindow()
-    
+
     # Splash'i kapat ve ana pencereyi göster
     splash.finish_loading(window)
     window.show()
-    
+
     sys.exit(app.exec_())
 
 
+def print_engine_event(event, data):
+    """Headless modda motor olaylarını konsola yaz"""
+    if event == "esp32":
+        print("🔌 ESP32 bağlandı" if data else "🔌 ESP32 bağlantısı yok")
+    elif event == "error":
+        print(f"❌ {data}")
+    elif event == "mode":
+        print(f"🎮 Mod: {data}")
+    elif event == "fire":
+        print(f"🔥 ATEŞ (Pan: {data['pan']:.1f}°, Tilt: {data['tilt']:.1f}°)")
+    elif event == "fire_refused":
+        print(f"❌ Ateş reddedildi: {data['reason']}")
+    elif event == "emergency":
+        print("🛑 ACİL DURDUR")
+
+
+def headless(args):
+    """GUI olmadan motoru çalıştır (ayrı kutuda çalışma ve verim ölçümü)"""
+    from core.capture import FrameSource
+    from core.engine import Engine, run_headless
+    from core.multiprocess import ProcessFrameSource
+
+    source_class = ProcessFrameSource if args.multiprocess else FrameSource
+    source = source_class.from_settings(source=args.source, realtime=not args.no_realtime, loop=args.loop)
+    engine = Engine(source, multiprocess=args.multiprocess)
+    engine.subscribe(print_engine_event)
+    engine.set_mode(args.mode)
+    stats = run_headless(engine, duration=args.duration, interval=args.interval)
+    return 0 if stats is not None else 1
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    # Örnek: python main.py --headless --source test.mp4 --no-realtime --mode autonomous
+    parser = argparse.ArgumentParser(description="TUNA HSS")
+    parser.add_argument("--headless", action="store_true", help="GUI olmadan çalıştır")
+    parser.add_argument("--source", help="Kamera indeksi ya da video dosyası (varsayılan: ayarlardaki kamera)")
+    parser.add_argument("--mode", default="semi_auto",
+                        choices=["manual", "semi_auto", "autonomous", "angajman"], help="Headless çalışma modu")
+    parser.add_argument("--duration", type=float, help="Çalışma süresi (s); verilmezse Ctrl+C ile durur")
+    parser.add_argument("--interval", type=float, default=5.0, help="Verim özeti aralığı (s)")
+    parser.add_argument("--no-realtime", action="store_true", help="Video dosyasını olabildiğince hızlı oku")
+    parser.add_argument("--loop", action="store_true", help="Video dosyası bitince başa sar")
+    parser.add_argument("--multiprocess", action="store_true",
+                        help="Yakalama ve tespiti ayrı süreçlerde çalıştır (paylaşımlı bellek)")
+    args = parser.parse_args()
+
+    if args.headless:
+        sys.exit(headless(args))
+    main()
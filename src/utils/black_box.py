@@ -0,0 +1,259 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+from utils.config import get_section
+from utils.perf_stats import LatencyTracker
+
+
+DEFAULT_BLACK_BOX_SETTINGS = {
+    "enabled": True,
+    "folder": "recordings/blackbox",
+    "pre_seconds": 10.0,
+    "post_seconds": 5.0,
+    "fps": 15,
+    "jpeg_quality": 80,
+    "max_megabytes": 64
+}
+
+
+class BlackBox:
+    """
+    Tetik öncesi kayıt ("kara kutu"): kamera halkasından son N saniyenin kareleri
+    JPEG olarak sıkıştırılıp bellekte döner tamponda tutulur. trigger() çağrılınca
+    tampon ve ardından gelen post_seconds'lık kareler diske yazılır.
+    JPEG kodlama bu sınıfın kendi thread'inde, diske yazma ayrı thread'de yapılır;
+    yakalama döngüsü hiç beklemez. Bellek hem süre hem bayt sınırıyla sınırlıdır.
+    """
+
+    def __init__(self, folder="recordings/blackbox", pre_seconds=10.0, post_seconds=5.0, fps=15,
+                 jpeg_quality=80, max_bytes=64 * 1024 * 1024):
+        self.folder = folder
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fps = fps
+        self.jpeg_quality = jpeg_quality
+        self.max_bytes = max_bytes
+
+        self.frames = deque()   # (zaman, kare no, jpeg)
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+        # Bekleyen tetik: toplanan klip, olaylar ve pencere sonu
+        self.clip = None
+        self.events = []
+        self.post_until = None
+
+        self.frame_buffer = None
+        self.running = False
+        self.thread = None
+        self.flush_queue = queue.Queue()
+        self.flush_thread = None
+        self.listeners = []
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.frames_encoded = 0
+        self.frames_evicted = 0
+        self.clips_saved = 0
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """config/settings.json 'black_box' bölümünden oluştur"""
+        settings = settings or get_section("black_box", DEFAULT_BLACK_BOX_SETTINGS)
+        return cls(
+            folder=settings["folder"],
+            pre_seconds=settings["pre_seconds"],
+            post_seconds=settings["post_seconds"],
+            fps=settings["fps"],
+            jpeg_quality=settings["jpeg_quality"],
+            max_bytes=int(settings["max_megabytes"] * 1024 * 1024)
+        )
+
+    def add_listener(self, callback):
+        """Klip diske yazılınca callback(yol) çağrılır (yazma thread'inden)"""
+        self.listeners.append(callback)
+
+    def start(self, frame_buffer):
+        """Verilen kare halkasından kaydetmeye başla"""
+        if self.running:
+            return
+        self.frame_buffer = frame_buffer
+        with self.lock:
+            self.frames.clear()
+            self.bytes = 0
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        if self.flush_thread is None:
+            self.flush_thread = threading.Thread(target=self.run_flush, daemon=True)
+            self.flush_thread.start()
+
+    def stop(self):
+        """Kaydı durdur; bekleyen tetik varsa toplanan kadarıyla yazmaya gönder"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+            self.thread = None
+        with self.lock:
+            if self.clip is not None:
+                self.finalize()
+
+    def close(self):
+        """Durdur ve yazılmayı bekleyen klipleri bitir (uygulama çıkışı)"""
+        self.stop()
+        if self.flush_thread is not None:
+            self.flush_queue.put(None)
+            self.flush_thread.join(timeout=30.0)
+            self.flush_thread = None
+
+    def trigger(self, event, data=None):
+        """
+        Tampondaki son pre_seconds'ı ve sonraki post_seconds'ı kaydet.
+        Pencere sürerken gelen tetikler aynı klibe eklenir ve pencereyi uzatır.
+        """
+        if not self.running:
+            return
+        now = time.perf_counter()
+        with self.lock:
+            if self.clip is None:
+                self.clip = list(self.frames)
+                self.events = []
+            self.events.append({"event": event, "data": data, "time": now,
+                                "wall_time": datetime.now().isoformat(timespec="milliseconds")})
+            self.post_until = now + self.post_seconds
+
+    def run(self):
+        """Halkadan fps hızında kare al, JPEG'e sıkıştır, döner tampona ekle"""
+        interval = 1.0 / self.fps if self.fps > 0 else 0.0
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)]
+        next_time = 0.0
+        last_id = -1
+
+        while self.running:
+            ref = self.frame_buffer.acquire_latest(last_id, timeout=0.5)
+            if ref is None:
+                if self.frame_buffer.closed:
+                    break
+                continue
+            last_id = ref.frame_id
+            if ref.timestamp < next_time:
+                # Kamera hızı kayıt hızından yüksek: bu kareyi atla
+                ref.release()
+                continue
+            next_time = max(next_time + interval, ref.timestamp)
+
+            encode_start = time.perf_counter()
+            try:
+                ok, jpeg = cv2.imencode(".jpg", ref.frame, params)
+            finally:
+                ref.release()
+            self.latency.record_since("jpeg", encode_start)
+            if ok:
+                self.add_frame(ref.timestamp, ref.frame_id, jpeg)
+
+    def add_frame(self, timestamp, frame_id, jpeg):
+        """Sıkıştırılmış kareyi tampona ekle, süre/bayt sınırını aşanları at"""
+        item = (timestamp, frame_id, jpeg)
+        with self.lock:
+            self.frames.append(item)
+            self.bytes += len(jpeg)
+            self.frames_encoded += 1
+            while self.frames and (timestamp - self.frames[0][0] > self.pre_seconds
+                                   or self.bytes > self.max_bytes):
+                _, _, old = self.frames.popleft()
+                self.bytes -= len(old)
+                self.frames_evicted += 1
+
+            if self.clip is not None:
+                self.clip.append(item)
+                if timestamp >= self.post_until:
+                    self.finalize()
+
+    def finalize(self):
+        """Toplanan klibi yazma kuyruğuna ver (kilit tutulurken çağrılır)"""
+        self.flush_queue.put((self.clip, self.events))
+        self.clip = None
+        self.events = []
+        self.post_until = None
+
+    def run_flush(self):
+        """Yazma thread'i: klipleri sırayla diske yaz"""
+        while True:
+            item = self.flush_queue.get()
+            if item is None:
+                break
+            clip, events = item
+            try:
+                path = self.write_clip(clip, events)
+            except Exception as e:
+                print(f"❌ Kara kutu kaydı yazılamadı: {e}")
+                continue
+            if path is None:
+                continue
+            self.clips_saved += 1
+            for callback in self.listeners:
+                try:
+                    callback(path)
+                except Exception as e:
+                    print(f"❌ Kara kutu dinleyici hatası: {e}")
+
+    def write_clip(self, clip, events):
+        """Klibi MJPG video ve olay/zaman bilgisi içeren JSON olarak yaz; video yolunu döndür"""
+        if not clip:
+            return None
+        write_start = time.perf_counter()
+        os.makedirs(self.folder, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(self.folder, f"blackbox_{stamp}_{events[0]['event']}.avi")
+
+        # Gerçek kayıt hızı (kamera fps'den düşükse dosya süresi doğru kalsın)
+        times = [timestamp for timestamp, _, _ in clip]
+        span = times[-1] - times[0]
+        fps = (len(clip) - 1) / span if len(clip) > 1 and span > 0 else float(self.fps)
+
+        first = cv2.imdecode(clip[0][2], cv2.IMREAD_COLOR)
+        height, width = first.shape[:2]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+        try:
+            for _, _, jpeg in clip:
+                writer.write(cv2.imdecode(jpeg, cv2.IMREAD_COLOR))
+        finally:
+            writer.release()
+
+        start = times[0]
+        info = {
+            "video": os.path.basename(path),
+            "fps": fps,
+            "frames": [{"frame_id": int(frame_id), "offset": timestamp - start}
+                       for timestamp, frame_id, _ in clip],
+            "events": [dict(event, offset=event["time"] - start) for event in events]
+        }
+        with open(os.path.splitext(path)[0] + ".json", 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, default=str)
+
+        self.latency.record_since("flush", write_start)
+        print(f"💾 Kara kutu kaydı: {path} ({len(clip)} kare, {span:.1f} s)")
+        return path
+
+    def get_stats(self):
+        """Tampon doluluğu, JPEG/yazma süreleri ve sayaçlar"""
+        stats = self.latency.get_stats()
+        with self.lock:
+            span = self.frames[-1][0] - self.frames[0][0] if len(self.frames) > 1 else 0.0
+            stats["black_box"] = {
+                "frames": len(self.frames),
+                "seconds": span,
+                "megabytes": self.bytes / (1024 * 1024),
+                "encoded": self.frames_encoded,
+                "evicted": self.frames_evicted,
+                "clips": self.clips_saved,
+                "pending": self.clip is not None
+            }
+        return stats
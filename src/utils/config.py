@@ -0,0 +1,25 @@
+import json
+import os
+
+
+CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "config", "settings.json"
+)
+
+
+def load_settings(path=None):
+    """settings.json dosyasını oku (okunamazsa boş sözlük)"""
+    path = path or CONFIG_PATH
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"❌ Ayarlar okunamadı ({path}): {e}")
+        return {}
+
+
+def get_section(name, defaults=None, path=None):
+    """Bir ayar bölümünü varsayılanlarla birleştirerek döndür"""
+    section = dict(defaults or {})
+    section.update(load_settings(path).get(name, {}))
+    return section
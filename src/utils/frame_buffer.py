@@ -0,0 +1,366 @@
+import multiprocessing
+import threading
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class FrameRef:
+    """Halkadaki bir slotun okuyucu tarafından tutulan referansı"""
+
+    def __init__(self, ring, slot, generation, frame_id, timestamp, frame):
+        self.ring = ring
+        self.slot = slot
+        self.generation = generation
+        self.frame_id = frame_id
+        self.timestamp = timestamp
+        self.frame = frame
+        self.released = False
+
+    def release(self):
+        """Slotu yazıcıya geri ver"""
+        if not self.released:
+            self.released = True
+            self.ring.release(self.slot, self.generation)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class FrameRingBuffer:
+    """
+    Sabit boyutlu, önceden ayrılmış kare halkası.
+    Tek yazıcı (grab thread'i) sıradaki boş slota yazar; okuyucular her zaman
+    en yeni kareyi alır, aradaki eski kareler atlanır. Okuyucunun tuttuğu slota
+    yazılmaz, bu yüzden okuma sırasında kopya gerekmez.
+    """
+
+    def __init__(self, size=4):
+        self.size = max(2, size)
+        self.buffers = []
+        self.shape = None
+        self.dtype = None
+        self.generation = 0
+
+        self.frame_ids = [-1] * self.size
+        self.timestamps = [0.0] * self.size
+        self.pins = [0] * self.size
+        self.latest_slot = -1
+        self.latest_id = -1
+        self.next_id = 0
+
+        # Sayaçlar
+        self.frames_written = 0
+        self.overruns = 0  # Tüm slotlar okuyucularda olduğu için atılan kareler
+
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def allocate(self, shape, dtype=np.uint8):
+        """Slot tamponlarını (yeniden) ayır"""
+        with self.condition:
+            self._allocate(shape, dtype)
+
+    def _allocate(self, shape, dtype):
+        self.buffers = [np.empty(shape, dtype=dtype) for _ in range(self.size)]
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.generation += 1
+        self.pins = [0] * self.size
+        self.frame_ids = [-1] * self.size
+        self.latest_slot = -1
+
+    def begin_write(self):
+        """
+        Yazılabilir slotu döndür: (slot, tampon).
+        Tampon henüz ayrılmadıysa None döner; tüm slotlar meşgulse (None, None).
+        """
+        with self.condition:
+            for offset in range(1, self.size + 1):
+                slot = (self.latest_slot + offset) % self.size
+                if slot != self.latest_slot and self.pins[slot] == 0:
+                    buffer = self.buffers[slot] if self.buffers else None
+                    return slot, buffer
+            self.overruns += 1
+            return None, None
+
+    def commit(self, slot, frame, timestamp):
+        """Slota yazılan kareyi yayınla ve bekleyen okuyucuları uyandır"""
+        with self.condition:
+            if self.shape != frame.shape or self.dtype != frame.dtype:
+                self._allocate(frame.shape, frame.dtype)
+            if frame is not self.buffers[slot]:
+                np.copyto(self.buffers[slot], frame)
+
+            frame_id = self.next_id
+            self.next_id += 1
+            self.frame_ids[slot] = frame_id
+            self.timestamps[slot] = timestamp
+            self.latest_slot = slot
+            self.latest_id = frame_id
+            self.frames_written += 1
+            self.condition.notify_all()
+            return frame_id
+
+    def acquire_latest(self, last_id=-1, timeout=None):
+        """
+        last_id'den daha yeni bir kare gelene kadar bekle ve en yenisini sabitle.
+        Zaman aşımında veya halka kapatıldığında None döner.
+        """
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: self.closed or self.latest_id > last_id, timeout
+            )
+            if not ready or self.latest_id <= last_id:
+                return None
+
+            slot = self.latest_slot
+            self.pins[slot] += 1
+            return FrameRef(self, slot, self.generation, self.frame_ids[slot],
+                            self.timestamps[slot], self.buffers[slot])
+
+    def release(self, slot, generation):
+        """Okuyucu slotu bıraktı"""
+        with self.condition:
+            if generation == self.generation and self.pins[slot] > 0:
+                self.pins[slot] -= 1
+
+    def close(self):
+        """Halkayı kapat, bekleyen okuyucuları serbest bırak"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def get_stats(self):
+        """Halka sayaçları"""
+        with self.condition:
+            return {
+                "frames_written": self.frames_written,
+                "overruns": self.overruns,
+                "latest_id": self.latest_id
+            }
+
+
+class SharedFrameRing:
+    """
+    FrameRingBuffer'ın süreçler arası karşılığı: slotlar multiprocessing.shared_memory
+    bloğundadır, kareler pickle edilmez ve kopyalanmaz. Kare boyutu baştan sabittir.
+    Kare numaraları, zaman damgaları ve sabitleme sayaçları aynı bloğun başındaki
+    sayaç dizisinde, eşgüdüm süreçler arası Condition ile yapılır. Nesne alt sürece
+    argüman olarak verilince aynı bloğa bağlanır.
+    """
+
+    HEADER_FIELDS = 6  # latest_slot, latest_id, next_id, frames_written, overruns, closed
+
+    def __init__(self, shape, size=4, dtype=np.uint8, context=None):
+        self.size = max(2, size)
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        self.generation = 0
+        self.condition = (context or multiprocessing).Condition()
+
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        # Sayaçlar 64 bayta hizalanır, kare slotları ardından gelir
+        self.header_bytes = ((self.HEADER_FIELDS + 3 * self.size) * 8 + 63) // 64 * 64
+        self.memory = shared_memory.SharedMemory(create=True,
+                                                 size=self.header_bytes + self.frame_bytes * self.size)
+        self.owner = True
+        self.attach()
+        self.header[:] = (-1, -1, 0, 0, 0, 0)
+        self.frame_ids[:] = -1
+        self.pins[:] = 0
+
+    def attach(self):
+        """Paylaşımlı blok üzerinde sayaç ve slot görünümlerini kur"""
+        buffer = self.memory.buf
+        fields = self.HEADER_FIELDS
+        self.header = np.ndarray((fields,), dtype=np.int64, buffer=buffer)
+        self.frame_ids = np.ndarray((self.size,), dtype=np.int64, buffer=buffer, offset=fields * 8)
+        self.pins = np.ndarray((self.size,), dtype=np.int64, buffer=buffer, offset=(fields + self.size) * 8)
+        self.timestamps = np.ndarray((self.size,), dtype=np.float64, buffer=buffer,
+                                     offset=(fields + 2 * self.size) * 8)
+        self.buffers = [
+            np.ndarray(self.shape, dtype=self.dtype, buffer=buffer,
+                       offset=self.header_bytes + slot * self.frame_bytes)
+            for slot in range(self.size)
+        ]
+
+    def __getstate__(self):
+        return {"name": self.memory.name, "shape": self.shape, "size": self.size,
+                "dtype": self.dtype.str, "condition": self.condition}
+
+    def __setstate__(self, state):
+        self.size = state["size"]
+        self.shape = state["shape"]
+        self.dtype = np.dtype(state["dtype"])
+        self.generation = 0
+        self.condition = state["condition"]
+        self.frame_bytes = int(np.prod(self.shape)) * self.dtype.itemsize
+        self.header_bytes = ((self.HEADER_FIELDS + 3 * self.size) * 8 + 63) // 64 * 64
+        self.memory = shared_memory.SharedMemory(name=state["name"])
+        self.owner = False
+        self.attach()
+
+    @property
+    def closed(self):
+        """Halka kapatıldı mı (blok serbest bırakıldıysa da kapalı sayılır)"""
+        return self.header is None or bool(self.header[5])
+
+    def begin_write(self):
+        """Yazılabilir slotu döndür: (slot, tampon); tüm slotlar meşgulse (None, None)"""
+        with self.condition:
+            latest_slot = int(self.header[0])
+            for offset in range(1, self.size + 1):
+                slot = (latest_slot + offset) % self.size
+                if slot != latest_slot and self.pins[slot] == 0:
+                    return slot, self.buffers[slot]
+            self.header[4] += 1
+            return None, None
+
+    def commit(self, slot, frame, timestamp):
+        """Slota yazılan kareyi yayınla ve bekleyen okuyucuları (tüm süreçlerde) uyandır"""
+        if frame.shape != self.shape or frame.dtype != self.dtype:
+            raise ValueError(f"Kare boyutu halkayla uyuşmuyor: {frame.shape} != {self.shape}")
+        if frame is not self.buffers[slot]:
+            np.copyto(self.buffers[slot], frame)
+        with self.condition:
+            frame_id = int(self.header[2])
+            self.header[2] += 1
+            self.frame_ids[slot] = frame_id
+            self.timestamps[slot] = timestamp
+            self.header[0] = slot
+            self.header[1] = frame_id
+            self.header[3] += 1
+            self.condition.notify_all()
+            return frame_id
+
+    def acquire_latest(self, last_id=-1, timeout=None):
+        """
+        last_id'den daha yeni bir kare gelene kadar bekle ve en yenisini sabitle.
+        Zaman aşımında veya halka kapatıldığında None döner.
+        """
+        if self.closed:
+            return None
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: self.header[5] or self.header[1] > last_id, timeout
+            )
+            if not ready or self.header[1] <= last_id:
+                return None
+
+            slot = int(self.header[0])
+            self.pins[slot] += 1
+            return FrameRef(self, slot, self.generation, int(self.frame_ids[slot]),
+                            float(self.timestamps[slot]), self.buffers[slot])
+
+    def release(self, slot, generation):
+        """Okuyucu slotu bıraktı"""
+        with self.condition:
+            if self.pins[slot] > 0:
+                self.pins[slot] -= 1
+
+    def close(self):
+        """Halkayı kapat, bekleyen okuyucuları (tüm süreçlerde) serbest bırak"""
+        with self.condition:
+            self.header[5] = 1
+            self.condition.notify_all()
+
+    def release_memory(self):
+        """Bu sürecin bağlantısını kapat; sahibiyse bloğu sil"""
+        self.header = self.frame_ids = self.pins = self.timestamps = None
+        self.buffers = []
+        try:
+            self.memory.close()
+        except BufferError:
+            # Okuyucunun elinde hâlâ görünüm var; eşleme onunla birlikte serbest kalır
+            pass
+        if self.owner:
+            self.memory.unlink()
+            self.owner = False
+
+    def get_stats(self):
+        """Halka sayaçları"""
+        with self.condition:
+            return {
+                "frames_written": int(self.header[3]),
+                "overruns": int(self.header[4]),
+                "latest_id": int(self.header[1])
+            }
+
+
+class PooledBuffer:
+    """Havuzdan alınmış tampon; sahibi işi bitince release() çağırır"""
+
+    def __init__(self, pool, array, generation):
+        self.pool = pool
+        self.array = array
+        self.generation = generation
+        self.image = None  # Tampona bağlı önbellek nesnesi (örn. QImage)
+        self.frame_id = -1
+        self.timestamp = 0.0
+        self.in_use = False
+
+    def release(self):
+        """Tamponu havuza geri ver"""
+        self.pool.release(self)
+
+
+class BufferPool:
+    """
+    Sabit sayıda, yeniden kullanılan tampon havuzu.
+    Boyut değişmedikçe yeni bellek ayrılmaz; 'allocations' sayacı bunu doğrular.
+    """
+
+    def __init__(self, count=3):
+        self.count = max(1, count)
+        self.shape = None
+        self.dtype = None
+        self.generation = 0
+        self.free = []
+
+        # Sayaçlar
+        self.allocations = 0
+        self.exhausted = 0  # Boş tampon bulunamayan istekler
+
+        self.lock = threading.Lock()
+
+    def acquire(self, shape, dtype=np.uint8):
+        """Boş tampon döndür; hepsi kullanımdaysa None"""
+        shape = tuple(shape)
+        with self.lock:
+            if shape != self.shape or np.dtype(dtype) != self.dtype:
+                self.shape = shape
+                self.dtype = np.dtype(dtype)
+                self.generation += 1
+                self.free = [PooledBuffer(self, np.empty(shape, dtype=dtype), self.generation)
+                             for _ in range(self.count)]
+                self.allocations += self.count
+
+            if not self.free:
+                self.exhausted += 1
+                return None
+
+            buffer = self.free.pop()
+            buffer.in_use = True
+            return buffer
+
+    def release(self, buffer):
+        """Tamponu geri al (eski nesil tamponlar atılır)"""
+        with self.lock:
+            if not buffer.in_use:
+                return
+            buffer.in_use = False
+            if buffer.generation == self.generation:
+                self.free.append(buffer)
+
+    def get_stats(self):
+        """Havuz sayaçları"""
+        with self.lock:
+            return {
+                "allocations": self.allocations,
+                "exhausted": self.exhausted,
+                "free": len(self.free)
+            }
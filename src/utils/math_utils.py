@@ -0,0 +1,54 @@
+import math
+import numpy as np
+
+
+def box_iou(boxes_a, boxes_b):
+    """İki kutu kümesi arasındaki IoU matrisi (N, M); kutular x1 y1 x2 y2"""
+    x1 = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+    y1 = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+    x2 = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+    y2 = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+    area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - intersection
+    return intersection / np.maximum(union, 1e-9)
+
+
+def wrap_angle(angle):
+    """Açıyı [0, 360) aralığına getir"""
+    return angle % 360.0
+
+
+def angle_diff(target, current):
+    """current'tan target'a en kısa yönlü fark, [-180, 180)"""
+    return (target - current + 180.0) % 360.0 - 180.0
+
+
+def pixel_to_angles(x, y, frame_w, frame_h, hfov, vfov, pan, tilt):
+    """Görüntü noktasını kameranın baktığı pan/tilt'e göre açıya çevir (pinhole)"""
+    focal_x = (frame_w / 2) / math.tan(math.radians(hfov / 2))
+    focal_y = (frame_h / 2) / math.tan(math.radians(vfov / 2))
+    offset_pan = math.degrees(math.atan((x - frame_w / 2) / focal_x))
+    offset_tilt = math.degrees(math.atan((frame_h / 2 - y) / focal_y))
+    return wrap_angle(pan + offset_pan), tilt + offset_tilt
+
+
+def pixel_velocity_to_angular(x, y, vx, vy, frame_w, frame_h, hfov, vfov):
+    """Görüntüdeki (x, y) noktasının piksel/s hızını kameraya göre °/s açısal hıza çevir"""
+    focal_x = (frame_w / 2) / math.tan(math.radians(hfov / 2))
+    focal_y = (frame_h / 2) / math.tan(math.radians(vfov / 2))
+    # d/dt atan(u / f) = f * du/dt / (f² + u²)
+    u = x - frame_w / 2
+    v = frame_h / 2 - y
+    pan_rate = math.degrees(focal_x * vx / (focal_x ** 2 + u ** 2))
+    tilt_rate = math.degrees(-focal_y * vy / (focal_y ** 2 + v ** 2))
+    return pan_rate, tilt_rate
+
+
+def estimate_distance(box_width, frame_w, hfov, target_size):
+    """Bilinen hedef çapından mesafe tahmini (metre)"""
+    if box_width <= 0:
+        return 0.0
+    focal_x = (frame_w / 2) / math.tan(math.radians(hfov / 2))
+    return target_size * focal_x / box_width
@@ -0,0 +1,70 @@
+import bisect
+import threading
+import time
+from collections import deque
+
+
+class LatencyTracker:
+    """Aşama bazlı gecikme sayaçları (ms cinsinden kayan pencere)"""
+
+    def __init__(self, window=300, histogram_edges=None):
+        self.window = window
+        self.samples = {}
+        self.counts = {}
+        # Verilirse aşama başına tüm oturum boyunca birikimli histogram (ms kova üst sınırları)
+        self.histogram_edges = list(histogram_edges) if histogram_edges else None
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def record(self, stage, latency_ms):
+        """Bir aşama için gecikme örneği ekle"""
+        with self.lock:
+            if stage not in self.samples:
+                self.samples[stage] = deque(maxlen=self.window)
+                self.counts[stage] = 0
+            self.samples[stage].append(latency_ms)
+            self.counts[stage] += 1
+            if self.histogram_edges is not None:
+                if stage not in self.histograms:
+                    self.histograms[stage] = [0] * (len(self.histogram_edges) + 1)
+                self.histograms[stage][bisect.bisect_left(self.histogram_edges, latency_ms)] += 1
+
+    def record_since(self, stage, start_time):
+        """time.perf_counter() başlangıcından bu yana geçen süreyi kaydet"""
+        self.record(stage, (time.perf_counter() - start_time) * 1000.0)
+
+    def get_stats(self):
+        """Her aşama için ortalama, p50, p95, maksimum ve toplam sayı"""
+        with self.lock:
+            snapshot = {stage: (list(values), self.counts[stage])
+                        for stage, values in self.samples.items()}
+
+        stats = {}
+        for stage, (values, count) in snapshot.items():
+            if not values:
+                continue
+            ordered = sorted(values)
+            stats[stage] = {
+                "mean": sum(ordered) / len(ordered),
+                "p50": ordered[len(ordered) // 2],
+                "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+                "max": ordered[-1],
+                "count": count
+            }
+        return stats
+
+    def get_histograms(self):
+        """Her aşama için [("<=1ms", adet), ..., (">100ms", adet)] histogramı"""
+        if self.histogram_edges is None:
+            return {}
+        labels = [f"<={edge:g}ms" for edge in self.histogram_edges]
+        labels.append(f">{self.histogram_edges[-1]:g}ms")
+        with self.lock:
+            return {stage: list(zip(labels, counts)) for stage, counts in self.histograms.items()}
+
+    def reset(self):
+        """Tüm sayaçları sıfırla"""
+        with self.lock:
+            self.samples.clear()
+            self.counts.clear()
+            self.histograms.clear()
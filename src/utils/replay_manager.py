@@ -1,112 +1,661 @@
+import bisect
 import json
+import mmap
+import os
+import queue
+import struct
+import threading
 import time
 from datetime import datetime
-import os
+
+from utils.config import get_section
+from utils.perf_stats import LatencyTracker
+
+
+DEFAULT_REPLAY_SETTINGS = {
+    "folder": "replays",
+    "fsync_interval": 1.0,
+    "queue_size": 10000,
+    "keyframe_interval": 2.0
+}
+
+# Dosya: MAGIC, uzunluk önekli JSON başlık, ardından kayıtlar
+MAGIC = b"TUNARPL\x01"
+LENGTH = struct.Struct("<I")
+# Kayıt başlığı: yük uzunluğu, zaman damgası (s), kayıt türü; yük sıkı JSON
+RECORD = struct.Struct("<IdB")
+KIND_EVENT = 0
+KIND_KEYFRAME = 1   # Durum anlık görüntüsü (mod, pan/tilt, imha sayısı)
+KIND_INDEX = 2      # Kapanışta: anahtar karelerin (zaman, ofset) listesi
+KIND_FRAME = 3      # Kaydedilen video karesi başına tespit, iz ve pan/tilt (video kare numarasıyla)
+# Dosya sonu: indeks kaydının ofseti; yoksa (çökme) indeks taranarak yeniden kurulur
+TRAILER = struct.Struct("<Q8s")
+TRAILER_MAGIC = b"TUNAIDX\x01"
+
+PLAYBACK_SPEEDS = (0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+
+
+def encode_payload(data):
+    """Kayıt yükünü sıkı JSON baytlarına çevir"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def read_header(buffer):
+    """Dosya başlığını oku: (başlık, ilk kaydın ofseti); MAGIC yoksa ya da başlık yarım/bozuksa (None, 0)"""
+    start = len(MAGIC) + LENGTH.size
+    if len(buffer) < start or buffer[:len(MAGIC)] != MAGIC:
+        return None, 0
+    (length,) = LENGTH.unpack_from(buffer, len(MAGIC))
+    if start + length > len(buffer):
+        return None, 0
+    try:
+        header = json.loads(buffer[start:start + length].decode("utf-8"))
+    except ValueError:
+        return None, 0
+    if not isinstance(header, dict):
+        return None, 0
+    return header, start + length
+
+
+def read_record(buffer, offset, end):
+    """
+    offset'teki kaydı oku: (zaman, tür, yük baytları, sonraki ofset).
+    end'e ulaşıldıysa ya da kayıt yarım kaldıysa (çökme) None.
+    """
+    if offset + RECORD.size > end:
+        return None
+    length, timestamp, kind = RECORD.unpack_from(buffer, offset)
+    start = offset + RECORD.size
+    if start + length > end:
+        return None
+    return timestamp, kind, buffer[start:start + length], start + length
+
+
+def decode_event(timestamp, payload):
+    """Olay kaydını {'timestamp', 'type', 'data'} sözlüğüne çevir"""
+    event = json.loads(payload.decode("utf-8"))
+    event["timestamp"] = timestamp
+    return event
+
+
+def iter_frame_records(reader):
+    """ReplayReader'daki kare kayıtları sırayla: (zaman, video adresi, veri); yükler tek tek çözülür"""
+    video_path = None
+    offset = reader.data_start
+    while True:
+        record = read_record(reader.map, offset, reader.end)
+        if record is None:
+            return
+        timestamp, kind, payload, offset = record
+        if kind == KIND_EVENT:
+            event = decode_event(timestamp, payload)
+            if event["type"] == "video":
+                video_path = event["data"]["path"]
+        elif kind == KIND_FRAME:
+            yield timestamp, video_path, decode_event(timestamp, payload)["data"]
+
+
+class ReplayWriter:
+    """
+    Görev kaydını diske ekleyen yazıcı: olaylar kuyruğa alınır, kodlama ve yazma
+    arka plan thread'inde yapılır, dosya fsync_interval aralıklarla diske zorlanır.
+    Olay başına maliyet sabittir; süreç çökerse son fsync'e kadarki kayıtlar okunabilir.
+    keyframe_provider verilirse keyframe_interval aralıklarla durum anlık görüntüsü
+    yazılır; ofsetleri kapanışta dosya sonuna seyrek zaman indeksi olarak eklenir.
+    """
+    
+    def __init__(self, path, fsync_interval=1.0, queue_size=10000, keyframe_interval=2.0,
+                 keyframe_provider=None):
+        self.path = path
+        self.fsync_interval = fsync_interval
+        self.queue = queue.Queue(queue_size)
+        self.keyframe_interval = keyframe_interval
+        self.keyframe_provider = keyframe_provider  # () -> (zaman, durum)
+        self.index = []         # [(zaman, ofset)] anahtar kareler
+        self.last_timestamp = 0.0
+        self.file = None
+        self.running = False
+        self.thread = None
+        
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.records_written = 0
+        self.records_dropped = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+    
+    def start(self, header=None):
+        """Dosyayı aç, başlığı yaz ve yazma thread'ini başlat"""
+        if self.running:
+            return
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.file = open(self.path, 'wb')
+        payload = encode_payload(header or {})
+        self.file.write(MAGIC + LENGTH.pack(len(payload)) + payload)
+        self.bytes_written = self.file.tell()
+        self.sync()
+        
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Kuyruktakileri yaz, indeksi ekle, diske zorla ve dosyayı kapat (thread durmazsa indekssiz)"""
+        if not self.running:
+            return
+        self.running = False
+        self.queue.put(None)
+        thread = self.thread
+        self.thread = None
+        if thread is not None:
+            thread.join(timeout=10.0)
+            if thread.is_alive():
+                # Thread hâlâ yazıyor: indeks eklenmez, okuyucu kayıtları tarayarak açar
+                print(f"❌ Görev kaydı yazıcısı durmadı, dosya indekssiz bırakıldı: {self.path}")
+                return
+        index_offset = self.bytes_written
+        self.append(self.last_timestamp, KIND_INDEX,
+                    {"duration": self.last_timestamp, "keyframes": self.index})
+        self.file.write(TRAILER.pack(index_offset, TRAILER_MAGIC))
+        self.sync()
+        self.file.close()
+        self.file = None
+    
+    def write(self, timestamp, kind, data):
+        """Kaydı kuyruğa al (kuyruk doluysa atılır, çağıran hiç beklemez)"""
+        if not self.running:
+            return False
+        try:
+            self.queue.put_nowait((timestamp, kind, data))
+            return True
+        except queue.Full:
+            self.records_dropped += 1
+            return False
+    
+    def run(self):
+        """Yazma thread'i: kayıtları kodlar, dosyaya ekler, aralıklarla anahtar kare ve fsync"""
+        last_sync = time.perf_counter()
+        last_keyframe = None
+        timeout = min(self.fsync_interval, self.keyframe_interval)
+        while True:
+            now = time.perf_counter()
+            if self.keyframe_provider is not None and (last_keyframe is None
+                                                       or now - last_keyframe >= self.keyframe_interval):
+                # Durumdan önce alınmış kayıtlar anahtar kareden önce yazılsın
+                if not self.drain():
+                    break
+                self.write_keyframe()
+                last_keyframe = now
+            try:
+                item = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+            if item:
+                self.write_item(item)
+            if time.perf_counter() - last_sync >= self.fsync_interval:
+                self.sync()
+                last_sync = time.perf_counter()
+    
+    def drain(self):
+        """Kuyrukta bekleyen kayıtları yaz (durdurma işareti gelirse False)"""
+        while True:
+            try:
+                item = self.queue.get_nowait()
+            except queue.Empty:
+                return True
+            if item is None:
+                return False
+            self.write_item(item)
+    
+    def write_item(self, item):
+        """Kuyruktan alınan kaydı ekle (süresi ölçülür)"""
+        append_start = time.perf_counter()
+        self.append(*item)
+        self.latency.record_since("append", append_start)
+    
+    def append(self, timestamp, kind, data):
+        """
+        Kaydı kodlayıp dosya sonuna ekle (yazma thread'inden). Dosya zamana göre sıralı
+        kalır: başka thread'in anahtar kareden hemen önce damgalayıp sonra kuyruğa koyduğu
+        kayıt, anahtar kare zamanıyla yazılır (okuyucu ilk ileri zamanlı kayıtta durur).
+        """
+        timestamp = max(timestamp, self.last_timestamp)
+        payload = encode_payload(data)
+        self.file.write(RECORD.pack(len(payload), timestamp, kind) + payload)
+        self.bytes_written += RECORD.size + len(payload)
+        self.records_written += 1
+        self.last_timestamp = timestamp
+    
+    def write_keyframe(self):
+        """Güncel durumu anahtar kare olarak yaz ve indekse ekle"""
+        try:
+            timestamp, state = self.keyframe_provider()
+        except Exception as e:
+            print(f"❌ Anahtar kare alınamadı: {e}")
+            return
+        timestamp = max(timestamp, self.last_timestamp)
+        self.index.append((timestamp, self.bytes_written))
+        self.append(timestamp, KIND_KEYFRAME, state)
+    
+    def sync(self):
+        """Tamponu boşalt ve diske zorla"""
+        sync_start = time.perf_counter()
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.fsyncs += 1
+        self.latency.record_since("fsync", sync_start)
+    
+    def get_stats(self):
+        """Yazma/fsync süreleri ve kayıt sayaçları"""
+        stats = self.latency.get_stats()
+        stats["replay"] = {
+            "written": self.records_written,
+            "dropped": self.records_dropped,
+            "bytes": self.bytes_written,
+            "fsyncs": self.fsyncs,
+            "keyframes": len(self.index),
+            "queue_depth": self.queue.qsize()
+        }
+        return stats
+
+
+class ReplayReader:
+    """
+    Kayıt dosyası okuyucu. Dosya mmap ile açılır; açılışta yalnızca başlık ve seyrek
+    indeks okunur (indeks yoksa, örn. çökme sonrası, kayıt başlıkları taranarak kurulur).
+    Olaylar oynatma ilerledikçe çözülür, çözülmüş olay tutulmaz: açılış süresi dosya
+    boyundan bağımsız, bellek oynatma penceresiyle sınırlıdır (sayfaları işletim sistemi yönetir).
+    seek(t): indekste ikili arama + kısa ileri okuma.
+    """
+    
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        self.map = None
+        self.header = None
+        self.duration = 0.0
+        self.keyframes = []     # [(zaman, ofset)]
+        try:
+            if os.path.getsize(path) > 0:
+                self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+                self.header, self.data_start = read_header(self.map)
+            if self.header is None:
+                raise ValueError(f"Kayıt dosyası değil ya da başlığı bozuk: {path}")
+            self.end = len(self.map)
+            self.load_index()
+        except BaseException:
+            self.close()
+            raise
+        self.times = [timestamp for timestamp, _ in self.keyframes]
+        self.position = self.data_start
+        # Geçilen son kare kaydı: çözülmeden tutulur, sadece gösterilecekse çözülür
+        self.last_frame = None
+    
+    def load_index(self):
+        """Dosya sonundaki indeksi oku; yoksa kayıtları tarayarak kur"""
+        if self.end - self.data_start >= TRAILER.size:
+            index_offset, magic = TRAILER.unpack_from(self.map, self.end - TRAILER.size)
+            if magic == TRAILER_MAGIC:
+                record = read_record(self.map, index_offset, self.end - TRAILER.size)
+                if record is not None and record[1] == KIND_INDEX:
+                    try:
+                        index = json.loads(record[2].decode("utf-8"))
+                        keyframes = [tuple(entry) for entry in index["keyframes"]]
+                        duration = index["duration"]
+                    except (ValueError, KeyError, TypeError):
+                        index = None   # Bozuk indeks: kayıtlar taranır
+                    if index is not None:
+                        self.duration = duration
+                        self.keyframes = keyframes
+                        self.end = index_offset
+                        return
+        
+        # Kapanmamış dosya: sadece kayıt başlıkları okunur, yükler atlanır
+        offset = self.data_start
+        while offset + RECORD.size <= self.end:
+            length, timestamp, kind = RECORD.unpack_from(self.map, offset)
+            next_offset = offset + RECORD.size + length
+            if next_offset > self.end:
+                break
+            if kind == KIND_KEYFRAME:
+                self.keyframes.append((timestamp, offset))
+            self.duration = max(self.duration, timestamp)
+            offset = next_offset
+        self.end = offset
+    
+    @property
+    def finished(self):
+        return self.position >= self.end
+    
+    def rewind(self):
+        """Başa sar"""
+        self.position = self.data_start
+        self.last_frame = None
+    
+    def seek(self, t):
+        """
+        t anına git. Dönüş: (son anahtar kare durumu ya da None, anahtar kareden t'ye
+        kadarki olaylar); sonraki read_until() t'den sonraki olaylarla devam eder.
+        """
+        i = bisect.bisect_right(self.times, t) - 1
+        self.position = self.keyframes[i][1] if i >= 0 else self.data_start
+        self.last_frame = None
+        state = None
+        events = []
+        while True:
+            record = read_record(self.map, self.position, self.end)
+            if record is None:
+                break
+            timestamp, kind, payload, next_offset = record
+            if timestamp > t:
+                break
+            self.position = next_offset
+            if kind == KIND_KEYFRAME:
+                state = json.loads(payload.decode("utf-8"))
+                events = []
+            elif kind == KIND_EVENT:
+                events.append(decode_event(timestamp, payload))
+            elif kind == KIND_FRAME:
+                self.last_frame = (timestamp, payload)
+        return state, events
+    
+    def read_until(self, t):
+        """Kaldığı yerden t anına kadarki olayları çöz"""
+        events = []
+        while True:
+            record = read_record(self.map, self.position, self.end)
+            if record is None:
+                break
+            timestamp, kind, payload, next_offset = record
+            if timestamp > t:
+                break
+            self.position = next_offset
+            if kind == KIND_EVENT:
+                events.append(decode_event(timestamp, payload))
+            elif kind == KIND_FRAME:
+                self.last_frame = (timestamp, payload)
+        return events
+    
+    def take_frame(self):
+        """
+        Son okumadan bu yana geçilen en yeni kare kaydını çöz (yoksa None).
+        Hızlı oynatmada aradaki kare kayıtları hiç çözülmez.
+        """
+        if self.last_frame is None:
+            return None
+        timestamp, payload = self.last_frame
+        self.last_frame = None
+        return decode_event(timestamp, payload)
+    
+    def close(self):
+        if self.map is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+class JsonReplayReader:
+    """Eski JSON kayıtları için aynı arayüz (dosyanın tamamı belleğe okunur)"""
+    
+    def __init__(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            replay = json.load(f)
+        self.path = path
+        self.header = {"version": replay.get("version")}
+        self.events = replay["events"]
+        self.times = [event["timestamp"] for event in self.events]
+        self.duration = replay.get("duration", 0)
+        self.index = 0
+    
+    @property
+    def finished(self):
+        return self.index >= len(self.events)
+    
+    def rewind(self):
+        self.index = 0
+    
+    def seek(self, t):
+        # Anahtar kare yok: durum t'ye kadarki tüm olaylardan çıkarılmalı
+        self.index = bisect.bisect_right(self.times, t)
+        return None, self.events[:self.index]
+    
+    def read_until(self, t):
+        end = bisect.bisect_right(self.times, t, self.index)
+        events = self.events[self.index:end]
+        self.index = max(self.index, end)
+        return events
+    
+    def take_frame(self):
+        # Eski kayıtlarda kare kaydı yok
+        return None
+    
+    def close(self):
+        pass
+
+
+def open_replay(path):
+    """Dosya biçimine göre okuyucu aç"""
+    with open(path, 'rb') as f:
+        binary = f.read(len(MAGIC)) == MAGIC
+    return ReplayReader(path) if binary else JsonReplayReader(path)
 
 
 class ReplayManager:
     """Görev kayıt ve tekrar oynatma yöneticisi"""
     
-    def __init__(self):
+    def __init__(self, folder="replays", fsync_interval=1.0, queue_size=10000, keyframe_interval=2.0):
+        self.folder = folder
+        self.fsync_interval = fsync_interval
+        self.queue_size = queue_size
+        self.keyframe_interval = keyframe_interval
+        self.state_provider = None  # () -> {'mode', 'pan', 'tilt', 'kill_count'}
         self.recording = False
-        self.replay_data = []
+        self.writer = None
+        self.filepath = None
+        self.event_count = 0
+        self.frame_count = 0
+        self.video_path = None      # Kare kayıtlarının ait olduğu video kaydı
         self.start_time = None
         self.current_replay = None
-        self.replay_index = 0
+        
+        # Oynatma saati (kayıt zamanı = konum + geçen süre * hız)
+        self.speed = 1.0
+        self.playing = False
+        self.play_position = 0.0
+        self.play_started = None
+    
+    @classmethod
+    def from_settings(cls, settings=None):
+        """config/settings.json 'replay' bölümünden oluştur"""
+        settings = settings or get_section("replay", DEFAULT_REPLAY_SETTINGS)
+        return cls(settings["folder"], settings["fsync_interval"], settings["queue_size"],
+                   settings["keyframe_interval"])
+    
+    def set_state_provider(self, provider):
+        """Anahtar karelere yazılacak durumun kaynağı (yazma thread'inden çağrılır)"""
+        self.state_provider = provider
         
     def start_recording(self):
-        """Kayıt başlat"""
-        self.recording = True
-        self.replay_data = []
+        """Kayıt başlat (olaylar doğrudan dosyaya akar)"""
+        if self.recording:
+            return
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.filepath = os.path.join(self.folder, f"replay_{timestamp}.replay")
+        self.writer = ReplayWriter(self.filepath, self.fsync_interval, self.queue_size, self.keyframe_interval,
+                                   self.keyframe if self.state_provider is not None else None)
+        self.event_count = 0
+        self.frame_count = 0
+        self.video_path = None
         self.start_time = time.time()
-        print("📹 Görev kaydı başladı")
+        self.writer.start({"version": "2.0", "started_at": datetime.now().isoformat(timespec="milliseconds")})
+        self.recording = True
+        print(f"📹 Görev kaydı başladı: {self.filepath}")
     
     def stop_recording(self):
         """Kayıt durdur"""
+        if not self.recording:
+            return
         self.recording = False
-        print(f"⏹ Görev kaydı durduruldu - {len(self.replay_data)} olay kaydedildi")
+        self.writer.stop()
+        stats = self.writer.get_stats()["replay"]
+        print(f"⏹ Görev kaydı durduruldu - {self.event_count} olay, {self.frame_count} kare kaydedildi"
+              + (f", {stats['dropped']} olay düştü" if stats["dropped"] else ""))
+    
+    def keyframe(self):
+        """Anahtar kare: (kayıt zamanı, durum); seek sonrası hangi videonun oynatılacağı da yazılır"""
+        state = self.state_provider()
+        state["video"] = self.video_path
+        return time.time() - self.start_time, state
     
     def record_event(self, event_type, data):
-        """Olay kaydet"""
+        """Olay kaydet (sadece kuyruğa alınır)"""
         if not self.recording:
             return
         
         timestamp = time.time() - self.start_time
-        event = {
-            "timestamp": timestamp,
-            "type": event_type,
-            "data": data
-        }
-        self.replay_data.append(event)
+        if self.writer.write(timestamp, KIND_EVENT, {"type": event_type, "data": data}):
+            self.event_count += 1
+    
+    def record_frame(self, video_path, video_frame, data):
+        """
+        Kaydedilen video karesinin tespit/iz/pan-tilt kaydı (kamera thread'inden çağrılır).
+        video_frame, VideoEncoder.write()'ın verdiği kare numarasıdır.
+        """
+        if not self.recording:
+            return
+        if video_path != self.video_path:
+            self.video_path = video_path
+            self.record_event("video", {"path": video_path, "first_frame": video_frame})
+        
+        timestamp = time.time() - self.start_time
+        data["video_frame"] = video_frame
+        if self.writer.write(timestamp, KIND_FRAME, {"type": "frame", "data": data}):
+            self.frame_count += 1
     
     def save_replay(self, filepath=None):
-        """Kaydı dosyaya kaydet"""
-        if not self.replay_data:
+        """
+        Kaydı sonlandır; dosya kayıt boyunca zaten yazıldığı için sadece yolu döndürür
+        (filepath verilirse dosya oraya taşınır)
+        """
+        self.stop_recording()
+        if self.filepath is None or not os.path.exists(self.filepath):
             print("❌ Kaydedilecek veri yok")
             return None
-        
-        if filepath is None:
-            os.makedirs("replays", exist_ok=True)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filepath = f"replays/replay_{timestamp}.json"
-        
-        replay_file = {
-            "version": "1.0",
-            "duration": self.replay_data[-1]["timestamp"] if self.replay_data else 0,
-            "events": self.replay_data
-        }
-        
-        try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(replay_file, f, indent=2)
-            print(f"💾 Replay kaydedildi: {filepath}")
-            return filepath
-        except Exception as e:
-            print(f"❌ Replay kaydetme hatası: {e}")
+        if self.event_count == 0 and self.frame_count == 0:
+            os.remove(self.filepath)
+            self.filepath = None
+            print("❌ Kaydedilecek veri yok")
             return None
+        
+        if filepath is not None and filepath != self.filepath:
+            try:
+                folder = os.path.dirname(filepath)
+                if folder:
+                    os.makedirs(folder, exist_ok=True)
+                os.replace(self.filepath, filepath)
+                self.filepath = filepath
+            except Exception as e:
+                print(f"❌ Replay kaydetme hatası: {e}")
+                return None
+        print(f"💾 Replay kaydedildi: {self.filepath}")
+        return self.filepath
     
     def load_replay(self, filepath):
-        """Kaydı yükle"""
+        """Kaydı aç (olaylar oynatma ilerledikçe okunur; eski JSON kayıtları da açılır)"""
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                self.current_replay = json.load(f)
-            self.replay_index = 0
-            print(f"📂 Replay yüklendi: {filepath}")
-            print(f"   Süre: {self.current_replay['duration']:.1f}s")
-            print(f"   Olaylar: {len(self.current_replay['events'])}")
-            return True
+            replay = open_replay(filepath)
         except Exception as e:
             print(f"❌ Replay yükleme hatası: {e}")
             return False
+        if self.current_replay is not None:
+            self.current_replay.close()
+        self.current_replay = replay
+        self.playing = False
+        self.play_position = 0.0
+        print(f"📂 Replay yüklendi: {filepath}")
+        print(f"   Süre: {replay.duration:.1f}s")
+        return True
     
     def get_next_event(self, current_time):
         """Belirli zamandaki olayları getir"""
         if not self.current_replay:
             return None
         
-        events = []
-        while self.replay_index < len(self.current_replay['events']):
-            event = self.current_replay['events'][self.replay_index]
-            if event['timestamp'] <= current_time:
-                events.append(event)
-                self.replay_index += 1
-            else:
-                break
-        
+        events = self.current_replay.read_until(current_time)
         return events if events else None
     
     def is_replay_finished(self):
         """Replay bitti mi?"""
         if not self.current_replay:
             return True
-        return self.replay_index >= len(self.current_replay['events'])
+        return self.current_replay.finished
     
     def get_replay_duration(self):
         """Replay süresi"""
         if not self.current_replay:
             return 0
-        return self.current_replay.get('duration', 0)
+        return self.current_replay.duration
     
     def reset_replay(self):
         """Replay'i başa sar"""
-        self.replay_index = 0
\ No newline at end of file
+        if self.current_replay:
+            self.current_replay.rewind()
+        self.play_position = 0.0
+        if self.playing:
+            self.play_started = time.perf_counter()
+    
+    def seek(self, t):
+        """
+        Oynatmayı t saniyesine taşı.
+        Dönüş: (t'den önceki son durum ya da None, o durumdan t'ye kadarki olaylar)
+        """
+        if not self.current_replay:
+            return None, []
+        t = min(max(t, 0.0), self.current_replay.duration)
+        self.play_position = t
+        if self.playing:
+            self.play_started = time.perf_counter()
+        return self.current_replay.seek(t)
+    
+    def set_speed(self, speed):
+        """Oynatma hızı (0.25x - 16x)"""
+        if not PLAYBACK_SPEEDS[0] <= speed <= PLAYBACK_SPEEDS[-1]:
+            raise ValueError(f"Oynatma hızı {PLAYBACK_SPEEDS[0]}x - {PLAYBACK_SPEEDS[-1]}x aralığında olmalı")
+        # Saat kaymasın: o ana kadarki konum sabitlenir
+        self.play_position = self.playback_time()
+        if self.playing:
+            self.play_started = time.perf_counter()
+        self.speed = speed
+    
+    def play(self):
+        """Oynatmayı başlat/sürdür"""
+        if not self.playing:
+            self.playing = True
+            self.play_started = time.perf_counter()
+    
+    def pause(self):
+        """Oynatmayı duraklat"""
+        if self.playing:
+            self.play_position = self.playback_time()
+            self.playing = False
+    
+    def playback_time(self):
+        """Oynatma saatinin gösterdiği kayıt zamanı (s)"""
+        if not self.playing:
+            return self.play_position
+        position = self.play_position + (time.perf_counter() - self.play_started) * self.speed
+        return min(position, self.get_replay_duration())
+    
+    def poll(self):
+        """Oynatma saatine kadar gelmiş olaylar (zamanlayıcıdan çağrılır)"""
+        return self.get_next_event(self.playback_time())
+    
+    def take_frame(self):
+        """Oynatma saatine kadar geçilen en yeni kare kaydı (yoksa None)"""
+        if not self.current_replay:
+            return None
+        return self.current_replay.take_frame()
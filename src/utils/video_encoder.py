@@ -0,0 +1,366 @@
+import json
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from utils.config import get_section
+from utils.perf_stats import LatencyTracker
+
+
+DEFAULT_ENCODER_SETTINGS = {
+    "video_codec": "mp4v",
+    "encoder_backend": "opencv",
+    "encoder_queue_size": 60,
+    "encoder_policy": "drop",
+    "encoder_block_timeout": 0.1,
+    "ffmpeg_path": "ffmpeg",
+    "ffmpeg_codec": "libx264",
+    "ffmpeg_preset": "ultrafast",
+    "ffmpeg_crf": 23,
+    "segment_seconds": 60,
+    "segment_megabytes": 0
+}
+
+
+class OpenCVWriter:
+    """cv2.VideoWriter ile kodlama"""
+
+    def __init__(self, path, fps, size, codec="mp4v"):
+        self.path = path
+        self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*codec), fps, size)
+
+    def is_open(self):
+        return self.writer.isOpened()
+
+    def write(self, frame):
+        self.writer.write(frame)
+
+    def close(self):
+        self.writer.release()
+
+
+class FfmpegWriter:
+    """
+    Ham BGR kareleri ffmpeg sürecine boru ile aktarır; kodlama ayrı süreçte yapılır.
+    codec donanım kodlayıcı da olabilir (örn. h264_nvenc, h264_v4l2m2m; crf None olmalı).
+    """
+
+    def __init__(self, path, fps, size, ffmpeg_path="ffmpeg", codec="libx264", preset="ultrafast", crf=23):
+        self.path = path
+        width, height = size
+        command = [
+            ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{width}x{height}", "-r", f"{fps}",
+            "-i", "-",
+            "-c:v", codec
+        ]
+        if preset:
+            command += ["-preset", preset]
+        if crf is not None:
+            command += ["-crf", str(crf)]
+        command += ["-pix_fmt", "yuv420p", path]
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE)
+
+    def is_open(self):
+        return self.process.poll() is None
+
+    def write(self, frame):
+        self.process.stdin.write(np.ascontiguousarray(frame).data)
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=10.0)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class VideoEncoder:
+    """
+    Kayıt kodlayıcı worker'ı: kareler sınırlı kuyruğa kopyalanır, kodlama ayrı thread'de
+    (ffmpeg'de ayrı süreçte) yapılır; kamera döngüsü kodlayıcıyı hiç beklemez.
+    Kuyruk doluysa politika 'drop' kareyi atar, 'block' en fazla block_timeout kadar bekler.
+    Kuyruk tamponları önceden ayrılır ve yeniden kullanılır.
+
+    segment_seconds / segment_megabytes verilirse kayıt parçalara bölünür
+    (video_X_000.mp4, video_X_001.mp4, ...) ve her parça kapandıkça video_X.index.json
+    güncellenir; süreç çökse bile kapanmış parçalar oynatılabilir kalır.
+    """
+
+    def __init__(self, path, fps, size, backend="opencv", codec="mp4v", queue_size=60, policy="drop",
+                 block_timeout=0.1, ffmpeg_path="ffmpeg", ffmpeg_codec="libx264", ffmpeg_preset="ultrafast",
+                 ffmpeg_crf=23, segment_seconds=0, segment_megabytes=0):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Bilinmeyen kuyruk politikası: {policy}")
+        self.path = path
+        self.fps = fps
+        self.size = (int(size[0]), int(size[1]))  # (genişlik, yükseklik)
+        self.backend = backend
+        self.codec = codec
+        self.queue_size = max(1, queue_size)
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.ffmpeg_options = {"ffmpeg_path": ffmpeg_path, "codec": ffmpeg_codec,
+                               "preset": ffmpeg_preset, "crf": ffmpeg_crf}
+
+        # Parçalama (ikisi de 0 ise tek dosya); süre kare sayısından hesaplanır
+        self.segment_frames = int(segment_seconds * fps) if segment_seconds else 0
+        self.segment_bytes = int(segment_megabytes * 1024 * 1024) if segment_megabytes else 0
+        self.segmented = bool(self.segment_frames or self.segment_bytes)
+        root, self.extension = os.path.splitext(path)
+        self.index_path = f"{root}.index.json" if self.segmented else None
+        self.segments = []          # Kapanmış parçalar
+        self.segment = None         # Yazılan parça
+        self.started_at = None
+        self.started_at_wall = None
+
+        self.writer = None
+        self.free = queue.Queue()       # Kodlayıcının bıraktığı tamponlar
+        self.pending = queue.Queue()    # Kodlanmayı bekleyen (tampon, zaman)
+        self.allocated = 0
+        self.running = False
+        self.thread = None
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.frames_submitted = 0
+        self.frames_queued = 0      # Kabul edilen kareler: video kare numarası buradan verilir
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.frames_blocked = 0     # Kuyruk dolu olduğu için beklenen kareler
+        self.write_errors = 0
+        self.max_depth = 0
+
+    @classmethod
+    def from_settings(cls, path, fps, size, settings=None, **kwargs):
+        """config/settings.json 'recording' bölümünden oluştur"""
+        settings = settings or get_section("recording", DEFAULT_ENCODER_SETTINGS)
+        options = {
+            "backend": settings["encoder_backend"],
+            "codec": settings["video_codec"],
+            "queue_size": settings["encoder_queue_size"],
+            "policy": settings["encoder_policy"],
+            "block_timeout": settings["encoder_block_timeout"],
+            "ffmpeg_path": settings["ffmpeg_path"],
+            "ffmpeg_codec": settings["ffmpeg_codec"],
+            "ffmpeg_preset": settings["ffmpeg_preset"],
+            "ffmpeg_crf": settings["ffmpeg_crf"],
+            "segment_seconds": settings["segment_seconds"],
+            "segment_megabytes": settings["segment_megabytes"]
+        }
+        options.update(kwargs)
+        return cls(path, fps, size, **options)
+
+    @property
+    def output_path(self):
+        """Kaydın adresi: parçalıysa indeks dosyası, değilse video dosyası"""
+        return self.index_path if self.segmented else self.path
+
+    def open_writer(self, path):
+        """Seçilen arka ucu aç (ffmpeg bulunamazsa OpenCV'ye düşer)"""
+        if self.backend == "ffmpeg":
+            if shutil.which(self.ffmpeg_options["ffmpeg_path"]):
+                writer = FfmpegWriter(path, self.fps, self.size, **self.ffmpeg_options)
+                if writer.is_open():
+                    return writer
+            print("⚠ ffmpeg bulunamadı, OpenCV kodlayıcı kullanılıyor")
+            self.backend = "opencv"
+        return OpenCVWriter(path, self.fps, self.size, self.codec)
+
+    def open_segment(self, timestamp):
+        """Sıradaki parçayı aç (açılamazsa False)"""
+        if self.segmented:
+            root = os.path.splitext(self.path)[0]
+            path = f"{root}_{len(self.segments):03d}{self.extension}"
+        else:
+            path = self.path
+        writer = self.open_writer(path)
+        if not writer.is_open():
+            print(f"❌ Video dosyası açılamadı: {path}")
+            return False
+        self.writer = writer
+        self.segment = {
+            "file": os.path.basename(path),
+            "first_frame": self.frames_written,
+            "frames": 0,
+            "start": timestamp - self.started_at
+        }
+        self.write_index()
+        return True
+
+    def segment_path(self):
+        """Yazılan parçanın tam yolu"""
+        return os.path.join(os.path.dirname(self.path), self.segment["file"])
+
+    def close_segment(self, timestamp):
+        """Yazılan parçayı kapat ve indekse ekle"""
+        if self.segment is None:
+            return
+        self.writer.close()
+        path = self.segment_path()
+        self.segment["end"] = timestamp - self.started_at
+        self.segment["bytes"] = os.path.getsize(path) if os.path.exists(path) else 0
+        self.segments.append(self.segment)
+        self.segment = None
+
+    def segment_full(self):
+        """Yazılan parça süre ya da boyut sınırına ulaştı mı"""
+        if self.segment_frames and self.segment["frames"] >= self.segment_frames:
+            return True
+        if self.segment_bytes and self.segment["frames"] % 30 == 29:
+            # Dosya boyutu her karede değil, ara ara okunur
+            path = self.segment_path()
+            return os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes
+        return False
+
+    def write_index(self, complete=False):
+        """Parça listesini indeks dosyasına yaz (geçici dosya + rename ile yarım kalmaz)"""
+        if not self.segmented:
+            return
+        segments = list(self.segments)
+        if self.segment is not None:
+            segments.append(dict(self.segment, open=True))
+        index = {
+            "started_at": self.started_at_wall,
+            "fps": self.fps,
+            "size": list(self.size),
+            "complete": complete,
+            "frames": self.frames_written,
+            "segments": segments
+        }
+        temporary = self.index_path + ".tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, indent=2)
+        os.replace(temporary, self.index_path)
+
+    def start(self):
+        """Dosyayı aç ve kodlayıcı thread'ini başlat (açılamazsa False)"""
+        if self.running:
+            return True
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self.started_at = time.perf_counter()
+        self.started_at_wall = datetime.now().isoformat(timespec="milliseconds")
+        if not self.open_segment(self.started_at):
+            return False
+
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return True
+
+    def stop(self):
+        """Kuyruktaki kareleri yaz, dosyayı kapat"""
+        if not self.running:
+            return
+        self.running = False
+        self.pending.put(None)
+        if self.thread is not None:
+            self.thread.join(timeout=30.0)
+            self.thread = None
+        self.close_segment(time.perf_counter())
+        self.write_index(complete=True)
+
+    def write(self, frame, timestamp=None):
+        """
+        Kareyi kodlama kuyruğuna kopyala (çağıran thread'de sadece kopya).
+        Dönüş: karenin kayıttaki numarası (0'dan, parçalar boyunca artan; indeksteki
+        first_frame ile aynı sayaç) ya da politika gereği atıldıysa None.
+        """
+        if not self.running:
+            return None
+        self.frames_submitted += 1
+
+        buffer = self.acquire_buffer(frame)
+        if buffer is None:
+            self.frames_dropped += 1
+            return None
+
+        np.copyto(buffer, frame)
+        video_frame = self.frames_queued
+        self.frames_queued += 1
+        self.pending.put((buffer, timestamp if timestamp is not None else time.perf_counter()))
+        self.max_depth = max(self.max_depth, self.pending.qsize())
+        return video_frame
+
+    def acquire_buffer(self, frame):
+        """Boş kuyruk tamponu (gerekirse ayırır); politika gereği alınamazsa None"""
+        try:
+            buffer = self.free.get_nowait()
+        except queue.Empty:
+            if self.allocated < self.queue_size:
+                self.allocated += 1
+                return np.empty_like(frame)
+            if self.policy == "drop":
+                return None
+            self.frames_blocked += 1
+            block_start = time.perf_counter()
+            try:
+                buffer = self.free.get(timeout=self.block_timeout)
+            except queue.Empty:
+                return None
+            finally:
+                self.latency.record_since("block", block_start)
+
+        if buffer.shape != frame.shape or buffer.dtype != frame.dtype:
+            buffer = np.empty_like(frame)
+        return buffer
+
+    def run(self):
+        """Kodlayıcı thread'i: kuyruktaki kareleri sırayla yazar"""
+        width, height = self.size
+        while True:
+            item = self.pending.get()
+            if item is None:
+                break
+            buffer, timestamp = item
+            encode_start = time.perf_counter()
+            self.latency.record("queue", (encode_start - timestamp) * 1000.0)
+            try:
+                if self.segment is None:
+                    # Önceki parça açılamadı: kareler yazılamıyor
+                    self.write_errors += 1
+                    continue
+                if self.segmented and self.segment_full():
+                    # Parça sınırı: kapat, indeksi güncelle, yenisini aç
+                    self.close_segment(timestamp)
+                    if not self.open_segment(timestamp):
+                        self.write_errors += 1
+                        continue
+                frame = buffer
+                if frame.shape[1] != width or frame.shape[0] != height:
+                    frame = cv2.resize(frame, (width, height))
+                self.writer.write(frame)
+                self.frames_written += 1
+                self.segment["frames"] += 1
+            except Exception as e:
+                self.write_errors += 1
+                print(f"❌ Kodlama hatası: {e}")
+            finally:
+                self.free.put(buffer)
+            self.latency.record_since("encode", encode_start)
+
+    def get_stats(self):
+        """Kodlama gecikmeleri ve kare sayaçları"""
+        stats = self.latency.get_stats()
+        stats["encoder"] = {
+            "backend": self.backend,
+            "policy": self.policy,
+            "submitted": self.frames_submitted,
+            "written": self.frames_written,
+            "dropped": self.frames_dropped,
+            "blocked": self.frames_blocked,
+            "errors": self.write_errors,
+            "queue_depth": self.pending.qsize(),
+            "max_queue_depth": self.max_depth,
+            "segments": len(self.segments) + (1 if self.segment is not None else 0)
+        }
+        return stats
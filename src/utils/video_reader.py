@@ -0,0 +1,104 @@
+import bisect
+import json
+import os
+import time
+
+import cv2
+
+from utils.perf_stats import LatencyTracker
+
+
+class RecordingReader:
+    """
+    Video kaydını kare numarasıyla okur: parçalı kayıtta indeks dosyası (video_X.index.json),
+    değilse tek video dosyası. Sadece istenen kareler çözülür; kısa ileri atlamalarda
+    aradaki kareler grab() ile geçilir, uzak ya da geri atlamalarda konum ayarlanır.
+    """
+
+    def __init__(self, path, max_skip=30):
+        self.path = path
+        self.max_skip = max_skip
+        folder = os.path.dirname(path)
+        if path.endswith(".index.json"):
+            with open(path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self.fps = index["fps"]
+            self.segments = [(segment["first_frame"], os.path.join(folder, segment["file"]))
+                             for segment in index["segments"]]
+        else:
+            self.fps = None
+            self.segments = [(0, path)]
+        self.first_frames = [first for first, _ in self.segments]
+
+        self.cap = None
+        self.segment = None     # Açık parçanın sırası
+        self.next_frame = None  # Açık parçada bir sonraki okunacak karenin numarası
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.frames_decoded = 0
+        self.frames_skipped = 0
+        self.seeks = 0
+
+    def open_segment(self, segment):
+        """Parçayı aç (açılamazsa False; örn. çökmede kapanmamış son parça)"""
+        if self.cap is not None:
+            self.cap.release()
+        self.cap = cv2.VideoCapture(self.segments[segment][1])
+        self.segment = segment
+        self.next_frame = self.segments[segment][0]
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+        if self.fps is None:
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+        return True
+
+    def read(self, video_frame):
+        """video_frame numaralı kareyi çöz (yoksa None)"""
+        segment = bisect.bisect_right(self.first_frames, video_frame) - 1
+        if segment < 0:
+            return None
+        if segment != self.segment or self.cap is None:
+            if not self.open_segment(segment):
+                return None
+
+        read_start = time.perf_counter()
+        skip = video_frame - self.next_frame
+        if skip < 0 or skip > self.max_skip:
+            # Geri ya da uzak atlama: parça içinde konumlan
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, video_frame - self.segments[segment][0])
+            self.next_frame = video_frame
+            self.seeks += 1
+        else:
+            # Yakın atlama: aradaki kareleri çözmeden geç
+            for _ in range(skip):
+                if not self.cap.grab():
+                    return None
+            self.frames_skipped += skip
+            self.next_frame = video_frame
+
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.next_frame += 1
+        self.frames_decoded += 1
+        self.latency.record_since("decode", read_start)
+        return frame
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+        self.segment = None
+
+    def get_stats(self):
+        """Kare okuma süresi ve çözülen/atlanan kare sayaçları"""
+        stats = self.latency.get_stats()
+        stats["video"] = {
+            "decoded": self.frames_decoded,
+            "skipped": self.frames_skipped,
+            "seeks": self.seeks,
+            "segments": len(self.segments)
+        }
+        return stats
@@ -0,0 +1,156 @@
+import os
+import time
+import cv2
+import numpy as np
+
+
+# Sınıf indeksleri (0 = tanımsız)
+COLOR_NAMES = ["tanımsız", "kırmızı", "mavi", "yeşil", "sarı"]
+
+# OpenCV HSV aralıkları (H: 0-179)
+DEFAULT_HSV_RULES = {
+    "kırmızı": [(0, 10), (160, 180)],
+    "sarı": [(20, 36)],
+    "yeşil": [(36, 86)],
+    "mavi": [(90, 131)]
+}
+
+
+class ColorClassifier:
+    """
+    Arama tablosu (LUT) tabanlı balon renk sınıflandırıcı.
+    Nicemlenmiş BGR -> renk sınıfı tablosu başlangıçta bir kez kurulur;
+    bir kutunun pikselleri tek NumPy indeksleme geçişi ve histogramla sınıflanır.
+    """
+
+    def __init__(self, bits=5, min_saturation=80, min_value=60, min_ratio=0.15,
+                 min_coverage=0.2, hsv_rules=None, stride=2):
+        self.bits = bits
+        self.shift = 8 - bits
+        self.min_saturation = min_saturation
+        self.min_value = min_value
+        self.min_ratio = min_ratio      # baskın rengin renkli pikseller içindeki asgari oranı
+        self.min_coverage = min_coverage  # renkli piksellerin tüm kutu içindeki asgari oranı
+        self.hsv_rules = hsv_rules or DEFAULT_HSV_RULES
+        self.stride = stride            # kutu içinde piksel atlama (hız için)
+        self.lut = self.build_lut()
+        self.flat_lut = self.lut.ravel()
+
+    def build_lut(self):
+        """(2^bits)^3 hücrelik BGR -> sınıf tablosunu kur"""
+        levels = 1 << self.bits
+        # Hücre merkezleri
+        values = (np.arange(levels, dtype=np.uint16) << self.shift) + (1 << self.shift) // 2
+        values = np.clip(values, 0, 255).astype(np.uint8)
+        b, g, r = np.meshgrid(values, values, values, indexing="ij")
+        grid = np.stack((b, g, r), axis=-1).reshape(-1, 1, 3)
+
+        # Tüm tablo için tek seferlik HSV dönüşümü
+        hsv = cv2.cvtColor(grid, cv2.COLOR_BGR2HSV).reshape(-1, 3)
+        hue, saturation, value = hsv[:, 0], hsv[:, 1], hsv[:, 2]
+        colorful = (saturation >= self.min_saturation) & (value >= self.min_value)
+
+        lut = np.zeros(len(hsv), dtype=np.uint8)
+        for class_index, name in enumerate(COLOR_NAMES):
+            for low, high in self.hsv_rules.get(name, []):
+                lut[colorful & (hue >= low) & (hue < high)] = class_index
+        return lut.reshape(levels, levels, levels)
+
+    def class_map(self, pixels):
+        """Her piksel için renk sınıfı indeksi (tek LUT geçişi)"""
+        quantized = (pixels >> self.shift).astype(np.uint16)
+        index = (quantized[..., 0] << (2 * self.bits)) | (quantized[..., 1] << self.bits) | quantized[..., 2]
+        return self.flat_lut[index]
+
+    def histogram(self, pixels):
+        """Piksel dizisinin (…, 3) sınıf histogramı"""
+        return np.bincount(self.class_map(pixels).ravel(), minlength=len(COLOR_NAMES))
+
+    def classify_histogram(self, counts):
+        """Histogramdan (renk, güven) sonucu"""
+        colored = counts[1:].sum()
+        if colored == 0 or colored < counts.sum() * self.min_coverage:
+            return COLOR_NAMES[0], 0.0
+        best = int(np.argmax(counts[1:])) + 1
+        ratio = counts[best] / colored
+        if ratio < self.min_ratio:
+            return COLOR_NAMES[0], float(ratio)
+        return COLOR_NAMES[best], float(ratio)
+
+    def classify(self, image, box=None):
+        """Kutunun (ya da tüm görüntünün) baskın rengini döndür: (renk, güven)"""
+        if box is not None:
+            x1, y1, x2, y2 = [int(v) for v in box]
+            image = image[max(0, y1):max(0, y2), max(0, x1):max(0, x2)]
+        if image.size == 0:
+            return COLOR_NAMES[0], 0.0
+        pixels = image[::self.stride, ::self.stride]
+        return self.classify_histogram(self.histogram(pixels))
+
+    def classify_boxes(self, frame, boxes):
+        """Bir karedeki tüm kutular için renk listesi"""
+        return [self.classify(frame, box) for box in boxes]
+
+
+def classify_reference(image, classifier):
+    """Karşılaştırma için klasik yol: kutu başına cvtColor ve maske"""
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    hue, saturation, value = hsv[..., 0], hsv[..., 1], hsv[..., 2]
+    colorful = (saturation >= classifier.min_saturation) & (value >= classifier.min_value)
+    counts = np.zeros(len(COLOR_NAMES), dtype=np.int64)
+    for class_index, name in enumerate(COLOR_NAMES):
+        for low, high in classifier.hsv_rules.get(name, []):
+            counts[class_index] += np.count_nonzero(colorful & (hue >= low) & (hue < high))
+    return classifier.classify_histogram(counts)
+
+
+def benchmark(folder, classifier=None, repeats=5):
+    """Klasördeki kırpımlar üzerinde LUT ve cvtColor yollarını karşılaştır"""
+    classifier = classifier or ColorClassifier(stride=1)
+    crops = []
+    for name in sorted(os.listdir(folder)):
+        if name.lower().endswith((".png", ".jpg", ".jpeg", ".bmp")):
+            image = cv2.imread(os.path.join(folder, name))
+            if image is not None:
+                crops.append((name, image))
+    if not crops:
+        print(f"❌ Kırpım bulunamadı: {folder}")
+        return None
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        lut_results = [classifier.classify(image) for _, image in crops]
+    lut_ms = (time.perf_counter() - start) * 1000.0 / (repeats * len(crops))
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        reference_results = [classify_reference(image, classifier) for _, image in crops]
+    reference_ms = (time.perf_counter() - start) * 1000.0 / (repeats * len(crops))
+
+    agreement = sum(a[0] == b[0] for a, b in zip(lut_results, reference_results)) / len(crops)
+    return {
+        "crops": len(crops),
+        "lut_ms": lut_ms,
+        "reference_ms": reference_ms,
+        "speedup": reference_ms / lut_ms if lut_ms > 0 else 0.0,
+        "agreement": agreement,
+        "results": {name: result for (name, _), result in zip(crops, lut_results)}
+    }
+
+
+if __name__ == "__main__":
+    # Örnek: python -m vision.color_classifier crops/
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Kullanım: python -m vision.color_classifier <kırpım klasörü>")
+        raise SystemExit(1)
+
+    report = benchmark(sys.argv[1])
+    if report is None:
+        raise SystemExit(1)
+    for name, (color, confidence) in report["results"].items():
+        print(f"{name}: {color} ({confidence:.2f})")
+    print(f"Kırpım: {report['crops']}  LUT: {report['lut_ms']:.3f} ms  "
+          f"cvtColor: {report['reference_ms']:.3f} ms  "
+          f"Hızlanma: {report['speedup']:.1f}x  Uyum: {report['agreement'] * 100:.0f}%")
@@ -0,0 +1,674 @@
+import ast
+import threading
+from abc import ABC, abstractmethod
+import time
+import cv2
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from utils.config import get_section
+from utils.math_utils import box_iou
+from utils.perf_stats import LatencyTracker
+
+
+DEFAULT_DETECTOR_SETTINGS = {
+    "backend": "ultralytics",
+    "model": "models/yolov8n.pt",
+    "onnx_model": "models/yolov8n.onnx",
+    "onnx_int8_model": "models/yolov8n_int8.onnx",
+    "int8": False,
+    "confidence": 0.5,
+    "iou": 0.45,
+    "imgsz": 640,
+    "device": "cpu",
+    "threads": 4,
+    "roi_full_scan_interval": 10,
+    "roi_margin": 1.5,
+    "roi_min_size": 96,
+    "roi_max_count": 4
+}
+
+
+class DetectionResult:
+    """Tek bir karenin tespit sonuçları"""
+
+    def __init__(self, frame_id, capture_time, boxes, scores, class_ids, labels,
+                 inference_start, inference_end, mode="full"):
+        self.frame_id = frame_id
+        self.capture_time = capture_time      # time.perf_counter() (kamera ile aynı saat)
+        self.boxes = boxes                    # (N, 4) float32, x1 y1 x2 y2 piksel
+        self.scores = scores                  # (N,) float32
+        self.class_ids = class_ids            # (N,) int32
+        self.labels = labels                  # sınıf id -> isim
+        self.inference_start = inference_start
+        self.inference_end = inference_end
+        self.mode = mode                      # "full" veya "roi"
+        self.attributes = None                # kutu başına renk/şekil (sınıflandırıcı varsa)
+        self.wall_time = time.time()
+
+    def __len__(self):
+        return len(self.boxes)
+
+    @property
+    def inference_ms(self):
+        """Sadece model çıkarım süresi"""
+        return (self.inference_end - self.inference_start) * 1000.0
+
+    @property
+    def total_ms(self):
+        """Kare yakalamadan sonuç yayınına kadar geçen süre"""
+        return (self.inference_end - self.capture_time) * 1000.0
+
+    def to_list(self):
+        """Kayıt/log için sade liste"""
+        detections = []
+        for box, score, class_id in zip(self.boxes, self.scores, self.class_ids):
+            detections.append({
+                "bbox": [round(float(v), 1) for v in box],
+                "confidence": round(float(score), 3),
+                "class_id": int(class_id),
+                "label": self.labels.get(int(class_id), str(int(class_id)))
+            })
+        if self.attributes:
+            for detection, attributes in zip(detections, self.attributes):
+                detection.update(attributes)
+        return detections
+
+
+def nms_boxes(boxes, scores, class_ids, confidence, iou):
+    """Sınıf bazlı NMS (ultralytics varsayılanı ile aynı)"""
+    if len(boxes) == 0:
+        return boxes, scores, class_ids
+    rects = np.column_stack((boxes[:, :2], boxes[:, 2:] - boxes[:, :2])).tolist()
+    indices = cv2.dnn.NMSBoxesBatched(rects, scores.tolist(), class_ids.tolist(),
+                                      confidence, iou)
+    indices = np.array(indices, dtype=np.int64).reshape(-1)
+    return boxes[indices], scores[indices], class_ids[indices]
+
+
+class UltralyticsBackend:
+    """Referans arka uç: ultralytics (PyTorch) YOLO"""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path, imgsz, confidence, iou, device="cpu", threads=4):
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.confidence = confidence
+        self.iou = iou
+        self.device = device
+        self.threads = threads
+        self.model = None
+        self.labels = {}
+
+    def load(self):
+        """Modeli yükle"""
+        # ultralytics içe aktarması yavaş; sadece gerektiğinde yükle
+        import torch
+        from ultralytics import YOLO
+
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        self.model = YOLO(self.model_path)
+        self.labels = dict(self.model.names)
+
+    def detect(self, frame):
+        """BGR karede çıkarım yap: (boxes, scores, class_ids)"""
+        results = self.model.predict(
+            frame, imgsz=self.imgsz, conf=self.confidence, iou=self.iou,
+            device=self.device, verbose=False
+        )
+        boxes = results[0].boxes
+        return (
+            boxes.xyxy.cpu().numpy().astype(np.float32),
+            boxes.conf.cpu().numpy().astype(np.float32),
+            boxes.cls.cpu().numpy().astype(np.int32)
+        )
+
+
+class YoloOnnxBackend(ABC):
+    """
+    Dışa aktarılmış YOLOv8 ONNX modeli için ortak ön/son işleme.
+    Giriş tensörü ve letterbox tuvali bir kez ayrılır, her karede yeniden kullanılır.
+    Arka uçlar modeli yükleyen load() ve tensörü çalıştıran run() metodlarını uygular.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model_path, imgsz, confidence, iou, threads=4, labels=None):
+        self.model_path = model_path
+        self.imgsz = imgsz
+        self.confidence = confidence
+        self.iou = iou
+        self.threads = threads
+        self.labels = dict(labels or {})
+
+        # Önceden ayrılmış tamponlar
+        self.input_tensor = np.zeros((1, 3, imgsz, imgsz), dtype=np.float32)
+        self.canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+        self.letterbox = None  # (kaynak boyut, ölçek, sol, üst, yeni genişlik, yeni yükseklik)
+
+    def prepare_letterbox(self, frame_shape):
+        """Kaynak boyuta göre letterbox geometrisini hesapla (boyut değişince)"""
+        h, w = frame_shape[:2]
+        scale = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * scale)), int(round(h * scale))
+        left = (self.imgsz - new_w) // 2
+        top = (self.imgsz - new_h) // 2
+        self.canvas[:] = 114
+        self.letterbox = ((h, w), scale, left, top, new_w, new_h)
+
+    def preprocess(self, frame):
+        """BGR kareyi önceden ayrılmış NCHW RGB float32 tensöre yaz"""
+        if self.letterbox is None or self.letterbox[0] != frame.shape[:2]:
+            self.prepare_letterbox(frame.shape)
+        _, _, left, top, new_w, new_h = self.letterbox
+
+        self.canvas[top:top + new_h, left:left + new_w] = cv2.resize(
+            frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR
+        )
+        # BGR -> RGB, HWC -> CHW ve 0-1 ölçekleme tek geçişte
+        np.multiply(self.canvas[:, :, ::-1].transpose(2, 0, 1), 1.0 / 255.0,
+                    out=self.input_tensor[0], casting="unsafe")
+        return self.input_tensor
+
+    def postprocess(self, output):
+        """YOLOv8 çıktısını (1, 4+nc, N) kutu/skor/sınıf dizilerine çevir"""
+        predictions = np.squeeze(output, axis=0)
+        if predictions.shape[0] < predictions.shape[1]:
+            predictions = predictions.T  # (N, 4+nc)
+
+        class_scores = predictions[:, 4:]
+        class_ids = class_scores.argmax(axis=1)
+        scores = class_scores[np.arange(len(class_ids)), class_ids]
+        keep = scores >= self.confidence
+        if not np.any(keep):
+            return (np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                    np.zeros(0, np.int32))
+
+        boxes_xywh = predictions[keep, :4]
+        scores = scores[keep].astype(np.float32)
+        class_ids = class_ids[keep].astype(np.int32)
+
+        # Letterbox'ı geri al
+        _, scale, left, top, _, _ = self.letterbox
+        (h, w) = self.letterbox[0]
+        boxes = np.empty_like(boxes_xywh, dtype=np.float32)
+        boxes[:, 0] = (boxes_xywh[:, 0] - boxes_xywh[:, 2] / 2 - left) / scale
+        boxes[:, 1] = (boxes_xywh[:, 1] - boxes_xywh[:, 3] / 2 - top) / scale
+        boxes[:, 2] = (boxes_xywh[:, 0] + boxes_xywh[:, 2] / 2 - left) / scale
+        boxes[:, 3] = (boxes_xywh[:, 1] + boxes_xywh[:, 3] / 2 - top) / scale
+        np.clip(boxes[:, 0::2], 0, w, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, h, out=boxes[:, 1::2])
+
+        return nms_boxes(boxes, scores, class_ids, self.confidence, self.iou)
+
+    @abstractmethod
+    def load(self):
+        """Modeli yükle"""
+
+    @abstractmethod
+    def run(self, tensor):
+        """Ön işlenmiş tensörde modeli çalıştır, ham çıktıyı döndür"""
+
+    def detect(self, frame):
+        """BGR karede çıkarım yap: (boxes, scores, class_ids)"""
+        return self.postprocess(self.run(self.preprocess(frame)))
+
+
+class OnnxRuntimeBackend(YoloOnnxBackend):
+    """ONNX Runtime CPU arka ucu (INT8 nicemlenmiş modelleri de çalıştırır)"""
+
+    name = "onnxruntime"
+
+    def load(self):
+        """Oturumu oluştur"""
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            self.model_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+        # ultralytics dışa aktarımı sınıf isimlerini metadata'ya yazar
+        names = self.session.get_modelmeta().custom_metadata_map.get("names")
+        if names and not self.labels:
+            self.labels = {int(k): v for k, v in ast.literal_eval(names).items()}
+
+    def run(self, tensor):
+        return self.session.run(None, {self.input_name: tensor})[0]
+
+
+class OpenCVDnnBackend(YoloOnnxBackend):
+    """OpenCV DNN arka ucu (ek bağımlılık gerektirmez)"""
+
+    name = "opencv"
+
+    def load(self):
+        """Ağı oku"""
+        if self.threads:
+            cv2.setNumThreads(self.threads)
+        self.net = cv2.dnn.readNetFromONNX(self.model_path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def run(self, tensor):
+        self.net.setInput(tensor)
+        return self.net.forward()
+
+
+BACKENDS = {
+    "ultralytics": UltralyticsBackend,
+    "onnxruntime": OnnxRuntimeBackend,
+    "opencv": OpenCVDnnBackend
+}
+
+
+def quantize_model(model_path, output_path):
+    """ONNX modelini dinamik INT8 ağırlıklara dönüştür (onnxruntime gerekir)"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(model_path, output_path, weight_type=QuantType.QUInt8)
+    print(f"💾 INT8 model kaydedildi: {output_path}")
+    return output_path
+
+
+class Detector:
+    """Seçilen arka uçla modeli bir kez yükler ve CPU üzerinde tek karede çıkarım yapar"""
+
+    def __init__(self, model_path="models/yolov8n.pt", confidence=0.5, iou=0.45,
+                 imgsz=640, device="cpu", threads=4, backend="ultralytics", labels=None,
+                 roi_full_scan_interval=10, roi_margin=1.5, roi_min_size=96, roi_max_count=4):
+        self.model_path = model_path
+        self.confidence = confidence
+        self.iou = iou
+        self.imgsz = imgsz
+        self.device = device
+        self.threads = threads
+        self.backend_name = backend
+
+        if backend not in BACKENDS:
+            raise ValueError(f"Bilinmeyen dedektör arka ucu: {backend}")
+        if backend == "ultralytics":
+            self.backend = UltralyticsBackend(model_path, imgsz, confidence, iou, device, threads)
+        else:
+            self.backend = BACKENDS[backend](model_path, imgsz, confidence, iou, threads, labels)
+
+        # ROI (izlenen hedef çevresi) çıkarımı: kırpımlar tek bir mozaik girdide toplanır
+        self.roi_full_scan_interval = roi_full_scan_interval
+        self.roi_margin = roi_margin
+        self.roi_min_size = roi_min_size
+        self.roi_max_count = roi_max_count
+        self.mosaic = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+
+        self.labels = {}
+        self.loaded = False
+        self.load_error = None
+        self.load_lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """config/settings.json 'detector' bölümünden oluştur"""
+        settings = settings or get_section("detector", DEFAULT_DETECTOR_SETTINGS)
+        backend = settings["backend"]
+        model_path = settings["model"]
+        if backend != "ultralytics":
+            model_path = settings["onnx_int8_model"] if settings["int8"] else settings["onnx_model"]
+
+        labels = settings.get("labels")
+        if isinstance(labels, list):
+            labels = dict(enumerate(labels))
+
+        return cls(
+            model_path=model_path,
+            confidence=settings["confidence"],
+            iou=settings["iou"],
+            imgsz=settings["imgsz"],
+            device=settings["device"],
+            threads=settings["threads"],
+            backend=backend,
+            labels=labels,
+            roi_full_scan_interval=settings["roi_full_scan_interval"],
+            roi_margin=settings["roi_margin"],
+            roi_min_size=settings["roi_min_size"],
+            roi_max_count=settings["roi_max_count"]
+        )
+
+    def load(self):
+        """Modeli yükle (sadece ilk çağrıda yüklenir)"""
+        with self.load_lock:
+            if self.loaded:
+                return True
+
+            load_start = time.perf_counter()
+            try:
+                self.backend.load()
+                self.labels = self.backend.labels
+
+                # Isınma: ilk çıkarımın gecikmesi ölçümleri bozmasın
+                dummy = np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)
+                self.backend.detect(dummy)
+            except Exception as e:
+                self.load_error = str(e)
+                print(f"❌ AI modeli yüklenemedi: {e}")
+                return False
+
+            self.loaded = True
+            print(f"✅ AI modeli yüklendi: {self.model_path} [{self.backend_name}] "
+                  f"({(time.perf_counter() - load_start):.1f}s, {self.device})")
+            return True
+
+    def detect(self, frame):
+        """BGR karede çıkarım yap: (boxes, scores, class_ids)"""
+        return self.backend.detect(frame)
+
+    def expand_roi(self, roi, frame_w, frame_h):
+        """Tahmini kutuyu pay bırakarak kare pencereye genişlet ve kareye sığdır"""
+        x1, y1, x2, y2 = roi
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        size = max(x2 - x1, y2 - y1) * self.roi_margin
+        size = int(min(max(size, self.roi_min_size), frame_w, frame_h))
+        left = int(min(max(cx - size / 2, 0), frame_w - size))
+        top = int(min(max(cy - size / 2, 0), frame_h - size))
+        return left, top, left + size, top + size
+
+    def detect_rois(self, frame, rois):
+        """
+        Kırpım pencerelerini ızgara mozaiğe yerleştirip tek çıkarımda çalıştır,
+        kutuları kare koordinatlarına geri taşı. Pencere sayısı fazlaysa None döner.
+        """
+        if not rois or len(rois) > self.roi_max_count:
+            return None
+
+        frame_h, frame_w = frame.shape[:2]
+        grid = int(np.ceil(np.sqrt(len(rois))))
+        tile = self.imgsz // grid
+        self.mosaic[:] = 114
+
+        # Her karo: (karo x0, y0, ölçek, kırpım x1, y1, içerik genişliği, yüksekliği)
+        tiles = []
+        for index, roi in enumerate(rois):
+            cx1, cy1, cx2, cy2 = self.expand_roi(roi, frame_w, frame_h)
+            crop = frame[cy1:cy2, cx1:cx2]
+            scale = min(tile / crop.shape[1], tile / crop.shape[0])
+            content_w = int(crop.shape[1] * scale)
+            content_h = int(crop.shape[0] * scale)
+            tx = (index % grid) * tile
+            ty = (index // grid) * tile
+            self.mosaic[ty:ty + content_h, tx:tx + content_w] = cv2.resize(
+                crop, (content_w, content_h), interpolation=cv2.INTER_LINEAR
+            )
+            tiles.append((tx, ty, scale, cx1, cy1, content_w, content_h))
+
+        boxes, scores, class_ids = self.backend.detect(self.mosaic)
+        if len(boxes) == 0:
+            return boxes, scores, class_ids
+
+        # Kutuyu merkezinin düştüğü karoya ata, karoya kırp ve kare koordinatına taşı
+        centers = (boxes[:, :2] + boxes[:, 2:]) / 2
+        mapped = []
+        keep_scores = []
+        keep_classes = []
+        for tx, ty, scale, cx1, cy1, content_w, content_h in tiles:
+            inside = ((centers[:, 0] >= tx) & (centers[:, 0] < tx + content_w) &
+                      (centers[:, 1] >= ty) & (centers[:, 1] < ty + content_h))
+            if not np.any(inside):
+                continue
+            tile_boxes = boxes[inside].copy()
+            np.clip(tile_boxes[:, 0::2], tx, tx + content_w, out=tile_boxes[:, 0::2])
+            np.clip(tile_boxes[:, 1::2], ty, ty + content_h, out=tile_boxes[:, 1::2])
+            tile_boxes[:, 0::2] = (tile_boxes[:, 0::2] - tx) / scale + cx1
+            tile_boxes[:, 1::2] = (tile_boxes[:, 1::2] - ty) / scale + cy1
+            mapped.append(tile_boxes)
+            keep_scores.append(scores[inside])
+            keep_classes.append(class_ids[inside])
+
+        if not mapped:
+            return (np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                    np.zeros(0, np.int32))
+
+        # Örtüşen pencerelerden gelen kopya kutuları ele
+        return nms_boxes(np.concatenate(mapped).astype(np.float32),
+                         np.concatenate(keep_scores), np.concatenate(keep_classes),
+                         self.confidence, self.iou)
+
+
+def compare_backends(reference, candidate, frames, iou_threshold=0.5):
+    """
+    İki dedektörün aynı karelerdeki çıktılarını karşılaştır (eşdeğerlik kontrolü).
+    Kutular aynı sınıf içinde IoU ile birebir eşlenir (Macar algoritması); bir aday
+    kutusu tek bir referans kutusuna sayılır, eşleşmeyen adaylar fazla olarak raporlanır.
+    """
+    matched = 0
+    reference_total = 0
+    candidate_total = 0
+    score_diffs = []
+    ious = []
+    timings = {"reference": [], "candidate": []}
+
+    for frame in frames:
+        start = time.perf_counter()
+        ref_boxes, ref_scores, ref_classes = reference.detect(frame)
+        timings["reference"].append((time.perf_counter() - start) * 1000.0)
+
+        start = time.perf_counter()
+        cand_boxes, cand_scores, cand_classes = candidate.detect(frame)
+        timings["candidate"].append((time.perf_counter() - start) * 1000.0)
+
+        reference_total += len(ref_boxes)
+        candidate_total += len(cand_boxes)
+        if len(ref_boxes) == 0 or len(cand_boxes) == 0:
+            continue
+
+        iou = box_iou(ref_boxes, cand_boxes)
+        iou[ref_classes[:, None] != cand_classes[None, :]] = 0
+        rows, cols = linear_sum_assignment(-iou)
+        for i, j in zip(rows, cols):
+            if iou[i, j] >= iou_threshold:
+                matched += 1
+                ious.append(float(iou[i, j]))
+                score_diffs.append(abs(float(ref_scores[i]) - float(cand_scores[j])))
+
+    return {
+        "frames": len(timings["reference"]),
+        "reference_boxes": reference_total,
+        "candidate_boxes": candidate_total,
+        "matched": matched,
+        "extra": candidate_total - matched,
+        "recall": matched / reference_total if reference_total else 1.0,
+        "precision": matched / candidate_total if candidate_total else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 0.0,
+        "max_score_diff": max(score_diffs) if score_diffs else 0.0,
+        "reference_ms": float(np.mean(timings["reference"])) if timings["reference"] else 0.0,
+        "candidate_ms": float(np.mean(timings["candidate"])) if timings["candidate"] else 0.0
+    }
+
+
+class DetectionWorker:
+    """
+    Kameranın en-yeni-kare halkasından beslenen asenkron çıkarım thread'i.
+    Yakalama döngüsünü hiç bekletmez; model yavaşsa aradaki kareler atlanır.
+    """
+
+    def __init__(self, detector, frame_buffer, classifier=None):
+        self.detector = detector
+        self.frame_buffer = frame_buffer
+        self.classifier = classifier  # ShapeClassifier: kare sabitken renk/şekil
+        self.running = False
+        self.thread = None
+
+        self.latest_result = None
+        self.result_lock = threading.Lock()
+        self.listeners = []
+
+        # ROI kaynağı: provider(frame_id, timestamp) -> [(x1, y1, x2, y2), ...]
+        self.roi_provider = None
+        self.frames_since_full = 0
+
+        # Sayaçlar
+        self.latency = LatencyTracker()
+        self.frames_processed = 0
+        self.frames_skipped = 0
+        self.roi_frames = 0
+        self.full_frames = 0
+
+    def add_listener(self, callback):
+        """Her yeni sonuçta callback(result) çağrılır (worker thread'inden)"""
+        self.listeners.append(callback)
+
+    def set_roi_provider(self, provider):
+        """İzleyicinin tahmin ettiği pencereleri veren fonksiyonu bağla"""
+        self.roi_provider = provider
+
+    def next_rois(self, frame_id, timestamp):
+        """Bu karede ROI mi tam tarama mı yapılacağına karar ver"""
+        if self.roi_provider is None:
+            return None
+        # Yeni hedefleri kaçırmamak için her N karede bir tam tarama
+        if self.frames_since_full + 1 >= self.detector.roi_full_scan_interval:
+            return None
+        return self.roi_provider(frame_id, timestamp)
+
+    def start(self):
+        """Worker'ı başlat"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Worker'ı durdur"""
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def run(self):
+        """Thread'in ana döngüsü"""
+        if not self.detector.load():
+            self.running = False
+            return
+
+        last_id = -1
+        while self.running:
+            ref = self.frame_buffer.acquire_latest(last_id, timeout=0.5)
+            if ref is None:
+                continue
+
+            if last_id >= 0:
+                self.frames_skipped += ref.frame_id - last_id - 1
+            last_id = ref.frame_id
+
+            try:
+                rois = self.next_rois(ref.frame_id, ref.timestamp)
+                inference_start = time.perf_counter()
+                output = self.detector.detect_rois(ref.frame, rois) if rois else None
+                mode = "roi"
+                if output is None:
+                    output = self.detector.detect(ref.frame)
+                    mode = "full"
+                inference_end = time.perf_counter()
+
+                # Renk/şekil sınıflandırma aynı (sabitlenmiş) kare üzerinde, tüm kutular birlikte
+                attributes = None
+                if self.classifier is not None and len(output[0]):
+                    attributes = self.classifier.classify_frame(ref.frame, output[0])
+            except Exception as e:
+                print(f"❌ Çıkarım hatası: {e}")
+                continue
+            finally:
+                ref.release()
+
+            if mode == "roi":
+                self.roi_frames += 1
+                self.frames_since_full += 1
+            else:
+                self.full_frames += 1
+                self.frames_since_full = 0
+
+            boxes, scores, class_ids = output
+            result = DetectionResult(
+                ref.frame_id, ref.timestamp, boxes, scores, class_ids,
+                self.detector.labels, inference_start, inference_end, mode
+            )
+            result.attributes = attributes
+            self.publish(result)
+
+    def publish(self, result):
+        """Sonucu yayınla ve gecikmeleri kaydet"""
+        self.latency.record("inference", result.inference_ms)
+        self.latency.record(f"inference_{result.mode}", result.inference_ms)
+        self.latency.record("capture_to_result", result.total_ms)
+        self.frames_processed += 1
+
+        with self.result_lock:
+            self.latest_result = result
+
+        for callback in self.listeners:
+            try:
+                callback(result)
+            except Exception as e:
+                print(f"❌ Tespit dinleyici hatası: {e}")
+
+    def get_latest(self):
+        """Son tespit sonucu (yoksa None)"""
+        with self.result_lock:
+            return self.latest_result
+
+    def get_stats(self):
+        """Gecikme ve kare sayaçları"""
+        stats = self.latency.get_stats()
+        if self.classifier is not None:
+            stats.update(self.classifier.latency.get_stats())
+        stats["frames"] = {
+            "processed": self.frames_processed,
+            "skipped": self.frames_skipped,
+            "roi": self.roi_frames,
+            "full": self.full_frames,
+            "roi_ratio": self.roi_frames / self.frames_processed if self.frames_processed else 0.0
+        }
+        return stats
+
+
+def read_video_frames(path, max_frames=100, step=1):
+    """Karşılaştırma için videodan kare oku"""
+    frames = []
+    cap = cv2.VideoCapture(path)
+    index = 0
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if index % step == 0:
+            frames.append(frame)
+        index += 1
+    cap.release()
+    return frames
+
+
+if __name__ == "__main__":
+    # Örnek: python -m vision.detector recordings/video_x.mp4 --backend onnxruntime --int8
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Dedektör arka uç eşdeğerlik karşılaştırması")
+    parser.add_argument("video", help="Karşılaştırmada kullanılacak video")
+    parser.add_argument("--backend", default="onnxruntime", choices=["onnxruntime", "opencv"])
+    parser.add_argument("--int8", action="store_true", help="INT8 nicemlenmiş ONNX modelini kullan")
+    parser.add_argument("--frames", type=int, default=100)
+    args = parser.parse_args()
+
+    settings = get_section("detector", DEFAULT_DETECTOR_SETTINGS)
+    reference = Detector.from_settings(dict(settings, backend="ultralytics"))
+    candidate = Detector.from_settings(dict(settings, backend=args.backend, int8=args.int8))
+    if not (reference.load() and candidate.load()):
+        raise SystemExit(1)
+
+    report = compare_backends(reference, candidate, read_video_frames(args.video, args.frames))
+    for key, value in report.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
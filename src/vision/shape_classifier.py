@@ -0,0 +1,99 @@
+import math
+import time
+import cv2
+import numpy as np
+
+from utils.perf_stats import LatencyTracker
+from vision.color_classifier import ColorClassifier, COLOR_NAMES
+
+
+SHAPE_NAMES = ["tanımsız", "daire", "üçgen", "kare"]
+
+
+class ShapeClassifier:
+    """
+    Bir karedeki tüm tespitler için toplu şekil (ve renk) sınıflandırıcı.
+    Tespitlerin birleşim bölgesi bir kez küçültülür ve renk LUT'u ile tek geçişte
+    sınıf haritasına çevrilir; her kutu bu ortak haritanın bir görünümü üzerinde
+    kontur yaklaşımıyla sınıflanır. Maliyetin büyük kısmı hedef sayısından bağımsızdır.
+    """
+
+    def __init__(self, color_classifier=None, scale=0.5, epsilon=0.04, min_area=30,
+                 circularity=0.75):
+        self.color_classifier = color_classifier or ColorClassifier(stride=1)
+        self.scale = scale              # ortak maskenin küçültme oranı
+        self.epsilon = epsilon          # approxPolyDP toleransı (çevreye oranla)
+        self.min_area = min_area        # küçültülmüş maskede asgari kontur alanı
+        self.circularity = circularity  # daire için asgari 4πA/P²
+        self.kernel = np.ones((3, 3), dtype=np.uint8)
+        self.latency = LatencyTracker()
+
+    def shape_from_mask(self, mask):
+        """İkili maskedeki en büyük konturun şekli"""
+        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        if not contours:
+            return SHAPE_NAMES[0]
+
+        contour = max(contours, key=cv2.contourArea)
+        area = cv2.contourArea(contour)
+        perimeter = cv2.arcLength(contour, True)
+        if area < self.min_area or perimeter == 0:
+            return SHAPE_NAMES[0]
+
+        vertices = len(cv2.approxPolyDP(contour, self.epsilon * perimeter, True))
+        circularity = 4 * math.pi * area / (perimeter * perimeter)
+        if vertices == 3:
+            return "üçgen"
+        if vertices == 4 and circularity < self.circularity + 0.1:
+            return "kare"
+        if circularity >= self.circularity:
+            return "daire"
+        return SHAPE_NAMES[0]
+
+    def classify_frame(self, frame, boxes):
+        """Karedeki tüm kutular için [{"color", "color_confidence", "shape"}] listesi"""
+        classify_start = time.perf_counter()
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        if len(boxes) == 0:
+            return []
+
+        # Tüm kutuları kapsayan bölge: tek küçültme ve tek LUT geçişi
+        frame_h, frame_w = frame.shape[:2]
+        ux1 = int(max(0, np.floor(boxes[:, 0].min())))
+        uy1 = int(max(0, np.floor(boxes[:, 1].min())))
+        ux2 = int(min(frame_w, np.ceil(boxes[:, 2].max())))
+        uy2 = int(min(frame_h, np.ceil(boxes[:, 3].max())))
+        if ux2 <= ux1 or uy2 <= uy1:
+            return [{"color": COLOR_NAMES[0], "color_confidence": 0.0, "shape": SHAPE_NAMES[0]}
+                    for _ in boxes]
+
+        region = frame[uy1:uy2, ux1:ux2]
+        # 1-2 piksellik bölgede ölçekli boyut 0'a yuvarlanmasın
+        small_size = (max(1, int(round(region.shape[1] * self.scale))),
+                      max(1, int(round(region.shape[0] * self.scale))))
+        small = cv2.resize(region, small_size, interpolation=cv2.INTER_AREA)
+        class_map = self.color_classifier.class_map(small)
+        # Gürültüyü sınıf haritası üzerinde bir kez temizle
+        colorful = cv2.morphologyEx((class_map > 0).astype(np.uint8), cv2.MORPH_OPEN, self.kernel)
+        class_map = np.where(colorful > 0, class_map, 0).astype(np.uint8)
+
+        small_h, small_w = class_map.shape
+        local = np.round((boxes - [ux1, uy1, ux1, uy1]) * self.scale).astype(np.int64)
+        local[:, 0::2] = np.clip(local[:, 0::2], 0, small_w)
+        local[:, 1::2] = np.clip(local[:, 1::2], 0, small_h)
+
+        results = []
+        for x1, y1, x2, y2 in local:
+            classes = class_map[y1:y2, x1:x2]
+            counts = np.bincount(classes.ravel(), minlength=len(COLOR_NAMES))
+            color, confidence = self.color_classifier.classify_histogram(counts)
+
+            shape = SHAPE_NAMES[0]
+            if color != COLOR_NAMES[0]:
+                mask = (classes == COLOR_NAMES.index(color)).astype(np.uint8)
+                shape = self.shape_from_mask(mask)
+
+            results.append({"color": color, "color_confidence": confidence, "shape": shape})
+
+        self.latency.record_since("classify", classify_start)
+        return results
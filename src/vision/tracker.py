@@ -0,0 +1,279 @@
+import threading
+import time
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+from utils.config import get_section
+from utils.math_utils import box_iou
+from utils.perf_stats import LatencyTracker
+
+
+STATE_DIM = 8        # cx, cy, w, h, vx, vy, vw, vh (piksel, piksel/s)
+MEASUREMENT_DIM = 4  # cx, cy, w, h
+
+DEFAULT_TRACKER_SETTINGS = {
+    "max_age": 0.5,
+    "min_hits": 3,
+    "iou_threshold": 0.3,
+    "process_noise": 200.0,
+    "measurement_noise": 4.0,
+    "target_size_m": 0.3
+}
+
+
+def boxes_to_measurements(boxes):
+    """x1 y1 x2 y2 kutularını (cx, cy, w, h) ölçümlerine çevir"""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    measurements = np.empty_like(boxes)
+    measurements[:, 0] = (boxes[:, 0] + boxes[:, 2]) / 2
+    measurements[:, 1] = (boxes[:, 1] + boxes[:, 3]) / 2
+    measurements[:, 2] = boxes[:, 2] - boxes[:, 0]
+    measurements[:, 3] = boxes[:, 3] - boxes[:, 1]
+    return measurements
+
+
+def states_to_boxes(states):
+    """(N, 8) durumlarından x1 y1 x2 y2 kutuları"""
+    boxes = np.empty((len(states), 4), dtype=np.float64)
+    half_w = np.maximum(states[:, 2], 1.0) / 2
+    half_h = np.maximum(states[:, 3], 1.0) / 2
+    boxes[:, 0] = states[:, 0] - half_w
+    boxes[:, 1] = states[:, 1] - half_h
+    boxes[:, 2] = states[:, 0] + half_w
+    boxes[:, 3] = states[:, 1] + half_h
+    return boxes
+
+
+def predict_snapshot_boxes(snapshot, timestamp):
+    """motion_snapshot() çıktısını timestamp anına sabit hızla ilerletip kutulara çevir"""
+    state_time, states = snapshot
+    if state_time is None or not len(states):
+        return np.zeros((0, 4))
+    predicted = states.copy()
+    predicted[:, :4] += states[:, 4:] * max(0.0, timestamp - state_time)
+    return states_to_boxes(predicted)
+
+
+class MultiTargetTracker:
+    """
+    SORT tarzı çoklu hedef izleyici.
+    Sabit hızlı Kalman filtresi tüm izler için tek NumPy dizisinde tutulur:
+    tahmin ve güncelleme adımları iz başına nesne/döngü olmadan toplu yapılır.
+    Eşleştirme IoU maliyeti üzerinde Macar algoritması (linear_sum_assignment) ile yapılır.
+    """
+
+    def __init__(self, max_age=0.5, min_hits=3, iou_threshold=0.3,
+                 process_noise=200.0, measurement_noise=4.0):
+        self.max_age = max_age              # saniye; güncellenmeyen iz silinir
+        self.min_hits = min_hits            # onaylanmak için gereken eşleşme sayısı
+        self.iou_threshold = iou_threshold
+        self.process_noise = process_noise  # ivme gürültüsü (piksel/s²)
+        self.measurement_noise = measurement_noise
+
+        # İz dizileri (N satır = N iz)
+        self.x = np.zeros((0, STATE_DIM))
+        self.P = np.zeros((0, STATE_DIM, STATE_DIM))
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.hits = np.zeros(0, dtype=np.int64)
+        self.last_update = np.zeros(0)
+        self.class_ids = np.zeros(0, dtype=np.int32)
+        self.scores = np.zeros(0, dtype=np.float32)
+
+        self.H = np.hstack((np.eye(MEASUREMENT_DIM), np.zeros((MEASUREMENT_DIM, MEASUREMENT_DIM))))
+        self.R = np.eye(MEASUREMENT_DIM) * measurement_noise ** 2
+        self.identity = np.eye(STATE_DIM)
+
+        self.timestamp = None
+        self.next_id = 1
+        self.lock = threading.Lock()
+        self.latency = LatencyTracker()
+
+    @classmethod
+    def from_settings(cls, settings=None):
+        """config/settings.json 'tracker' bölümünden oluştur"""
+        settings = settings or get_section("tracker", DEFAULT_TRACKER_SETTINGS)
+        return cls(
+            max_age=settings["max_age"],
+            min_hits=settings["min_hits"],
+            iou_threshold=settings["iou_threshold"],
+            process_noise=settings["process_noise"],
+            measurement_noise=settings["measurement_noise"]
+        )
+
+    def transition(self, dt):
+        """dt saniyelik sabit hız geçiş matrisi ve süreç gürültüsü"""
+        F = np.eye(STATE_DIM)
+        F[:4, 4:] = np.eye(4) * dt
+        # Ayrık beyaz gürültü ivme modeli
+        q = self.process_noise ** 2
+        Q = np.zeros((STATE_DIM, STATE_DIM))
+        Q[:4, :4] = np.eye(4) * (dt ** 4 / 4) * q
+        Q[:4, 4:] = np.eye(4) * (dt ** 3 / 2) * q
+        Q[4:, :4] = np.eye(4) * (dt ** 3 / 2) * q
+        Q[4:, 4:] = np.eye(4) * (dt ** 2) * q
+        return F, Q
+
+    def predict(self, timestamp):
+        """Tüm izleri timestamp anına ilerlet (yerinde)"""
+        if self.timestamp is not None and len(self.x):
+            dt = max(0.0, timestamp - self.timestamp)
+            if dt > 0:
+                F, Q = self.transition(dt)
+                self.x = self.x @ F.T
+                self.P = F @ self.P @ F.T + Q
+        self.timestamp = timestamp
+
+    def update(self, boxes, scores, class_ids, timestamp):
+        """Yeni tespitlerle izleri güncelle; onaylı izleri döndür"""
+        update_start = time.perf_counter()
+        with self.lock:
+            self.predict(timestamp)
+
+            measurements = boxes_to_measurements(boxes)
+            scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+            class_ids = np.asarray(class_ids, dtype=np.int32).reshape(-1)
+
+            matched_tracks, matched_dets = self.associate(np.asarray(boxes).reshape(-1, 4))
+
+            if len(matched_tracks):
+                self.correct(matched_tracks, measurements[matched_dets])
+                self.hits[matched_tracks] += 1
+                self.last_update[matched_tracks] = timestamp
+                self.scores[matched_tracks] = scores[matched_dets]
+                self.class_ids[matched_tracks] = class_ids[matched_dets]
+
+            unmatched = np.setdiff1d(np.arange(len(measurements)), matched_dets)
+            if len(unmatched):
+                self.spawn(measurements[unmatched], scores[unmatched],
+                           class_ids[unmatched], timestamp)
+
+            # Uzun süredir görülmeyen izleri sil
+            alive = (timestamp - self.last_update) <= self.max_age
+            if not np.all(alive):
+                self.keep(alive)
+
+            tracks = self.export_tracks()
+
+        self.latency.record_since("update", update_start)
+        return tracks
+
+    def update_from_result(self, result):
+        """DetectionResult ile güncelle (DetectionWorker dinleyicisi olarak)"""
+        return self.update(result.boxes, result.scores, result.class_ids, result.capture_time)
+
+    def associate(self, boxes):
+        """IoU maliyetiyle optimal eşleştirme: (iz indeksleri, tespit indeksleri)"""
+        empty = np.zeros(0, dtype=np.int64)
+        if len(self.x) == 0 or len(boxes) == 0:
+            return empty, empty
+
+        iou = box_iou(states_to_boxes(self.x), boxes)
+        track_idx, det_idx = linear_sum_assignment(-iou)
+        valid = iou[track_idx, det_idx] >= self.iou_threshold
+        return track_idx[valid], det_idx[valid]
+
+    def correct(self, track_idx, measurements):
+        """Eşleşen izler için toplu Kalman güncellemesi"""
+        H = self.H
+        x = self.x[track_idx]
+        P = self.P[track_idx]
+
+        innovation = measurements - x @ H.T                      # (M, 4)
+        PHt = P @ H.T                                            # (M, 8, 4)
+        S = H @ PHt + self.R                                     # (M, 4, 4)
+        K = np.linalg.solve(S, PHt.transpose(0, 2, 1)).transpose(0, 2, 1)  # (M, 8, 4)
+
+        self.x[track_idx] = x + np.einsum("mij,mj->mi", K, innovation)
+        self.P[track_idx] = (self.identity - K @ H) @ P
+
+    def spawn(self, measurements, scores, class_ids, timestamp):
+        """Eşleşmeyen tespitlerden yeni izler oluştur"""
+        count = len(measurements)
+        x = np.zeros((count, STATE_DIM))
+        x[:, :4] = measurements
+
+        # Konum ölçüm kadar, hız ise belirsiz başlar
+        P = np.zeros((count, STATE_DIM, STATE_DIM))
+        size = np.maximum(measurements[:, 2:4].max(axis=1), 1.0)
+        P[:, :4, :4] = np.eye(4) * self.measurement_noise ** 2
+        P[:, 4:, 4:] = np.eye(4)[None] * (size[:, None, None] * 10.0) ** 2
+
+        self.x = np.concatenate((self.x, x))
+        self.P = np.concatenate((self.P, P))
+        self.ids = np.concatenate((self.ids, np.arange(self.next_id, self.next_id + count)))
+        self.next_id += count
+        self.hits = np.concatenate((self.hits, np.ones(count, dtype=np.int64)))
+        self.last_update = np.concatenate((self.last_update, np.full(count, timestamp)))
+        self.class_ids = np.concatenate((self.class_ids, class_ids))
+        self.scores = np.concatenate((self.scores, scores))
+
+    def keep(self, mask):
+        """Maskeye göre izleri tut"""
+        self.x = self.x[mask]
+        self.P = self.P[mask]
+        self.ids = self.ids[mask]
+        self.hits = self.hits[mask]
+        self.last_update = self.last_update[mask]
+        self.class_ids = self.class_ids[mask]
+        self.scores = self.scores[mask]
+
+    def confirmed_mask(self):
+        """Onaylı izler (yeterli eşleşme almış)"""
+        return self.hits >= self.min_hits
+
+    def export_tracks(self, timestamp=None):
+        """Onaylı izleri sözlük listesi olarak döndür (isteğe bağlı olarak ileri tahminle)"""
+        mask = self.confirmed_mask()
+        states = self.x[mask]
+        if timestamp is not None and self.timestamp is not None and len(states):
+            F, _ = self.transition(max(0.0, timestamp - self.timestamp))
+            states = states @ F.T
+
+        # Durumların ait olduğu an (son işlenen karenin yakalanma zamanı ya da tahmin anı)
+        state_time = timestamp if timestamp is not None else self.timestamp
+
+        tracks = []
+        for state, box, track_id, class_id, score, hits, last in zip(
+                states, states_to_boxes(states), self.ids[mask], self.class_ids[mask],
+                self.scores[mask], self.hits[mask], self.last_update[mask]):
+            tracks.append({
+                "id": int(track_id),
+                "box": box.tolist(),
+                "center": (float(state[0]), float(state[1])),
+                "velocity": (float(state[4]), float(state[5])),
+                "class_id": int(class_id),
+                "score": float(score),
+                "hits": int(hits),
+                "last_update": float(last),
+                "time": state_time
+            })
+        return tracks
+
+    def get_tracks(self, timestamp=None):
+        """Onaylı izler; timestamp verilirse o ana tahmin edilmiş konumlarla"""
+        with self.lock:
+            return self.export_tracks(timestamp)
+
+    def predict_boxes(self, timestamp):
+        """Onaylı izlerin timestamp anındaki tahmini kutuları (durumu değiştirmez)"""
+        with self.lock:
+            mask = self.confirmed_mask()
+            if self.timestamp is None or not np.any(mask):
+                return np.zeros((0, 4))
+            F, _ = self.transition(max(0.0, timestamp - self.timestamp))
+            return states_to_boxes(self.x[mask] @ F.T)
+
+    def motion_snapshot(self):
+        """Onaylı izlerin (durum zamanı, durumlar) kopyası; ROI tahmini başka süreçte yapılırken"""
+        with self.lock:
+            return self.timestamp, self.x[self.confirmed_mask()].copy()
+
+    def roi_provider(self, frame_id, timestamp):
+        """DetectionWorker için ROI kaynağı: izlerin bu karedeki tahmini kutuları"""
+        return [tuple(box) for box in self.predict_boxes(timestamp).tolist()]
+
+    def reset(self):
+        """Tüm izleri sil"""
+        with self.lock:
+            self.keep(np.zeros(len(self.x), dtype=bool))
+            self.timestamp = None